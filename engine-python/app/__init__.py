@@ -0,0 +1,27 @@
+"""Competition engine: bracket generation core.
+
+The library API is importable without FastAPI::
+
+    from app import generate
+    result = generate({"context": {...}, "rules": {...}, "participants": [...]})
+
+The HTTP service lives in ``app.main``.
+"""
+from app.core import EngineError, generate, generate_pools, validate_request
+from app.hashing import diff_brackets
+from app.models import GenerateBracketRequest, GenerateBracketResponse, PatchBracketRequest
+from app.patch import patch_bracket
+from app.schedule import schedule_event
+
+__all__ = [
+    "EngineError",
+    "GenerateBracketRequest",
+    "GenerateBracketResponse",
+    "PatchBracketRequest",
+    "diff_brackets",
+    "generate",
+    "generate_pools",
+    "patch_bracket",
+    "schedule_event",
+    "validate_request",
+]
@@ -0,0 +1,216 @@
+"""Live capacity signals and a load-balancer verdict.
+
+``CapacityMiddleware`` wraps the work endpoints (``TRACKED_PATHS``) and
+feeds a ``CapacityTracker``; ``GET /capacity`` reports:
+
+- ``in_flight``: work requests received and not yet answered, including
+  those still waiting for a worker thread
+- ``queued_ms``: estimated time to finish them with no new arrivals.
+  Concurrent requests share the CPU (and the GIL), so a request's work is
+  its latency divided by the mean number in flight while it ran. Work is
+  learned per request size (the power-of-two bucket of the body length, as
+  an exponentially weighted mean), and each in-flight request counts its
+  bucket's estimate minus the work it has already had
+- ``p95_ms``: latency p95 over the last ``LATENCY_WINDOW_S`` seconds
+- ``cpu_per_s``: process CPU seconds per wall second since the previous
+  sample (samples are at least ``CPU_SAMPLE_S`` apart)
+
+and a ``verdict``: ``ready``, ``warming`` (see ``app.warmup``) or ``drain``
+when any signal is over its ``CapacityLimits`` threshold, with the reasons.
+Thresholds come from the environment (``capacity_limits_from_env``).
+A report only reads counters under a lock, so it can be polled at high
+frequency. Signals are per worker process.
+
+Draws are CPU-bound and hold the GIL, so running many at once in the
+threadpool does not add throughput; it starves the event loop, and probes
+(``/capacity``, ``/ready``) wait seconds for an answer. ``limit_worker_threads``
+caps the threads that run sync endpoints (``ENGINE_WORKER_THREADS``,
+default ``DEFAULT_WORKER_THREADS``); requests beyond the cap wait on the
+event loop and count in ``in_flight`` and ``queued_ms``. Latency-sensitive
+routes stay off that pool: the probes are async, and the live results
+routes run on threads of their own (``live_thread_limiter``).
+"""
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import itertools
+import os
+import threading
+import time
+
+import anyio
+import anyio.to_thread
+
+TRACKED_PATHS = ("/v1/brackets/generate", "/v1/brackets/batch", "/v1/brackets/patch", "/v1/brackets/evaluate", "/v1/events/schedule")
+LATENCY_WINDOW_S = 30.0
+LATENCY_SAMPLES = 1024
+CPU_SAMPLE_S = 1.0
+# Weight of a new request's work in its size bucket's estimate
+EWMA_ALPHA = 0.2
+DEFAULT_WORKER_THREADS = 2
+DEFAULT_LIVE_THREADS = 4
+
+
+class CapacityLimits(NamedTuple):
+    max_in_flight: int = 32
+    max_queued_ms: float = 2000.0
+    max_p95_ms: float = 2000.0
+    max_cpu_per_s: float = 0.95
+
+
+def capacity_limits_from_env(environ=os.environ) -> CapacityLimits:
+    """``ENGINE_MAX_IN_FLIGHT``, ``ENGINE_MAX_QUEUED_MS``, ``ENGINE_MAX_P95_MS``, ``ENGINE_MAX_CPU``."""
+    defaults = CapacityLimits()
+    return CapacityLimits(
+        max_in_flight=int(environ.get("ENGINE_MAX_IN_FLIGHT", defaults.max_in_flight)),
+        max_queued_ms=float(environ.get("ENGINE_MAX_QUEUED_MS", defaults.max_queued_ms)),
+        max_p95_ms=float(environ.get("ENGINE_MAX_P95_MS", defaults.max_p95_ms)),
+        max_cpu_per_s=float(environ.get("ENGINE_MAX_CPU", defaults.max_cpu_per_s)),
+    )
+
+
+def limit_worker_threads(environ=os.environ) -> int:
+    """Cap the running loop's threadpool; call from inside the event loop (lifespan)."""
+    threads = int(environ.get("ENGINE_WORKER_THREADS", DEFAULT_WORKER_THREADS))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    return threads
+
+
+def live_thread_limiter(environ=os.environ) -> anyio.CapacityLimiter:
+    """Threads for the live results routes (``ENGINE_LIVE_THREADS``), apart from the capped pool.
+
+    Applying a result is O(1), so these never wait behind draws for a thread.
+    """
+    return anyio.CapacityLimiter(int(environ.get("ENGINE_LIVE_THREADS", DEFAULT_LIVE_THREADS)))
+
+
+def size_bucket(body_bytes: int) -> int:
+    return body_bytes.bit_length()
+
+
+class CapacityTracker:
+    """Thread-safe in-flight, latency and CPU accounting for one worker."""
+
+    def __init__(self, limits: CapacityLimits = CapacityLimits(), clock=time.perf_counter, cpu_clock=time.process_time):
+        self.limits = limits
+        self._clock = clock
+        self._cpu_clock = cpu_clock
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # token -> (start, size bucket, in-flight area at start)
+        self._in_flight: Dict[int, Tuple[float, int, float]] = {}
+        # Integral of the in-flight count over time (request-seconds)
+        self._area = 0.0
+        self._area_at = clock()
+        self._estimates: Dict[int, float] = {}
+        self._latencies: "deque[Tuple[float, float]]" = deque(maxlen=LATENCY_SAMPLES)
+        self._p95: Optional[float] = None
+        self._cpu_sample = (clock(), cpu_clock())
+        self._cpu_per_s = 0.0
+        self.completed = 0
+
+    def _advance(self, now: float):
+        self._area += len(self._in_flight) * (now - self._area_at)
+        self._area_at = now
+
+    def _work_ms(self, start: float, area_start: float, now: float) -> float:
+        """Work done by a request so far: its time divided by the mean concurrency it ran at."""
+        elapsed = now - start
+        area = self._area - area_start
+        return elapsed * elapsed / area * 1000 if area > 0 else elapsed * 1000
+
+    def begin(self, bucket: int) -> int:
+        now = self._clock()
+        with self._lock:
+            self._advance(now)
+            token = next(self._ids)
+            self._in_flight[token] = (now, bucket, self._area)
+            return token
+
+    def end(self, token: int):
+        now = self._clock()
+        with self._lock:
+            self._advance(now)
+            start, bucket, area_start = self._in_flight.pop(token)
+            work_ms = self._work_ms(start, area_start, now)
+            previous = self._estimates.get(bucket)
+            self._estimates[bucket] = work_ms if previous is None else previous + EWMA_ALPHA * (work_ms - previous)
+            self._latencies.append((now, (now - start) * 1000))
+            self._p95 = None
+            self.completed += 1
+
+    def _estimate(self, bucket: int) -> float:
+        if bucket in self._estimates:
+            return self._estimates[bucket]
+        # Unseen size: the nearest smaller bucket, else nothing known yet
+        smaller = [b for b in self._estimates if b < bucket]
+        return self._estimates[max(smaller)] if smaller else 0.0
+
+    def _recent_p95(self, now: float) -> float:
+        while self._latencies and now - self._latencies[0][0] > LATENCY_WINDOW_S:
+            self._latencies.popleft()
+            self._p95 = None
+        if self._p95 is None:
+            values = sorted(ms for _, ms in self._latencies)
+            self._p95 = values[max(0, -(-len(values) * 95 // 100) - 1)] if values else 0.0
+        return self._p95
+
+    def _cpu(self, now: float) -> float:
+        wall, cpu = self._cpu_sample
+        if now - wall >= CPU_SAMPLE_S:
+            cpu_now = self._cpu_clock()
+            self._cpu_per_s = (cpu_now - cpu) / (now - wall)
+            self._cpu_sample = (now, cpu_now)
+        return self._cpu_per_s
+
+    def report(self, ready: bool = True) -> dict:
+        now = self._clock()
+        with self._lock:
+            self._advance(now)
+            in_flight = len(self._in_flight)
+            queued_ms = sum(
+                max(0.0, self._estimate(bucket) - self._work_ms(start, area_start, now))
+                for start, bucket, area_start in self._in_flight.values()
+            )
+            p95_ms = self._recent_p95(now)
+            cpu_per_s = self._cpu(now)
+            completed = self.completed
+        limits = self.limits
+        reasons: List[str] = []
+        if in_flight >= limits.max_in_flight:
+            reasons.append("in_flight")
+        if queued_ms > limits.max_queued_ms:
+            reasons.append("queued_ms")
+        if p95_ms > limits.max_p95_ms:
+            reasons.append("p95_ms")
+        if cpu_per_s > limits.max_cpu_per_s:
+            reasons.append("cpu_per_s")
+        verdict = "warming" if not ready else "drain" if reasons else "ready"
+        return {
+            "verdict": verdict,
+            "reasons": reasons,
+            "in_flight": in_flight,
+            "queued_ms": round(queued_ms, 1),
+            "p95_ms": round(p95_ms, 1),
+            "cpu_per_s": round(cpu_per_s, 3),
+            "completed": completed,
+            "limits": limits._asdict(),
+        }
+
+
+class CapacityMiddleware:
+    """ASGI middleware feeding a ``CapacityTracker`` from ``TRACKED_PATHS``."""
+
+    def __init__(self, app, tracker: CapacityTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in TRACKED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        length = next((int(v) for k, v in scope.get("headers", []) if k == b"content-length"), 0)
+        token = self.tracker.begin(size_bucket(length))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.end(token)
@@ -0,0 +1,201 @@
+"""Opt-in traffic capture.
+
+``CaptureMiddleware`` appends a sample of engine requests to a JSONL file so
+a production payload mix can be replayed later (``benchmarks.replay``). It is
+enabled by setting ``ENGINE_CAPTURE_PATH`` (see ``capture_from_env``); a
+``{pid}`` in the path gives each worker process its own file.
+
+One line per captured request::
+
+    {"ts": 1760000000.123, "method": "POST", "path": "/v1/brackets/generate", "query": "",
+     "encoding": "json", "accept": "application/json", "body": {...},
+     "status": 200, "duration_ms": 12.4, "response_bytes": 5321, "response_hash": null,
+     "anonymized": true}
+
+Only the stateless endpoints in ``CAPTURE_PATHS`` are captured (not the
+worker's own warm-up requests), and never the Authorization header. With anonymization on (the default) every athlete
+id in the body is replaced by a keyed hash, consistently within the request,
+so separation, history and seeds still refer to the same athletes. Renaming
+athletes changes the draw, so an anonymized line keeps the original
+``status`` and ``response_bytes`` but has no ``response_hash``; the engine
+never runs a request twice for the capture. ``benchmarks.replay
+--baseline`` records the hashes offline, against an engine of your choice.
+The cost in the serving process is decoding, anonymizing and writing the
+sampled bodies.
+"""
+from typing import Any, Dict, Optional, Set
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import msgpack
+
+from app.transport import is_msgpack
+from app.warmup import WARMUP_REQUEST_ID
+
+CAPTURE_PATHS = ("/v1/brackets/generate", "/v1/brackets/batch", "/v1/brackets/evaluate", "/v1/brackets/patch", "/v1/events/schedule")
+# Larger bodies are not captured
+MAX_CAPTURE_BYTES = 4 * 1024 * 1024
+
+
+def _collect_ids(value: Any, ids: Set[str]):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k == "athlete_id" and isinstance(v, str):
+                ids.add(v)
+            else:
+                _collect_ids(v, ids)
+    elif isinstance(value, list):
+        for v in value:
+            _collect_ids(v, ids)
+
+
+def _replace_ids(value: Any, mapping: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {mapping.get(k, k): _replace_ids(v, mapping) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_ids(v, mapping) for v in value]
+    if isinstance(value, str):
+        return mapping.get(value, value)
+    return value
+
+
+def anonymize(body: Any, salt: bytes) -> Any:
+    """Replace every athlete id in ``body`` with a keyed hash.
+
+    Ids are found as ``athlete_id`` values anywhere in the body; every other
+    string equal to one of them (history pairs, match slots, dict keys) is
+    replaced too.
+    """
+    ids: Set[str] = set()
+    _collect_ids(body, ids)
+    mapping = {i: "anon_" + hashlib.blake2b(i.encode(), key=salt, digest_size=8).hexdigest() for i in ids}
+    return _replace_ids(body, mapping)
+
+
+def encode_body(body: Any, encoding: str) -> bytes:
+    return msgpack.packb(body, use_bin_type=True) if encoding == "msgpack" else json.dumps(body).encode()
+
+
+class CaptureWriter:
+    """Thread-safe appender of capture lines."""
+
+    def __init__(self, path: str):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class CaptureMiddleware:
+    """ASGI middleware recording sampled requests (see the module docstring)."""
+
+    def __init__(self, app, path: str, sample: float = 1.0, anonymize: bool = True, salt: Optional[str] = None, seed: Optional[int] = None):
+        self.app = app
+        self.writer = CaptureWriter(path)
+        self.sample = sample
+        self.anonymize = anonymize
+        self.salt = salt.encode() if salt else os.urandom(16)
+        self._rng = random.Random(seed)
+
+    def _wants(self, scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"] in CAPTURE_PATHS
+            and (b"x-request-id", WARMUP_REQUEST_ID.encode()) not in scope.get("headers", [])
+            and self.sample > 0
+            and self._rng.random() < self.sample
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self._wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        more = True
+        while more:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 0, "hash": hashlib.sha256(), "bytes": 0}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                data = message.get("body", b"")
+                response["hash"].update(data)
+                response["bytes"] += len(data)
+            await send(message)
+
+        ts = time.time()
+        start = time.perf_counter()
+        await self.app(scope, replay_receive, capture_send)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        if len(body) > MAX_CAPTURE_BYTES:
+            return
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        encoding = "msgpack" if is_msgpack(headers.get("content-type", "")) else "json"
+        try:
+            decoded = msgpack.unpackb(body, raw=False) if encoding == "msgpack" else json.loads(body)
+        except ValueError:
+            return  # Malformed bodies are rejected by the engine; nothing to replay
+        record = {
+            "ts": ts,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "encoding": encoding,
+            "accept": headers.get("accept", ""),
+            "body": decoded,
+            "status": response["status"],
+            "duration_ms": round(duration_ms, 3),
+            "response_bytes": response["bytes"],
+            "response_hash": None if self.anonymize else response["hash"].hexdigest(),
+            "anonymized": self.anonymize,
+        }
+        if self.anonymize:
+            record["body"] = anonymize(decoded, self.salt)
+        await asyncio.get_running_loop().run_in_executor(None, self.writer.write, record)
+
+
+def capture_from_env(app, environ=os.environ):
+    """Add ``CaptureMiddleware`` to ``app`` if ``ENGINE_CAPTURE_PATH`` is set.
+
+    ``ENGINE_CAPTURE_SAMPLE`` is the captured fraction (default 1.0),
+    ``ENGINE_CAPTURE_ANONYMIZE=0`` keeps athlete ids, and
+    ``ENGINE_CAPTURE_SALT`` fixes the anonymization key (default: random per
+    process, so ids only match within a request).
+    """
+    path = environ.get("ENGINE_CAPTURE_PATH")
+    if not path:
+        return
+    app.add_middleware(
+        CaptureMiddleware,
+        path=path,
+        sample=float(environ.get("ENGINE_CAPTURE_SAMPLE", "1.0")),
+        anonymize=environ.get("ENGINE_CAPTURE_ANONYMIZE", "1") != "0",
+        salt=environ.get("ENGINE_CAPTURE_SALT"),
+    )
@@ -0,0 +1,141 @@
+"""``competition-engine`` command line.
+
+    competition-engine generate --in requests.jsonl --out results.jsonl --jobs 8
+    competition-engine fairness payload.json --runs 20000
+    competition-engine registry --in athletes.jsonl --out registry.bin
+    competition-engine jobs run --database "$DATABASE_URL" --jobs 8
+    competition-engine proxy --upstream http://127.0.0.1:8001 --upstream http://127.0.0.1:8002
+
+``generate`` streams one engine request per JSONL line through a process pool
+and writes one line per request, in input order: the engine response (a pool
+draw for ``round_robin``/``pools`` requests), or ``{"error": {...}}`` with the
+same codes the HTTP API returns. ``registry`` builds an athlete registry
+snapshot (see ``app.registry``) from participant records, one per line.
+``jobs`` works the orchestrator's ``bracket_jobs`` queue in batches (see
+``app.jobs``), and ``proxy`` routes requests over several engine instances by
+consistent hashing (see ``app.proxy``).
+"""
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, TextIO
+import argparse
+import json
+import os
+import sys
+
+from pydantic import ValidationError
+
+from app.core import EngineError, generate, generate_pools
+from app.models import ErrorDetail, ErrorResponse
+from app.pools import POOL_FORMATS
+
+# Requests in flight per worker; bounds memory when streaming large inputs
+INFLIGHT_PER_JOB = 16
+
+
+def generate_line(line: str) -> str:
+    """Generate one JSONL request line and return the JSON response line."""
+    try:
+        request = json.loads(line)
+        context = request.get("context") if isinstance(request, dict) else None
+        if isinstance(context, dict) and context.get("format") in POOL_FORMATS:
+            return b"".join(generate_pools(request).iter_json()).decode()
+        return generate(request).model_dump_json()
+    except EngineError as e:
+        error = e.to_response()
+    except (ValueError, ValidationError) as e:
+        error = ErrorResponse(error=ErrorDetail(code="INVALID_REQUEST", message=str(e).splitlines()[0]))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        error = ErrorResponse(
+            error=ErrorDetail(code="INTERNAL_ERROR", message="An internal error occurred", details={"error": str(e)})
+        )
+    return error.model_dump_json()
+
+
+def _request_lines(source: TextIO) -> Iterator[str]:
+    for line in source:
+        if line.strip():
+            yield line
+
+
+def generate_stream(lines: Iterable[str], jobs: int = 1) -> Iterator[str]:
+    """Yield response lines for ``lines`` in order, keeping a bounded window in flight."""
+    if jobs <= 1:
+        for line in lines:
+            yield generate_line(line)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: "deque[Future]" = deque()
+        for line in lines:
+            pending.append(pool.submit(generate_line, line))
+            if len(pending) >= jobs * INFLIGHT_PER_JOB:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _generate_command(args) -> int:
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    count = failed = 0
+    try:
+        for result in generate_stream(_request_lines(source), args.jobs):
+            target.write(result + "\n")
+            count += 1
+            failed += result.startswith('{"error"')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    print(f"Generated {count - failed}/{count} brackets", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def _registry_command(args) -> int:
+    from app.registry import write_registry
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        count = write_registry((json.loads(line) for line in _request_lines(source)), args.output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"Wrote {count} athletes to {args.output}", file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "fairness":
+        from app.fairness import main as fairness_main
+        return fairness_main(argv[1:])
+    if argv and argv[0] == "jobs":
+        from app.jobs import main as jobs_main
+        return jobs_main(argv[1:])
+    if argv and argv[0] == "proxy":
+        from app.proxy import main as proxy_main
+        return proxy_main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="competition-engine", description="Offline bracket generation")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("fairness", help="Monte-Carlo draw-fairness analysis (see app.fairness)")
+    commands.add_parser("jobs", help="Batch runner for the orchestrator's bracket_jobs queue (see app.jobs)")
+    commands.add_parser("proxy", help="Consistent-hash router across engine instances (see app.proxy)")
+    gen = commands.add_parser("generate", help="Generate brackets for a JSONL stream of engine requests")
+    gen.add_argument("--in", dest="input", default="-", help="Input JSONL path ('-' for stdin)")
+    gen.add_argument("--out", dest="output", default="-", help="Output JSONL path ('-' for stdout)")
+    gen.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    reg = commands.add_parser("registry", help="Build an athlete registry snapshot from participant JSONL")
+    reg.add_argument("--in", dest="input", default="-", help="Input JSONL path ('-' for stdin)")
+    reg.add_argument("--out", dest="output", required=True, help="Snapshot path (replaced atomically)")
+    args = parser.parse_args(argv)
+    if args.command == "registry":
+        return _registry_command(args)
+    return _generate_command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
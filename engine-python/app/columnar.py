@@ -0,0 +1,127 @@
+"""Columnar response format (``?format=columnar``).
+
+Matches become parallel arrays instead of an array of objects. Athletes are
+indices into ``athletes``, match links are integer offsets (into ``matches``,
+then ``repechage_matches``), and fields derivable from round and position
+(``match_type``, ``is_bye``, ``metadata.path``) are left out. ``-1`` stands for
+null. ``from_columnar`` rebuilds the default format.
+"""
+from typing import Any, Dict, List, Optional
+
+from app.models import GenerateBracketResponse
+from app.routing import extra_path
+
+NONE = -1
+
+
+def to_columnar(result: GenerateBracketResponse) -> Dict[str, Any]:
+    athletes = [s.athlete_id for s in result.participants_slots]
+    athlete_index = {aid: i for i, aid in enumerate(athletes)}
+    offsets = {m.id: i for i, m in enumerate(result.matches)}
+    offsets.update({m.id: len(result.matches) + i for i, m in enumerate(result.repechage_matches)})
+
+    def athlete(aid: Optional[str]) -> int:
+        return NONE if aid is None else athlete_index[aid]
+
+    matches = result.matches
+    columns: Dict[str, List[Any]] = {
+        "id": [m.id for m in matches],
+        "round": [m.round for m in matches],
+        "position": [m.position for m in matches],
+        "red": [athlete(m.athlete_red) for m in matches],
+        "white": [athlete(m.athlete_white) for m in matches],
+        "next": [offsets.get(m.next_match_id, NONE) for m in matches],
+        "loser_next": [offsets.get(m.loser_next_match_id, NONE) for m in matches],
+    }
+    if matches and matches[0].hash is not None:
+        columns["hash"] = [m.hash for m in matches]
+        columns["subtree_hash"] = [m.subtree_hash for m in matches]
+
+    repechage = result.repechage_matches
+    repechage_columns: Dict[str, List[Any]] = {
+        "id": [m.id for m in repechage],
+        "match_type": [m.match_type for m in repechage],
+        "round": [m.round for m in repechage],
+        "position": [m.position for m in repechage],
+        "source_loser": [offsets.get(m.source_loser_match_id, NONE) for m in repechage],
+        "next": [offsets.get(m.next_match_id, NONE) for m in repechage],
+    }
+    if repechage and repechage[0].hash is not None:
+        repechage_columns["hash"] = [m.hash for m in repechage]
+
+    return {
+        "engine_version": result.engine_version,
+        "format": "columnar",
+        "summary": result.summary.model_dump(),
+        "athletes": athletes,
+        "slots": [s.slot for s in result.participants_slots],
+        "seeds": [s.seed for s in result.participants_slots],
+        "matches": columns,
+        "repechage_matches": repechage_columns,
+        "hashes": result.hashes.model_dump() if result.hashes else None,
+    }
+
+
+def from_columnar(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand a columnar response back into the default response shape."""
+    athletes = data["athletes"]
+    rounds = data["summary"]["rounds"]
+    columns = data["matches"]
+    repechage_columns = data["repechage_matches"]
+    ids = columns["id"] + repechage_columns["id"]
+
+    def athlete(index: int) -> Optional[str]:
+        return None if index == NONE else athletes[index]
+
+    def match_id(offset: int) -> Optional[str]:
+        return None if offset == NONE else ids[offset]
+
+    matches = []
+    for i, main_id in enumerate(columns["id"]):
+        r, pos = columns["round"][i], columns["position"][i]
+        red, white = athlete(columns["red"][i]), athlete(columns["white"][i])
+        match = {
+            "id": main_id,
+            "match_type": "final" if r == rounds else "main",
+            "round": r,
+            "position": pos,
+            "athlete_red": red,
+            "athlete_white": white,
+            "is_bye": r == 1 and (red is None or white is None),
+            "next_match_id": match_id(columns["next"][i]),
+            "loser_next_match_id": match_id(columns["loser_next"][i]),
+            "metadata": {"path": f"R{r}:M{pos}"},
+        }
+        if "hash" in columns:
+            match["hash"] = columns["hash"][i]
+            match["subtree_hash"] = columns["subtree_hash"][i]
+        matches.append(match)
+
+    repechage_matches = []
+    for i, rep_id in enumerate(repechage_columns["id"]):
+        r, pos = repechage_columns["round"][i], repechage_columns["position"][i]
+        match_type = repechage_columns["match_type"][i]
+        match = {
+            "id": rep_id,
+            "match_type": match_type,
+            "round": r,
+            "position": pos,
+            "source_loser_match_id": match_id(repechage_columns["source_loser"][i]),
+            "next_match_id": match_id(repechage_columns["next"][i]),
+            "metadata": {"path": extra_path(match_type, r, pos)},
+        }
+        if "hash" in repechage_columns:
+            match["hash"] = repechage_columns["hash"][i]
+        repechage_matches.append(match)
+
+    return {
+        "engine_version": data["engine_version"],
+        "summary": data["summary"],
+        "participants_slots": [
+            {"athlete_id": aid, "slot": slot, "seed": seed}
+            for aid, slot, seed in zip(athletes, data["slots"], data["seeds"])
+        ],
+        "matches": matches,
+        "repechage_matches": repechage_matches,
+        "hashes": data["hashes"],
+    }
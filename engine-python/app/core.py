@@ -0,0 +1,119 @@
+"""In-process generation API.
+
+``generate`` validates a request and runs the draw without any FastAPI
+dependency, so scripts, tests and the CLI can call the engine directly.
+Validation failures raise ``EngineError`` carrying the same code, message and
+details the HTTP API returns.
+"""
+from collections import Counter
+from typing import Any, Dict, Optional, TypeVar, Union
+
+from app.draw import run_draw
+from app.models import ErrorDetail, ErrorResponse, GenerateBracketRequest, GenerateBracketResponse
+from app.pools import POOL_FORMATS, PoolDraw, pool_count, run_pools
+from app.profiles import profiles
+
+MIN_PARTICIPANTS = 4
+MAX_PARTICIPANTS = 256
+
+
+class EngineError(Exception):
+    """A request the engine refuses, mapped to a 4xx response by the API."""
+
+    def __init__(self, code: str, message: str, details: Optional[Dict[str, Any]] = None, status_code: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.details = details
+        self.status_code = status_code
+
+    def to_response(self) -> ErrorResponse:
+        return ErrorResponse(error=ErrorDetail(code=self.code, message=self.message, details=self.details))
+
+
+RequestT = TypeVar("RequestT")
+
+
+def resolve_rules(request: RequestT) -> RequestT:
+    """Replace ``profile_id`` with the registered profile's rules."""
+    if request.profile_id is None:
+        return request
+    evaluator = profiles.get(request.profile_id)
+    if evaluator is None:
+        raise EngineError("UNKNOWN_PROFILE", "Draw profile is not registered", {"profile_id": request.profile_id})
+    return request.model_copy(update={"rules": evaluator.rules, "profile_id": None})
+
+
+def validate_request(request: GenerateBracketRequest):
+    """Raise ``EngineError`` if the request cannot be drawn."""
+    participants = request.participants
+    if len(participants) < MIN_PARTICIPANTS:
+        raise EngineError(
+            "INVALID_PARTICIPANTS_COUNT",
+            f"Minimum {MIN_PARTICIPANTS} participants required",
+            {"count": len(participants), "min": MIN_PARTICIPANTS},
+        )
+    if len(participants) > MAX_PARTICIPANTS:
+        raise EngineError(
+            "INVALID_PARTICIPANTS_COUNT",
+            f"Maximum {MAX_PARTICIPANTS} participants allowed",
+            {"count": len(participants), "max": MAX_PARTICIPANTS},
+        )
+
+    counts = Counter(p.athlete_id for p in participants)
+    duplicates = [athlete_id for athlete_id, count in counts.items() if count > 1]
+    if duplicates:
+        raise EngineError("DUPLICATE_ATHLETE_IDS", "Athlete IDs must be unique", {"duplicates": duplicates})
+
+    if request.rules.seeding_mode == "manual":
+        seeds = Counter(p.seed for p in participants if p.seed)
+        duplicates = sorted(seed for seed, count in seeds.items() if count > 1)
+        if duplicates:
+            raise EngineError("DUPLICATE_SEED", "Manual seeds must be unique", {"duplicates": duplicates})
+
+
+def validate_pools(request: GenerateBracketRequest):
+    """Raise ``EngineError`` if the pool layout of a pool-format request is impossible."""
+    if request.context.format != "pools":
+        return
+    n = len(request.participants)
+    pools = pool_count(n, request.context)
+    if not 2 <= pools <= n // 2:
+        raise EngineError("INVALID_POOLS", "Pools need at least two athletes each", {"pools": pools, "min": 2, "max": n // 2})
+    qualifiers = request.context.pool_qualifiers
+    if not 1 <= qualifiers <= n // pools:
+        raise EngineError(
+            "INVALID_POOL_QUALIFIERS",
+            "Qualifiers per pool must be between 1 and the smallest pool size",
+            {"pool_qualifiers": qualifiers, "max": n // pools},
+        )
+
+
+def _as_request(request: Union[GenerateBracketRequest, Dict[str, Any]]) -> GenerateBracketRequest:
+    if not isinstance(request, GenerateBracketRequest):
+        request = GenerateBracketRequest.model_validate(request)
+    request = resolve_rules(request)
+    validate_request(request)
+    return request
+
+
+def generate(request: Union[GenerateBracketRequest, Dict[str, Any]]) -> GenerateBracketResponse:
+    """Validate ``request`` (model or plain dict) and generate its bracket."""
+    request = _as_request(request)
+    if request.context.format in POOL_FORMATS:
+        raise EngineError(
+            "UNSUPPORTED_FORMAT", "Pool formats are drawn with generate_pools", {"format": request.context.format}
+        )
+    return run_draw(request)
+
+
+def generate_pools(request: Union[GenerateBracketRequest, Dict[str, Any]]) -> PoolDraw:
+    """Validate a ``round_robin``/``pools`` request and draw its pools.
+
+    Fixtures are generated lazily; see ``app.pools.PoolDraw``.
+    """
+    request = _as_request(request)
+    if request.context.format not in POOL_FORMATS:
+        raise EngineError("UNSUPPORTED_FORMAT", "Not a pool format", {"format": request.context.format, "supported": list(POOL_FORMATS)})
+    validate_pools(request)
+    return run_pools(request)
@@ -0,0 +1,293 @@
+"""Bracket draw algorithm: seeding, placement, swap optimization and match graph.
+
+Pure functions over the request models, with no HTTP concerns, so the draw can
+run in-process (analysis tools, tests) as well as behind the API.
+"""
+from typing import List
+import hashlib
+import random
+import math
+
+import numpy as np
+
+from app.models import (
+    GenerateBracketRequest,
+    GenerateBracketResponse,
+    Match,
+    ParticipantSlot,
+    Quality,
+    RepechageMatch,
+    Summary,
+)
+from app import routing
+from app.hashing import hash_bracket
+from app.instrument import NULL_PROBE
+from app.profiles import compile_rules
+from app.quality import (
+    EMPTY,
+    AttributeCodes,
+    encode_bracket,
+    evaluate_bracket,
+    nation_dominant,
+    normalize_nation_collisions,
+)
+
+# Utility functions
+
+def next_power_of_two(n: int) -> int:
+    return 1 << (n - 1).bit_length()
+
+def stable_hash(data: str) -> str:
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def get_seed_positions(size: int, num_seeds: int) -> List[int]:
+    # Standard seed positions for single elimination
+    positions = {
+        4: [0, 3, 1, 2],  # For size=4: 1 at 0, 4 at 3, 2 at 1, 3 at 2
+        8: [0, 7, 3, 4, 1, 6, 2, 5],  # 1,8,4,5,2,7,3,6
+        16: [0, 15, 7, 8, 3, 12, 4, 11, 1, 14, 6, 9, 2, 13, 5, 10],  # Standard 16
+    }
+    if num_seeds in positions and len(positions[num_seeds]) >= num_seeds:
+        return positions[num_seeds][:num_seeds]
+    # Fallback: place in order
+    return list(range(num_seeds))
+
+def auto_seed_count(rules, participants: int) -> int:
+    """``max_seeds`` capped by the seeding threshold for a field of ``participants``."""
+    threshold = rules.seeding_thresholds.min_16 if participants >= 16 else rules.seeding_thresholds.lt_16
+    return min(rules.max_seeds, threshold)
+
+def seeded_random(seed: str):
+    random.seed(int(hashlib.md5(seed.encode()).hexdigest(), 16) % (2**32))
+
+# Algorithm implementation
+
+def resolve_draw_seed(request: GenerateBracketRequest) -> str:
+    """``context.draw_seed``, or a stable hash of the request when unset."""
+    if request.context.draw_seed:
+        return request.context.draw_seed
+    data = f"{request.context.sport}{request.context.format}{request.rules.model_dump_json()}{[p.model_dump_json() for p in request.participants]}"
+    return stable_hash(data)
+
+def run_draw(request: GenerateBracketRequest, probe=NULL_PROBE) -> GenerateBracketResponse:
+    """Run the draw for an already validated request.
+
+    ``probe`` (see ``app.instrument``) is told as each stage finishes.
+    """
+    probe.start()
+    draw_seed = resolve_draw_seed(request)
+    seeded_random(draw_seed)
+
+    participants = request.participants
+    n = len(participants)
+    size = next_power_of_two(n)
+    rounds = int(math.log2(size))
+    byes = size - n
+
+    # Seeding
+    seeds = {}
+    if request.rules.seeding_mode == "manual":
+        for p in participants:
+            if p.seed:
+                if p.seed in seeds:
+                    raise ValueError("Duplicate seed")
+                seeds[p.seed] = p.athlete_id
+    elif request.rules.seeding_mode == "auto":
+        max_seeds = auto_seed_count(request.rules, n)
+        sorted_p = sorted(participants, key=lambda x: x.ranking_points or 0, reverse=True)
+        for i in range(max_seeds):
+            seeds[i+1] = sorted_p[i].athlete_id
+
+    # Assign slots
+    slots = [None] * size
+    seeded_ids = set(seeds.values())
+    unseeded = [p for p in participants if p.athlete_id not in seeded_ids]
+
+    # Place seeds using standard positions
+    seed_positions = get_seed_positions(size, len(seeds))
+    for seed_num, athlete_id in seeds.items():
+        if seed_num - 1 < len(seed_positions):
+            slots[seed_positions[seed_num - 1]] = athlete_id
+    probe.lap("seeding")
+
+    # Greedy placement for unseeded
+    penalty = compile_rules(request.rules).bind(participants, request.history)
+    available_slots = [i for i in range(size) if slots[i] is None]
+    for p in unseeded:
+        probe.count("penalty_evals", len(available_slots))
+        best_slot = min(available_slots, key=lambda slot: penalty(slot, p, slots))
+        slots[best_slot] = p.athlete_id
+        available_slots.remove(best_slot)
+    probe.lap("placement")
+
+    # Local swap optimization: swap R1 opponents to reduce collisions
+    # without changing the overall structure. A swap only changes the two
+    # round-1 pairs it touches, so candidates are scored from those.
+    # Improvements are taken as the scan finds them; passes repeat until one
+    # finds none.
+    attributes = {p.athlete_id: (p.club_id, p.nation_code) for p in participants}
+    club_codes, nation_codes = encode_bracket(slots, attributes, AttributeCodes())
+    club, nation = club_codes.tolist(), nation_codes.tolist()
+    # Weighted nation collisions by count, so scoring a swap stays scalar
+    nation_weight = normalize_nation_collisions(
+        np.arange(size // 2 + 1), nation_dominant(p.nation_code for p in participants)
+    ).tolist()
+
+    def collisions_in(pairs):
+        probe.count("pair_checks", len(pairs))
+        club_hits = nation_hits = 0
+        for pair in pairs:
+            a, b = 2 * pair, 2 * pair + 1
+            club_hits += club[a] != EMPTY and club[a] == club[b]
+            nation_hits += nation[a] != EMPTY and nation[a] == nation[b]
+        return club_hits, nation_hits
+
+    def swap(a, b):
+        slots[a], slots[b] = slots[b], slots[a]
+        club[a], club[b] = club[b], club[a]
+        nation[a], nation[b] = nation[b], nation[a]
+
+    def collisions_after_swap(a, b):
+        probe.count("swap_evals")
+        pairs = (a // 2, b // 2)
+        club_before, nation_before = collisions_in(pairs)
+        swap(a, b)
+        club_after, nation_after = collisions_in(pairs)
+        swap(a, b)
+        return club_coll + club_after - club_before, nation_coll + nation_after - nation_before
+
+    club_coll, nation_coll = collisions_in(range(size // 2))
+    initial_collisions = club_coll + nation_weight[nation_coll]
+
+    improved = True
+    while improved:
+        probe.count("swap_passes")
+        improved = False
+        for i in range(0, size, 2):
+            if not slots[i] or not slots[i+1]:
+                continue
+            for j in range(i+2, size, 2):
+                if not slots[j] or not slots[j+1]:
+                    continue
+                # Try swapping slots[i+1] with slots[j], then slots[i] with slots[j+1]
+                for a, b in ((i+1, j), (i, j+1)):
+                    new_club, new_nation = collisions_after_swap(a, b)
+                    new_collisions = new_club + nation_weight[new_nation]
+                    if new_collisions < initial_collisions:
+                        swap(a, b)
+                        club_coll, nation_coll = new_club, new_nation
+                        initial_collisions = new_collisions
+                        improved = True
+
+    probe.lap("swaps")
+
+    # Create matches
+    matches = []
+    match_counter = 0
+    def new_match_id():
+        nonlocal match_counter
+        match_counter += 1
+        return f"match-{match_counter}-{draw_seed[:8]}"
+
+    # Round 1
+    for pos in range(size // 2):
+        m_id = new_match_id()
+        red = slots[pos*2] if pos*2 < len(slots) else None
+        white = slots[pos*2 + 1] if pos*2 + 1 < len(slots) else None
+        is_bye = (red is None or white is None)
+        match_type = "final" if rounds == 1 else "main"
+        matches.append(Match(
+            id=m_id,
+            match_type=match_type,
+            round=1,
+            position=pos+1,
+            athlete_red=red,
+            athlete_white=white,
+            is_bye=is_bye,
+            metadata={"path": f"R1:M{pos+1}"}
+        ))
+
+    # Subsequent rounds
+    current_round_matches = matches[:]
+    for r in range(2, rounds+1):
+        next_round_matches = []
+        for pos in range(len(current_round_matches) // 2):
+            m_id = new_match_id()
+            next_round_matches.append(Match(
+                id=m_id,
+                match_type="main" if r < rounds else "final",
+                round=r,
+                position=pos+1,
+                metadata={"path": f"R{r}:M{pos+1}"}
+            ))
+            # Link previous
+            current_round_matches[pos*2].next_match_id = m_id
+            current_round_matches[pos*2 + 1].next_match_id = m_id
+        matches.extend(next_round_matches)
+        current_round_matches = next_round_matches
+
+    # Repechage / losers bracket, routed by the cached table for this size
+    repechage_matches = []
+    if request.context.format == "double_elim":
+        table = routing.double_elim(size)
+    elif request.context.repechage:
+        table = routing.repechage(size)
+    else:
+        table = None
+    if table:
+        ids = [m.id for m in matches] + [new_match_id() for _ in table.extra]
+        for m, target in zip(matches, table.loser_next):
+            if target != routing.NONE:
+                m.loser_next_match_id = ids[target]
+        for main, target in table.main_next:
+            matches[main].next_match_id = ids[target]
+        first_source = {}
+        for source, target in enumerate(table.loser_next):
+            if target != routing.NONE:
+                first_source.setdefault(target, ids[source])
+        for offset, (extra, target) in enumerate(zip(table.extra, table.extra_next)):
+            match_id = ids[len(matches) + offset]
+            repechage_matches.append(RepechageMatch(
+                id=match_id,
+                match_type=extra.match_type,
+                round=extra.round,
+                position=extra.position,
+                source_loser_match_id=first_source.get(len(matches) + offset),
+                next_match_id=ids[target] if target != routing.NONE else None,
+                metadata={"path": routing.extra_path(*extra)}
+            ))
+
+    probe.lap("matches")
+
+    # Participants slots
+    participants_slots = []
+    seed_of = {}
+    for s, aid in seeds.items():
+        seed_of.setdefault(aid, s)
+    for slot, athlete_id in enumerate(slots):
+        if athlete_id:
+            participants_slots.append(ParticipantSlot(athlete_id=athlete_id, slot=slot+1, seed=seed_of.get(athlete_id)))
+
+    # Quality
+    quality = Quality(**evaluate_bracket(slots, participants, seeds))
+
+    summary = Summary(
+        participants=n,
+        size=size,
+        rounds=rounds,
+        byes=byes,
+        repechage=request.context.repechage,
+        quality=quality,
+        penalties=request.rules.penalties
+    )
+
+    probe.lap("quality")
+
+    result = hash_bracket(GenerateBracketResponse(
+        summary=summary,
+        participants_slots=participants_slots,
+        matches=matches,
+        repechage_matches=repechage_matches
+    ))
+    probe.lap("hashing")
+    return result
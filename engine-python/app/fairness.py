@@ -0,0 +1,175 @@
+"""Monte-Carlo draw-fairness analysis.
+
+Runs many draws of one participant set under one rule set, in-process and in
+parallel, and reports how quality, club/nation meetings per round, seed
+protection and bye fairness are distributed.
+
+The draw is deterministic for a given input, so each simulated draw permutes
+the entry order of the participants (the only input that varies between two
+real registrations of the same field) and uses its own ``draw_seed``.
+
+Usage:
+    python -m app.fairness temp/engine_payload.json --runs 20000 --jobs 8 \\
+        --csv temp/fairness.csv --summary temp/fairness.json
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+
+import numpy as np
+
+from app.core import EngineError, resolve_rules, validate_request
+from app.draw import next_power_of_two, run_draw
+from app.models import GenerateBracketRequest
+from app.quality import EMPTY, AttributeCodes
+
+CHUNK_SIZE = 250
+
+
+def meetings_per_round(slots: Sequence[Optional[str]], values: Dict[str, Optional[str]], rounds: int) -> List[int]:
+    """Count same-attribute pairs by the earliest round they can meet.
+
+    Two athletes in slots ``a`` and ``b`` can first meet in round
+    ``(a ^ b).bit_length()``; index ``r - 1`` of the result holds round ``r``.
+    """
+    codes = AttributeCodes()
+    encoded = np.array([codes.code(values.get(aid)) if aid is not None else EMPTY for aid in slots])
+    positions = np.flatnonzero(encoded != EMPTY)
+    encoded = encoded[positions]
+    same = np.triu(encoded[:, None] == encoded[None, :], k=1)
+    left, right = np.nonzero(same)
+    distance = positions[left] ^ positions[right]
+    first_round = np.floor(np.log2(distance)).astype(np.int64) + 1 if distance.size else distance
+    return np.bincount(first_round, minlength=rounds + 1)[1:rounds + 1].tolist()
+
+
+def simulate_draw(request: GenerateBracketRequest, run: int, seed: str) -> dict:
+    """Run one draw with a shuffled entry order and return its metrics row."""
+    rng = random.Random(f"{seed}:{run}")
+    participants = list(request.participants)
+    rng.shuffle(participants)
+    shuffled = request.model_copy(update={
+        "participants": participants,
+        "context": request.context.model_copy(update={"draw_seed": f"{seed}:{run}"}),
+    })
+    result = run_draw(shuffled)
+
+    rounds = result.summary.rounds
+    slots: List[Optional[str]] = [None] * result.summary.size
+    for s in result.participants_slots:
+        slots[s.slot - 1] = s.athlete_id
+    clubs = {p.athlete_id: p.club_id for p in participants}
+    nations = {p.athlete_id: p.nation_code for p in participants}
+
+    row = {"run": run, **result.summary.quality.model_dump()}
+    for r, count in enumerate(meetings_per_round(slots, clubs, rounds), start=1):
+        row[f"club_meetings_r{r}"] = count
+    for r, count in enumerate(meetings_per_round(slots, nations, rounds), start=1):
+        row[f"nation_meetings_r{r}"] = count
+    return row
+
+
+def _simulate_chunk(payload: dict, runs: range, seed: str) -> List[dict]:
+    request = GenerateBracketRequest.model_validate(payload)
+    return [simulate_draw(request, run, seed) for run in runs]
+
+
+def run_simulation(payload: dict, runs: int, jobs: int = 1, seed: str = "fairness") -> List[dict]:
+    """Simulate ``runs`` draws across ``jobs`` processes; rows are ordered by run."""
+    # Workers may not see this process's registered profiles, so ship resolved rules
+    payload = resolve_rules(GenerateBracketRequest.model_validate(payload)).model_dump()
+    chunks = [range(start, min(start + CHUNK_SIZE, runs)) for start in range(0, runs, CHUNK_SIZE)]
+    if jobs <= 1:
+        return [row for chunk in chunks for row in _simulate_chunk(payload, chunk, seed)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(_simulate_chunk, [payload] * len(chunks), chunks, [seed] * len(chunks))
+        return [row for chunk_rows in results for row in chunk_rows]
+
+
+def summarize(rows: List[dict]) -> dict:
+    """Histograms and means for every metric column, plus P(meeting >= 1) per round."""
+    summary = {"runs": len(rows), "metrics": {}}
+    if not rows:
+        return summary
+    for column in rows[0]:
+        if column == "run":
+            continue
+        values = np.array([row[column] for row in rows], dtype=float)
+        histogram = Counter(row[column] for row in rows)
+        metric = {
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "histogram": {str(k): histogram[k] for k in sorted(histogram)},
+        }
+        if "_meetings_" in column:
+            metric["p_at_least_one"] = float((values >= 1).mean())
+        summary["metrics"][column] = metric
+    return summary
+
+
+def write_csv(rows: List[dict], path: str):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if not rows:
+            return
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def format_report(summary: dict, width: int = 40) -> str:
+    lines = [f"Draws simulated: {summary['runs']}"]
+    for column, metric in summary["metrics"].items():
+        lines.append("")
+        line = f"{column}: mean={metric['mean']:.3f} std={metric['std']:.3f}"
+        if "p_at_least_one" in metric:
+            line += f" P(>=1)={metric['p_at_least_one']:.3f}"
+        lines.append(line)
+        peak = max(metric["histogram"].values())
+        for value, count in metric["histogram"].items():
+            bar = "#" * max(1, round(width * count / peak))
+            lines.append(f"  {value:>6} {count:>8} {bar}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Monte-Carlo draw-fairness analysis")
+    parser.add_argument("payload", help="Engine request JSON (as sent to /v1/brackets/generate)")
+    parser.add_argument("--runs", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", default="fairness", help="Base seed for entry-order shuffles")
+    parser.add_argument("--csv", help="Write one row per simulated draw")
+    parser.add_argument("--summary", help="Write histograms and statistics as JSON")
+    args = parser.parse_args(argv)
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    with open(args.payload, encoding="utf-8") as f:
+        payload = json.load(f)
+    try:
+        validate_request(resolve_rules(GenerateBracketRequest.model_validate(payload)))
+    except EngineError as e:
+        print(f"{e.code}: {e.message}", file=sys.stderr)
+        return 1
+
+    rows = run_simulation(payload, args.runs, args.jobs, args.seed)
+    summary = summarize(rows)
+    summary["size"] = next_power_of_two(len(payload["participants"]))
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    print(format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
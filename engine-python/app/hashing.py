@@ -0,0 +1,137 @@
+"""Structural hashes for engine results.
+
+Every match carries a content ``hash`` and a Merkle ``subtree_hash`` that also
+covers the matches feeding into it. Each round and the whole bracket get a root
+hash, so consumers can tell "unchanged" with one comparison and find changed
+matches by descending only into subtrees whose hash differs.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Union
+import hashlib
+import json
+
+from pydantic import BaseModel
+
+from app.models import BracketHashes, GenerateBracketResponse, Match
+
+HASH_FIELDS = {"hash", "subtree_hash"}
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def content_hash(model: BaseModel) -> str:
+    """Hash of a match's own fields (canonical JSON, hash fields excluded)."""
+    data = model.model_dump(exclude=HASH_FIELDS)
+    return _digest(json.dumps(data, sort_keys=True, separators=(",", ":")))
+
+
+def hash_bracket(result: GenerateBracketResponse, changed_ids: Optional[Iterable[str]] = None) -> GenerateBracketResponse:
+    """Return ``result`` with match, round and bracket hashes set.
+
+    With ``changed_ids``, content hashes already present on other matches are
+    reused; only the Merkle combinations (cheap digests of digests) are redone.
+    Matches whose hashes are unchanged are kept as the same objects.
+    """
+    changed: Optional[Set[str]] = set(changed_ids) if changed_ids is not None else None
+
+    def own_hash(m: BaseModel) -> str:
+        if m.hash is None or changed is None or m.id in changed:
+            return content_hash(m)
+        return m.hash
+
+    hashes = {m.id: own_hash(m) for m in result.matches}
+    repechage_hashes = [own_hash(m) for m in result.repechage_matches]
+
+    by_id = {m.id: m for m in result.matches}
+    children: Dict[str, List[Match]] = {}
+    for m in result.matches:
+        if m.next_match_id in by_id:
+            children.setdefault(m.next_match_id, []).append(m)
+
+    subtree: Dict[str, str] = {}
+    rounds: Dict[int, List[str]] = {}
+    for m in sorted(result.matches, key=lambda m: (m.round, m.position)):
+        feeders = sorted(children.get(m.id, []), key=lambda c: c.position)
+        subtree[m.id] = _digest(hashes[m.id], *(subtree[c.id] for c in feeders))
+        rounds.setdefault(m.round, []).append(hashes[m.id])
+
+    matches = [
+        m if (m.hash, m.subtree_hash) == (hashes[m.id], subtree[m.id])
+        else m.model_copy(update={"hash": hashes[m.id], "subtree_hash": subtree[m.id]})
+        for m in result.matches
+    ]
+    repechage_matches = [
+        m if m.hash == h else m.model_copy(update={"hash": h})
+        for m, h in zip(result.repechage_matches, repechage_hashes)
+    ]
+
+    roots = [subtree[m.id] for m in result.matches if m.next_match_id not in by_id]
+    repechage = _digest(*repechage_hashes)
+    slots = _digest(*(f"{s.slot}:{s.athlete_id}:{s.seed}" for s in result.participants_slots))
+    return result.model_copy(update={
+        "matches": matches,
+        "repechage_matches": repechage_matches,
+        "hashes": BracketHashes(
+            bracket=_digest(*roots, repechage, slots),
+            rounds=[_digest(*rounds[r]) for r in sorted(rounds)],
+            repechage=repechage,
+        ),
+    })
+
+
+def diff_brackets(
+    old: Union[GenerateBracketResponse, dict],
+    new: Union[GenerateBracketResponse, dict],
+) -> dict:
+    """Diff two hashed results, skipping every subtree whose hash is unchanged.
+
+    Returns ``unchanged`` plus ``changed``/``added``/``removed`` match ids
+    (repechage matches included). Hash comparisons are O(changes * log n).
+    """
+    if isinstance(old, dict):
+        old = GenerateBracketResponse.model_validate(old)
+    if isinstance(new, dict):
+        new = GenerateBracketResponse.model_validate(new)
+    if old.hashes is None or new.hashes is None:
+        old, new = hash_bracket(old), hash_bracket(new)
+    if old.hashes.bracket == new.hashes.bracket:
+        return {"unchanged": True, "changed": [], "added": [], "removed": []}
+
+    old_by_id = {m.id: m for m in old.matches}
+    new_by_id = {m.id: m for m in new.matches}
+    children: Dict[str, List[Match]] = {}
+    for m in new.matches:
+        if m.next_match_id in new_by_id:
+            children.setdefault(m.next_match_id, []).append(m)
+
+    changed: List[str] = []
+    added: List[str] = []
+    stack = [m for m in new.matches if m.next_match_id not in new_by_id]
+    while stack:
+        m = stack.pop()
+        previous = old_by_id.get(m.id)
+        if previous is not None and previous.subtree_hash == m.subtree_hash:
+            continue
+        if previous is None:
+            added.append(m.id)
+        elif previous.hash != m.hash:
+            changed.append(m.id)
+        stack.extend(children.get(m.id, []))
+
+    removed: List[str] = []
+    if added or len(old.matches) != len(new.matches):
+        removed = [mid for mid in old_by_id if mid not in new_by_id]
+
+    if old.hashes.repechage != new.hashes.repechage:
+        old_rep = {m.id: m.hash for m in old.repechage_matches}
+        new_rep = {m.id: m.hash for m in new.repechage_matches}
+        added += [mid for mid in new_rep if mid not in old_rep]
+        removed += [mid for mid in old_rep if mid not in new_rep]
+        changed += [mid for mid, h in new_rep.items() if mid in old_rep and old_rep[mid] != h]
+
+    return {"unchanged": False, "changed": sorted(changed), "added": sorted(added), "removed": sorted(removed)}
@@ -0,0 +1,53 @@
+"""Optional per-stage instrumentation for the draw.
+
+``run_draw`` takes a ``probe`` and calls ``probe.lap(stage)`` as each stage
+finishes, so a ``Probe`` ends up with the time spent in every stage of one
+draw. It also calls ``probe.count(operation, n)`` for the operations whose
+number decides how the draw scales (``DRAW_OPERATIONS``); counts are exact
+and machine-independent, unlike timings. The default ``NULL_PROBE`` does
+nothing; the draw pays one no-op call per stage and per counted step.
+"""
+from typing import Dict
+import time
+
+# Stages of run_draw, in order
+DRAW_STAGES = ("seeding", "placement", "swaps", "matches", "quality", "hashing")
+# Counted operations: slot penalties scored by greedy placement, swaps tried
+# by the optimizer, round-1 pairs it checks for collisions while scoring
+# them, and optimizer passes (each scans every candidate swap; they repeat
+# until one finds no improvement)
+DRAW_OPERATIONS = ("penalty_evals", "swap_evals", "pair_checks", "swap_passes")
+
+
+class Probe:
+    """Stage timings (seconds) and operation counts for one or more draws."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._last = time.perf_counter()
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def count(self, operation: str, n: int = 1):
+        self.counts[operation] = self.counts.get(operation, 0) + n
+
+
+class _NullProbe:
+    def start(self):
+        pass
+
+    def lap(self, stage: str):
+        pass
+
+    def count(self, operation: str, n: int = 1):
+        pass
+
+
+NULL_PROBE = _NullProbe()
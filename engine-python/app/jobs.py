@@ -0,0 +1,562 @@
+"""Batch runner for the orchestrator's ``bracket_jobs`` queue.
+
+    competition-engine jobs run --database "$DATABASE_URL" --batch-size 32 --jobs 8
+    competition-engine jobs init --database sqlite:///local.db --seed events.sql
+    competition-engine jobs enqueue --database sqlite:///local.db --event 1 --event 2 --webhook-url URL
+
+The orchestrator's worker takes one job per poll tick and spends an engine
+call, a participants query and a save of one statement per row on it. ``run``
+claims up to ``--batch-size`` queued jobs at once (``FOR UPDATE SKIP LOCKED``
+on Postgres, so several runners and the orchestrator's poller can share the
+queue), reads the participants of the whole batch in one query, generates in
+a process pool without going through HTTP, and writes the brackets, slots,
+matches and job statuses with multi-row inserts in one transaction. The
+engine requests and webhooks are the orchestrator worker's: same request
+shape, payload, signature, retries and dead letters. Webhooks are sent from
+a thread pool after the batch commits, so a slow receiver does not hold up
+the queue.
+
+``sqlite:///path`` selects a SQLite stand-in for local testing: ``init``
+creates the orchestrator schema and runs a seed script (the output of
+``benchmarks.synthetic_event --format sql`` runs unchanged), and ``enqueue``
+queues an event's divisions like ``generate-all-brackets``. SQLite has no
+row locks, so claims take the write lock with ``BEGIN IMMEDIATE`` instead.
+Postgres needs psycopg 3 (the ``postgres`` extra).
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from app.cli import generate_line
+
+logger = logging.getLogger(__name__)
+
+# Below SQLite's 32766 and Postgres' 65535 bind parameters per statement
+MAX_PARAMS = 32000
+WEBHOOK_ATTEMPTS = 3
+WEBHOOK_TIMEOUT_S = 10.0
+
+# The orchestrator schema (orchestrator-ts/scripts/seed_db.sql) in SQLite types
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, sport TEXT, start_date DATE, end_date DATE
+);
+CREATE TABLE IF NOT EXISTS athletes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, club_id TEXT, nation_code TEXT, ranking_points INTEGER, meta TEXT
+);
+CREATE TABLE IF NOT EXISTS event_divisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER REFERENCES events(id), code TEXT
+);
+CREATE TABLE IF NOT EXISTS event_registrations (
+    event_id INTEGER, athlete_id INTEGER REFERENCES athletes(id), division_id INTEGER REFERENCES event_divisions(id),
+    status TEXT, seed INTEGER, PRIMARY KEY (event_id, athlete_id, division_id)
+);
+CREATE TABLE IF NOT EXISTS bracket_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER, division_id INTEGER, webhook_url TEXT,
+    webhook_secret TEXT, overrides TEXT, status TEXT, lifecycle_status TEXT DEFAULT 'draft', locked_by TEXT,
+    locked_at TIMESTAMP, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, started_at TIMESTAMP,
+    completed_at TIMESTAMP, data TEXT
+);
+CREATE TABLE IF NOT EXISTS webhook_dead_letters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, job_id INTEGER REFERENCES bracket_jobs(id), webhook_url TEXT,
+    payload TEXT, error_message TEXT, retry_count INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS brackets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, event_id INTEGER, division_id INTEGER, engine_result TEXT,
+    lifecycle_status TEXT DEFAULT 'draft', locked_by TEXT, locked_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS bracket_participants (
+    bracket_id INTEGER REFERENCES brackets(id), athlete_id INTEGER, slot INTEGER, seed INTEGER,
+    PRIMARY KEY (bracket_id, athlete_id)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, bracket_id INTEGER REFERENCES brackets(id), match_id TEXT,
+    match_type TEXT, round INTEGER, position INTEGER, athlete_red TEXT, athlete_white TEXT,
+    is_bye BOOLEAN DEFAULT FALSE, next_match_id TEXT, source_loser_match_id TEXT, metadata TEXT,
+    status TEXT DEFAULT 'scheduled'
+);
+"""
+
+MATCH_COLUMNS = (
+    "bracket_id", "match_id", "match_type", "round", "position", "athlete_red", "athlete_white", "is_bye",
+    "next_match_id", "source_loser_match_id", "metadata",
+)
+
+
+class Job(NamedTuple):
+    job_id: int
+    event_id: int
+    division_id: int
+    webhook_url: Optional[str]
+    webhook_secret: Optional[str]
+    overrides: Dict[str, Any]
+
+
+class Outcome(NamedTuple):
+    """A generated job: the engine response, or the error message it failed with."""
+
+    job: Job
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+def _json_value(value: Any) -> Any:
+    # Postgres decodes JSONB columns; SQLite hands back the text
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+def _json_param(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value)
+
+
+class JobStore(ABC):
+    """The queue and result tables over a DB-API connection (see the module docstring).
+
+    Subclasses supply the dialect: parameter style, the current-time
+    expression, row locking for claims and how a transaction starts.
+    """
+
+    param = "?"
+    now = "CURRENT_TIMESTAMP"
+    skip_locked = ""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @abstractmethod
+    def transaction(self) -> Iterator[Any]:
+        """Context manager yielding a cursor inside one transaction (committed on exit)."""
+
+    def close(self):
+        self.connection.close()
+
+    def _placeholders(self, rows: int, columns: int) -> str:
+        row = "(" + ", ".join([self.param] * columns) + ")"
+        return ", ".join([row] * rows)
+
+    def _insert(self, cursor, table: str, columns: Sequence[str], rows: List[tuple], returning: str = "") -> List[tuple]:
+        """Multi-row INSERT, chunked to stay under the bind-parameter limit."""
+        returned: List[tuple] = []
+        per_statement = max(1, MAX_PARAMS // len(columns))
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {self._placeholders(len(chunk), len(columns))}"
+            cursor.execute(sql + (f" RETURNING {returning}" if returning else ""), [v for row in chunk for v in row])
+            if returning:
+                returned.extend(cursor.fetchall())
+        return returned
+
+    def claim(self, limit: int) -> List[Job]:
+        """Mark up to ``limit`` queued jobs running, oldest first, and return them."""
+        sql = f"""
+            UPDATE bracket_jobs SET status = 'running', started_at = {self.now}
+            WHERE id IN (
+                SELECT id FROM bracket_jobs WHERE status = 'queued'
+                ORDER BY created_at, id LIMIT {self.param} {self.skip_locked}
+            )
+            RETURNING id, event_id, division_id, webhook_url, webhook_secret, overrides
+        """
+        with self.transaction() as cursor:
+            cursor.execute(sql, (limit,))
+            rows = cursor.fetchall()
+        jobs = [Job(r[0], r[1], r[2], r[3], r[4], _json_value(r[5]) or {}) for r in rows]
+        return sorted(jobs, key=lambda job: job.job_id)
+
+    def participants(self, jobs: Sequence[Job]) -> Dict[Tuple[int, int], List[Dict[str, Any]]]:
+        """Confirmed participants of every job's division, best ranked first, in one query."""
+        keys = sorted({(job.event_id, job.division_id) for job in jobs})
+        found: Dict[Tuple[int, int], List[Dict[str, Any]]] = {key: [] for key in keys}
+        if not keys:
+            return found
+        sql = f"""
+            SELECT r.event_id, r.division_id, a.id, a.club_id, a.nation_code, a.ranking_points, r.seed, a.meta
+            FROM event_registrations r JOIN athletes a ON r.athlete_id = a.id
+            WHERE r.status = 'confirmed' AND (r.event_id, r.division_id) IN (VALUES {self._placeholders(len(keys), 2)})
+            ORDER BY r.event_id, r.division_id, a.ranking_points DESC NULLS LAST, a.id
+        """
+        with self.transaction() as cursor:
+            cursor.execute(sql, [v for key in keys for v in key])
+            rows = cursor.fetchall()
+        for event_id, division_id, athlete_id, club_id, nation_code, ranking_points, seed, meta in rows:
+            found[(event_id, division_id)].append({
+                "athlete_id": str(athlete_id),
+                "club_id": club_id,
+                "nation_code": nation_code,
+                "ranking_points": ranking_points or 0,
+                "seed": seed,
+                "meta": _json_value(meta),
+            })
+        return found
+
+    def save(self, outcomes: Sequence[Outcome]) -> Dict[int, int]:
+        """Store the brackets and close the jobs of a batch in one transaction; returns job id -> bracket id."""
+        generated = [o for o in outcomes if o.result is not None]
+        bracket_ids: Dict[int, int] = {}
+        with self.transaction() as cursor:
+            if generated:
+                rows = [
+                    (o.job.event_id, o.job.division_id, json.dumps(o.result), "ready") for o in generated
+                ]
+                returned = self._insert(
+                    cursor, "brackets", ("event_id", "division_id", "engine_result", "lifecycle_status"), rows,
+                    "id, event_id, division_id",
+                )
+                # RETURNING order is unspecified; ids grow in VALUES order within a division
+                ids: Dict[Tuple[int, int], List[int]] = {}
+                for bracket_id, event_id, division_id in sorted(returned):
+                    ids.setdefault((event_id, division_id), []).append(bracket_id)
+                for o in generated:
+                    bracket_ids[o.job.job_id] = ids[(o.job.event_id, o.job.division_id)].pop(0)
+                slots, matches = [], []
+                for o in generated:
+                    bracket_id = bracket_ids[o.job.job_id]
+                    for p in o.result.get("participants_slots") or []:
+                        slots.append((bracket_id, p["athlete_id"], p["slot"], p.get("seed")))
+                    for m in o.result.get("matches") or []:
+                        matches.append((
+                            bracket_id, m["id"], m["match_type"], m["round"], m["position"], m.get("athlete_red"),
+                            m.get("athlete_white"), bool(m.get("is_bye")), m.get("next_match_id"), None,
+                            _json_param(m.get("metadata")),
+                        ))
+                    for m in o.result.get("repechage_matches") or []:
+                        matches.append((
+                            bracket_id, m["id"], m["match_type"], m["round"], m["position"], None, None, False, None,
+                            m.get("source_loser_match_id"), _json_param(m.get("metadata")),
+                        ))
+                self._insert(cursor, "bracket_participants", ("bracket_id", "athlete_id", "slot", "seed"), slots)
+                self._insert(cursor, "matches", MATCH_COLUMNS, matches)
+            cursor.executemany(
+                f"UPDATE bracket_jobs SET status = {self.param}, data = {self.param}, completed_at = {self.now} "
+                f"WHERE id = {self.param}",
+                [
+                    ("success", None, o.job.job_id) if o.result is not None
+                    else ("failed", json.dumps({"error": o.error}), o.job.job_id)
+                    for o in outcomes
+                ],
+            )
+        return bracket_ids
+
+    def fail(self, jobs: Sequence[Job], error: str):
+        with self.transaction() as cursor:
+            cursor.executemany(
+                f"UPDATE bracket_jobs SET status = 'failed', data = {self.param}, completed_at = {self.now} "
+                f"WHERE id = {self.param}",
+                [(json.dumps({"error": error}), job.job_id) for job in jobs],
+            )
+
+    def add_dead_letters(self, letters: Sequence[tuple]):
+        """``letters`` are (job id, webhook url, payload, error message, retry count)."""
+        if not letters:
+            return
+        with self.transaction() as cursor:
+            self._insert(
+                cursor, "webhook_dead_letters",
+                ("job_id", "webhook_url", "payload", "error_message", "retry_count"),
+                [(job_id, url, json.dumps(payload), error, retries) for job_id, url, payload, error, retries in letters],
+            )
+
+    def enqueue(self, event_id: int, webhook_url: Optional[str], webhook_secret: Optional[str],
+                overrides: Optional[Dict[str, Any]] = None) -> Tuple[int, int]:
+        """Queue every division of ``event_id`` with confirmed entries, as ``generate-all-brackets`` does.
+
+        Divisions with a queued, running or successful job are skipped;
+        returns (enqueued, skipped).
+        """
+        p = self.param
+        with self.transaction() as cursor:
+            cursor.execute(
+                f"""
+                SELECT d.id, EXISTS (
+                    SELECT 1 FROM bracket_jobs j WHERE j.event_id = d.event_id AND j.division_id = d.id
+                    AND j.status IN ('queued', 'running', 'success')
+                )
+                FROM event_divisions d
+                WHERE d.event_id = {p} AND EXISTS (
+                    SELECT 1 FROM event_registrations r
+                    WHERE r.event_id = d.event_id AND r.division_id = d.id AND r.status = 'confirmed'
+                )
+                ORDER BY d.code
+                """,
+                (event_id,),
+            )
+            divisions = cursor.fetchall()
+            fresh = [(event_id, division_id, webhook_url, webhook_secret, json.dumps(overrides or {}), "queued")
+                     for division_id, active in divisions if not active]
+            self._insert(
+                cursor, "bracket_jobs",
+                ("event_id", "division_id", "webhook_url", "webhook_secret", "overrides", "status"), fresh,
+            )
+        return len(fresh), len(divisions) - len(fresh)
+
+
+class SqliteJobStore(JobStore):
+    """The local stand-in; ``init`` creates the schema."""
+
+    def __init__(self, path: str):
+        super().__init__(sqlite3.connect(path, isolation_level=None, check_same_thread=False))
+        self.connection.execute("PRAGMA busy_timeout = 30000")
+        # Let Postgres seed scripts (which reset SERIAL sequences) run unchanged
+        self.connection.create_function("pg_get_serial_sequence", 2, lambda table, column: None)
+        self.connection.create_function("setval", 2, lambda sequence, value: value)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+
+    def init(self, seed_sql: Optional[str] = None):
+        self.connection.executescript(SQLITE_SCHEMA)
+        if seed_sql:
+            self.connection.executescript(seed_sql)
+
+
+class PostgresJobStore(JobStore):
+    param = "%s"
+    now = "NOW()"
+    skip_locked = "FOR UPDATE SKIP LOCKED"
+
+    def __init__(self, url: str):
+        try:
+            import psycopg
+        except ImportError:
+            raise RuntimeError('Postgres needs psycopg 3: pip install -e ".[postgres]"') from None
+        super().__init__(psycopg.connect(url))
+
+    @contextmanager
+    def transaction(self) -> Iterator[Any]:
+        with self.connection.transaction(), self.connection.cursor() as cursor:
+            yield cursor
+
+
+def open_store(url: str) -> JobStore:
+    """``sqlite:///path`` (``sqlite://`` alone is in-memory) or a ``postgres(ql)://`` URL."""
+    scheme = urlsplit(url).scheme
+    if scheme == "sqlite":
+        return SqliteJobStore(url[len("sqlite:///"):] or ":memory:")
+    if scheme in ("postgres", "postgresql"):
+        return PostgresJobStore(url)
+    raise ValueError(f"Unsupported database URL: {url}")
+
+
+def engine_request(job: Job, participants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The request the orchestrator's worker sends for ``job``."""
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": True, **job.overrides},
+        "rules": {"seeding_mode": "auto", **job.overrides},
+        "participants": participants,
+        "history": {"recent_pairs": []},
+    }
+
+
+def _allowed(url: str, domains: Sequence[str]) -> bool:
+    if not domains:
+        return True
+    host = urlsplit(url).hostname or ""
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class Webhooks:
+    """Signed deliveries with the orchestrator's retries, from a thread pool.
+
+    Deliveries that fail ``WEBHOOK_ATTEMPTS`` times (or go to a domain
+    outside ``allowed_domains``) become dead letters, which ``take_dead_letters``
+    hands to the runner for storing.
+    """
+
+    def __init__(self, allowed_domains: Sequence[str] = (), workers: int = 8, backoff_s: float = 1.0):
+        self.allowed_domains = [d for d in allowed_domains if d]
+        self.backoff_s = backoff_s
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="webhook")
+        self._lock = threading.Lock()
+        self._dead: List[tuple] = []
+
+    def send(self, job: Job, event: str, data: Dict[str, Any]):
+        if job.webhook_url and job.webhook_secret:
+            self._pool.submit(self._deliver, job, event, data)
+
+    def _deliver(self, job: Job, event: str, data: Dict[str, Any]):
+        payload = {"v": 1, "event": event, "timestamp": int(time.time()), **data}
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        if not _allowed(job.webhook_url, self.allowed_domains):
+            self._dead_letter(job, payload, f"Webhook domain {urlsplit(job.webhook_url).hostname} not in allowlist", 0)
+            return
+        signature = hmac.new(job.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        headers = {
+            "Content-Type": "application/json",
+            "X-Athlos-Event": event,
+            "X-Athlos-Signature": f"sha256={signature}",
+            "X-Athlos-Version": "1.0.0",
+            "X-Athlos-Timestamp": str(payload["timestamp"]),
+        }
+        for attempt in range(1, WEBHOOK_ATTEMPTS + 1):
+            try:
+                request = urllib.request.Request(job.webhook_url, data=body, headers=headers, method="POST")
+                with urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT_S):
+                    return
+            except urllib.error.HTTPError as e:
+                error = f"HTTP {e.code}"
+            except OSError as e:
+                error = str(e)
+            if attempt < WEBHOOK_ATTEMPTS:
+                time.sleep(self.backoff_s * 2 ** attempt)
+        logger.error("Webhook failed after %d attempts: %s (%s)", WEBHOOK_ATTEMPTS, error, job.webhook_url)
+        self._dead_letter(job, payload, error, WEBHOOK_ATTEMPTS)
+
+    def _dead_letter(self, job: Job, payload: Dict[str, Any], error: str, retries: int):
+        with self._lock:
+            self._dead.append((job.job_id, job.webhook_url, payload, error, retries))
+
+    def take_dead_letters(self) -> List[tuple]:
+        with self._lock:
+            dead, self._dead = self._dead, []
+        return dead
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+def _error_message(response: Dict[str, Any]) -> str:
+    error = response["error"]
+    return f"{error.get('code')}: {error.get('message')}"
+
+
+def run_batch(store: JobStore, jobs: Sequence[Job], pool: Optional[Executor], webhooks: Webhooks) -> List[Outcome]:
+    """Generate and store one claimed batch, then queue its webhooks."""
+    try:
+        participants = store.participants(jobs)
+        lines = [json.dumps(engine_request(job, participants[(job.event_id, job.division_id)])) for job in jobs]
+        responses = pool.map(generate_line, lines) if pool is not None else map(generate_line, lines)
+        outcomes = []
+        for job, response in zip(jobs, responses):
+            result = json.loads(response)
+            if "error" in result:
+                outcomes.append(Outcome(job, None, _error_message(result)))
+            else:
+                outcomes.append(Outcome(job, result, None))
+        store.save(outcomes)
+    except Exception as e:
+        logger.exception("Batch of %d jobs failed", len(jobs))
+        store.fail(jobs, str(e))
+        outcomes = [Outcome(job, None, str(e)) for job in jobs]
+    for o in outcomes:
+        data = {"event_id": o.job.event_id, "division_id": o.job.division_id}
+        if o.result is not None:
+            webhooks.send(o.job, "bracket.generated", {**data, "bracket_id": "generated"})
+        else:
+            webhooks.send(o.job, "bracket.failed", {**data, "error": o.error})
+    store.add_dead_letters(webhooks.take_dead_letters())
+    return outcomes
+
+
+def run(store: JobStore, batch_size: int = 32, jobs: int = 1, poll_interval: float = 0.5, drain: bool = False,
+        webhooks: Optional[Webhooks] = None, stop: Optional[threading.Event] = None) -> Dict[str, int]:
+    """Work the queue until ``stop`` is set, or until it is empty when ``drain``.
+
+    ``jobs`` > 1 generates in that many worker processes. Returns counts of
+    batches, generated and failed jobs.
+    """
+    webhooks = webhooks or Webhooks(os.environ.get("WEBHOOK_ALLOWED_DOMAINS", "").split(","))
+    stop = stop or threading.Event()
+    counts = {"batches": 0, "generated": 0, "failed": 0}
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        while not stop.is_set():
+            batch = store.claim(batch_size)
+            if not batch:
+                if drain:
+                    break
+                stop.wait(poll_interval)
+                continue
+            outcomes = run_batch(store, batch, pool, webhooks)
+            counts["batches"] += 1
+            failed = sum(o.result is None for o in outcomes)
+            counts["failed"] += failed
+            counts["generated"] += len(outcomes) - failed
+            logger.info("Batch of %d jobs: %d generated, %d failed", len(outcomes), len(outcomes) - failed, failed)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        webhooks.close()
+        store.add_dead_letters(webhooks.take_dead_letters())
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="competition-engine jobs", description="Batch runner for bracket_jobs")
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument("--database", default=os.environ.get("DATABASE_URL"),
+                          help="postgresql://... or sqlite:///path (default: $DATABASE_URL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_cmd = commands.add_parser("run", parents=[database], help="Claim, generate and store queued jobs in batches")
+    run_cmd.add_argument("--batch-size", type=int, default=32)
+    run_cmd.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    run_cmd.add_argument("--poll-interval", type=float, default=0.5, help="Seconds to wait when the queue is empty")
+    run_cmd.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    init = commands.add_parser("init", parents=[database], help="Create the schema in a SQLite database and run a seed script")
+    init.add_argument("--seed", help="SQL script to run after creating the schema")
+    enqueue = commands.add_parser("enqueue", parents=[database], help="Queue the divisions of events, like generate-all-brackets")
+    enqueue.add_argument("--event", type=int, action="append", required=True)
+    enqueue.add_argument("--webhook-url")
+    enqueue.add_argument("--webhook-secret", default="shared")
+    enqueue.add_argument("--overrides", type=json.loads, default={}, help="JSON object")
+    args = parser.parse_args(argv)
+    if not args.database:
+        parser.error("--database or DATABASE_URL is required")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    try:
+        store = open_store(args.database)
+    except (RuntimeError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    try:
+        if args.command == "init":
+            if not isinstance(store, SqliteJobStore):
+                parser.error("init is for the SQLite stand-in; load orchestrator-ts/scripts/seed_db.sql into Postgres")
+            seed = None
+            if args.seed:
+                with open(args.seed, encoding="utf-8") as f:
+                    seed = f.read()
+            store.init(seed)
+            return 0
+        if args.command == "enqueue":
+            for event_id in args.event:
+                enqueued, skipped = store.enqueue(event_id, args.webhook_url, args.webhook_secret, args.overrides)
+                print(f"Event {event_id}: {enqueued} jobs enqueued, {skipped} skipped", file=sys.stderr)
+            return 0
+        start = time.perf_counter()
+        counts = run(store, args.batch_size, args.jobs, args.poll_interval, args.drain)
+        elapsed = time.perf_counter() - start
+        total = counts["generated"] + counts["failed"]
+        print(f"Ran {total} jobs in {counts['batches']} batches ({counts['failed']} failed) in {elapsed:.1f}s",
+              file=sys.stderr)
+        return 1 if counts["failed"] else 0
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,110 @@
-from fastapi import FastAPI, HTTPException, Header, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Literal
+from fastapi import FastAPI, Header, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from typing import Literal, Optional
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
-import hashlib
-import random
-import math
+import anyio.to_thread
+from contextlib import asynccontextmanager
+import asyncio
 import uuid
 import time
 import logging
-
-app = FastAPI(title="Competition Engine", version="1.0.0")
+import os
+
+from app.capacity import CapacityMiddleware, CapacityTracker, capacity_limits_from_env, limit_worker_threads, live_thread_limiter
+from app.columnar import to_columnar
+from app.core import MAX_PARTICIPANTS, EngineError, generate, generate_pools
+from app.draw import next_power_of_two
+from app.models import (
+    ApplyResultsRequest,
+    ApplyResultsResponse,
+    BatchGenerateRequest,
+    BatchGenerateResponse,
+    Context,
+    DrawProfile,
+    ErrorDetail,
+    ErrorResponse,
+    EvaluateBracketsRequest,
+    EvaluateBracketsResponse,
+    GenerateBracketRequest,
+    GenerateBracketResponse,
+    History,
+    LiveBracketState,
+    Match,
+    Participant,
+    ParticipantSlot,
+    PatchBracketRequest,
+    Quality,
+    RepechageMatch,
+    Rules,
+    ScheduleEventRequest,
+    Summary,
+)
+from app.patch import patch_bracket
+from app.pools import POOL_FORMATS
+from app.profiles import profiles
+from app.quality import evaluate_brackets
+from app.registry import RegistryHolder
+from app.results import live_brackets
+from app.schedule import schedule_event
+from app.transport import MsgpackRoute, accepts_msgpack, negotiate
+from app.warmup import Readiness, warm_up
+
+# Warm-up state behind /ready (see app.warmup)
+readiness = Readiness()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = None
+    limit_worker_threads()
+    if os.environ.get("ENGINE_WARMUP", "1") == "0":
+        readiness.state = "ready"
+    else:
+        # In the background: /health answers while the worker warms up
+        task = asyncio.create_task(warm_up(app, readiness))
+    yield
+    if task and not task.done():
+        task.cancel()
+
+
+app = FastAPI(title="Competition Engine", version="1.0.0", lifespan=lifespan)
+app.router.route_class = MsgpackRoute
 
 # Rate limiting
 limiter = Limiter(key_func=get_remote_address, default_limits=["60/minute"])
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Optional athlete registry snapshot (see app.registry)
+registry = RegistryHolder(os.environ.get("ATHLETE_REGISTRY_PATH"))
+
+# Opt-in traffic capture (see app.capture); added first so it sits inside the correlation id middleware
+if os.environ.get("ENGINE_CAPTURE_PATH"):
+    from app.capture import capture_from_env
+    capture_from_env(app)
+
 # Correlation ID middleware
 class CorrelationIdMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         correlation_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
         request.state.correlation_id = correlation_id
+        request.state.received_at = time.monotonic()
         response = await call_next(request)
         response.headers["X-Request-Id"] = correlation_id
         return response
 
 app.add_middleware(CorrelationIdMiddleware)
 
+# Capacity signals behind /capacity (see app.capacity); outermost, so latencies cover the whole stack
+capacity = CapacityTracker(capacity_limits_from_env())
+live_threads = live_thread_limiter()
+app.add_middleware(CapacityMiddleware, tracker=capacity)
+
 # Logging configuration
 logging.basicConfig(level=logging.INFO, format='{"timestamp": "%(asctime)s", "level": "%(levelname)s", "correlation_id": "%(correlation_id)s", "message": "%(message)s"}')
 
@@ -46,162 +119,55 @@ class CorrelationLogger:
     def error(self, message: str, extra: dict = None):
         self.logger.error(message, extra={"correlation_id": self.correlation_id, **(extra or {})})
 
-# Pydantic Models
-
-class Context(BaseModel):
-    sport: str
-    format: str
-    repechage: bool = True
-    draw_seed: Optional[str] = None
-    engine_mode: str = "deterministic"
-
-class SeedingThresholds(BaseModel):
-    min_16: int = 8
-    lt_16: int = 4
-
-class Penalties(BaseModel):
-    same_club_r1: int = 1000
-    same_nation_r1: int = 600
-    rematch_recent: int = 400
-
-class Rules(BaseModel):
-    seeding_mode: str = "auto"
-    max_seeds: int = 8
-    seeding_thresholds: SeedingThresholds = SeedingThresholds()
-    separate_by: List[str] = ["club"]
-    avoid_rematch_days: int = 0
-    byes_policy: str = "prefer_high_seeds"
-    penalties: Penalties = Penalties()
-
-class Participant(BaseModel):
-    athlete_id: str
-    club_id: Optional[str] = None
-    nation_code: Optional[str] = None
-    ranking_points: Optional[int] = None
-    seed: Optional[int] = None
-    meta: Optional[Dict[str, Any]] = None
-
-class RecentPair(BaseModel):
-    a: str
-    b: str
-    date: str
-
-class History(BaseModel):
-    recent_pairs: List[RecentPair] = []
-
-class GenerateBracketRequest(BaseModel):
-    context: Context
-    rules: Rules
-    participants: List[Participant]
-    history: History = History()
-
-class ParticipantSlot(BaseModel):
-    athlete_id: str
-    slot: int
-    seed: Optional[int] = None
-
-class Match(BaseModel):
-    id: str
-    match_type: str
-    round: int
-    position: int
-    athlete_red: Optional[str] = None
-    athlete_white: Optional[str] = None
-    is_bye: bool = False
-    next_match_id: Optional[str] = None
-    metadata: Dict[str, Any] = {}
-
-class RepechageMatch(BaseModel):
-    id: str
-    match_type: str
-    round: int
-    position: int
-    source_loser_match_id: str
-    metadata: Dict[str, Any] = {}
-
-class Quality(BaseModel):
-    score: int
-    club_collisions_r1: int = 0
-    nation_collisions_r1: int = 0
-    seed_protection: float
-    bye_fairness: float
-
-class Summary(BaseModel):
-    participants: int
-    size: int
-    rounds: int
-    byes: int
-    repechage: bool
-    quality: Quality
-    penalties: Penalties
-
-class ErrorDetail(BaseModel):
-    code: str
-    message: str
-    details: Optional[Dict[str, Any]] = None
-
-class ErrorResponse(BaseModel):
-    error: ErrorDetail
-
-class GenerateBracketResponse(BaseModel):
-    engine_version: str = "1.0.0"
-    summary: Summary
-    participants_slots: List[ParticipantSlot]
-    matches: List[Match]
-    repechage_matches: List[RepechageMatch] = []
-
-# Utility functions
-
-def next_power_of_two(n: int) -> int:
-    return 1 << (n - 1).bit_length()
-
-def stable_hash(data: str) -> str:
-    return hashlib.sha256(data.encode()).hexdigest()
-
-def get_seed_positions(size: int, num_seeds: int) -> List[int]:
-    # Standard seed positions for single elimination
-    positions = {
-        4: [0, 3, 1, 2],  # For size=4: 1 at 0, 4 at 3, 2 at 1, 3 at 2
-        8: [0, 7, 3, 4, 1, 6, 2, 5],  # 1,8,4,5,2,7,3,6
-        16: [0, 15, 7, 8, 3, 12, 4, 11, 1, 14, 6, 9, 2, 13, 5, 10],  # Standard 16
-    }
-    if num_seeds in positions and len(positions[num_seeds]) >= num_seeds:
-        return positions[num_seeds][:num_seeds]
-    # Fallback: place in order
-    return list(range(num_seeds))
-
-def seeded_random(seed: str):
-    random.seed(int(hashlib.md5(seed.encode()).hexdigest(), 16) % (2**32))
-
-def calculate_penalty(slot: int, participant: Participant, slots: List, all_participants: List[Participant], rules: Rules, history: History) -> float:
-    penalty = 0.0
-    # Find opponent in round 1
-    opponent_slot = slot ^ 1  # XOR for paired slots
-    if opponent_slot < len(slots) and slots[opponent_slot]:
-        opponent_id = slots[opponent_slot]
-        opponent = next((p for p in all_participants if p.athlete_id == opponent_id), None)
-        if opponent:
-            # Club collision
-            if rules.separate_by and 'club' in rules.separate_by and participant.club_id and opponent.club_id == participant.club_id:
-                penalty += rules.penalties.same_club_r1
-            # Nation collision
-            if rules.separate_by and 'nation' in rules.separate_by and participant.nation_code and opponent.nation_code == participant.nation_code:
-                penalty += rules.penalties.same_nation_r1
-            # Rematch
-            for pair in history.recent_pairs:
-                if (pair.a == participant.athlete_id and pair.b == opponent.athlete_id) or (pair.a == opponent.athlete_id and pair.b == participant.athlete_id):
-                    # Check date
-                    penalty += rules.penalties.rematch_recent
-    return penalty
-
-# Algorithm implementation
+def check_authorization(authorization: str) -> Optional[JSONResponse]:
+    """Return a 401 response for a bad Authorization header, None if accepted."""
+    if not authorization.startswith("Bearer "):
+        return JSONResponse(
+            status_code=401,
+            content=ErrorResponse(
+                error=ErrorDetail(
+                    code="INVALID_AUTHORIZATION",
+                    message="Authorization header must be 'Bearer <key>'",
+                    details={"header": authorization}
+                )
+            ).dict()
+        )
+    token = authorization[7:]
+    if token not in ["test", "dev"]:  # Accept both for development
+        return JSONResponse(
+            status_code=401,
+            content=ErrorResponse(
+                error=ErrorDetail(
+                    code="INVALID_TOKEN",
+                    message="Invalid API key",
+                    details={"provided": token}
+                )
+            ).dict()
+        )
+    return None
+
+def request_deadline(req: Request, deadline_ms: Optional[int]) -> Optional[float]:
+    """Monotonic time after which the client no longer waits (``X-Request-Deadline-Ms`` is the budget it had left when sending)."""
+    if deadline_ms is None:
+        return None
+    return getattr(req.state, "received_at", time.monotonic()) + deadline_ms / 1000
+
+def deadline_error(deadline: Optional[float]) -> Optional[EngineError]:
+    """An error for work whose deadline passed while it waited, None if there is still time."""
+    if deadline is None or time.monotonic() < deadline:
+        return None
+    return EngineError("DEADLINE_EXCEEDED", "The request deadline passed before the draw started", status_code=504)
+
+# Endpoints
 
 @app.post("/v1/brackets/generate")
 def generate_bracket(
     request: GenerateBracketRequest,
     req: Request,
     authorization: str = Header(..., alias="Authorization"),
-    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    deadline_ms: Optional[int] = Header(None, alias="X-Request-Deadline-Ms"),
+    response_format: Literal["default", "columnar"] = Query("default", alias="format")
 ):
     correlation_id = getattr(req.state, 'correlation_id', 'unknown')
     logger = CorrelationLogger(correlation_id)
@@ -213,369 +179,396 @@ def generate_bracket(
     })
 
     # Validate authorization
-    if not authorization.startswith("Bearer "):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+
+    try:
+        expired = deadline_error(request_deadline(req, deadline_ms))
+        if expired:
+            raise expired
+        snapshot = registry.get()
+        if snapshot:
+            request = request.model_copy(update={"participants": snapshot.resolve(request.participants)})
+        if request.context.format in POOL_FORMATS:
+            return generate_pools_response(request, req, response_format, logger)
+        result = generate(request)
+
+        logger.info("Bracket generation completed", {
+            "quality_score": result.summary.quality.score,
+            "participants_count": len(request.participants)
+        })
+        if response_format == "columnar":
+            return negotiate(req, to_columnar(result))
+        return negotiate(req, result)
+
+    except EngineError as e:
+        return JSONResponse(status_code=e.status_code, content=e.to_response().dict())
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
         return JSONResponse(
-            status_code=401,
+            status_code=500,
             content=ErrorResponse(
                 error=ErrorDetail(
-                    code="INVALID_AUTHORIZATION",
-                    message="Authorization header must be 'Bearer <key>'",
-                    details={"header": authorization}
+                    code="INTERNAL_ERROR",
+                    message="An internal error occurred",
+                    details={"error": str(e)}
                 )
             ).dict()
         )
-    token = authorization[7:]
-    if token not in ["test", "dev"]:  # Accept both for development
+
+def generate_pools_response(request: GenerateBracketRequest, req: Request, response_format: str, logger: CorrelationLogger):
+    """Pool formats: fixtures are streamed as they are generated (msgpack is packed whole)."""
+    if response_format == "columnar":
         return JSONResponse(
-            status_code=401,
+            status_code=400,
             content=ErrorResponse(
                 error=ErrorDetail(
-                    code="INVALID_TOKEN",
-                    message="Invalid API key",
-                    details={"provided": token}
+                    code="UNSUPPORTED_RESPONSE_FORMAT",
+                    message="Columnar responses are only available for elimination brackets",
+                    details={"format": request.context.format}
                 )
             ).dict()
         )
+    draw = generate_pools(request)
+    logger.info("Pool draw completed", {
+        "pools": draw.summary.pools,
+        "fixtures": draw.summary.fixtures
+    })
+    if accepts_msgpack(req):
+        return negotiate(req, draw.to_response())
+    return StreamingResponse(draw.iter_json(), media_type="application/json")
+
+MAX_BATCH_REQUESTS = 64
+
+def generate_batch_item(item: dict, deadline: Optional[float]) -> dict:
+    """One batch result: the generate response as a dict, or ``{"error": {...}}``."""
+    try:
+        expired = deadline_error(deadline)
+        if expired:
+            raise expired
+        request = GenerateBracketRequest.model_validate(item)
+        snapshot = registry.get()
+        if snapshot:
+            request = request.model_copy(update={"participants": snapshot.resolve(request.participants)})
+        if request.context.format in POOL_FORMATS:
+            return generate_pools(request).to_response().model_dump()
+        return generate(request).model_dump()
+    except EngineError as e:
+        return e.to_response().model_dump()
+    except ValidationError as e:
+        return ErrorResponse(error=ErrorDetail(code="INVALID_REQUEST", message=str(e).splitlines()[0])).model_dump()
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return ErrorResponse(
+            error=ErrorDetail(code="INTERNAL_ERROR", message="An internal error occurred", details={"error": str(e)})
+        ).model_dump()
 
-    # Validate request
-    participants = request.participants
-    if len(participants) < 4:
+@app.post("/v1/brackets/batch")
+def generate_batch(
+    request: BatchGenerateRequest,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    deadline_ms: Optional[int] = Header(None, alias="X-Request-Deadline-Ms"),
+):
+    """Generate several divisions in one call; each result is independent (see BatchGenerateResponse)."""
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    if len(request.requests) > MAX_BATCH_REQUESTS:
         return JSONResponse(
             status_code=400,
             content=ErrorResponse(
                 error=ErrorDetail(
-                    code="INVALID_PARTICIPANTS_COUNT",
-                    message="Minimum 4 participants required",
-                    details={"count": len(participants), "min": 4}
+                    code="BATCH_TOO_LARGE",
+                    message=f"Maximum {MAX_BATCH_REQUESTS} requests per batch",
+                    details={"count": len(request.requests), "max": MAX_BATCH_REQUESTS}
                 )
             ).dict()
         )
-    if len(participants) > 256:
+    logger = CorrelationLogger(getattr(req.state, 'correlation_id', 'unknown'))
+    logger.info("Batch generation started", {"requests": len(request.requests), "idempotency_key": idempotency_key})
+    deadline = request_deadline(req, deadline_ms)
+    results = [generate_batch_item(item, deadline) for item in request.requests]
+    return negotiate(req, BatchGenerateResponse(results=results).model_dump())
+
+MAX_EVALUATE_BRACKETS = 10000
+# Bracket sizes the draw can produce
+MIN_EVALUATE_SIZE = 2
+MAX_EVALUATE_SIZE = next_power_of_two(MAX_PARTICIPANTS)
+
+@app.post("/v1/brackets/evaluate")
+def evaluate_brackets_endpoint(
+    request: EvaluateBracketsRequest,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+
+    if len(request.brackets) > MAX_EVALUATE_BRACKETS:
         return JSONResponse(
             status_code=400,
             content=ErrorResponse(
                 error=ErrorDetail(
-                    code="INVALID_PARTICIPANTS_COUNT",
-                    message="Maximum 256 participants allowed",
-                    details={"count": len(participants), "max": 256}
+                    code="TOO_MANY_BRACKETS",
+                    message=f"Maximum {MAX_EVALUATE_BRACKETS} brackets per request",
+                    details={"count": len(request.brackets), "max": MAX_EVALUATE_BRACKETS}
                 )
             ).dict()
         )
 
-    # Check for duplicate athlete_ids
-    athlete_ids = [p.athlete_id for p in participants]
-    if len(athlete_ids) != len(set(athlete_ids)):
-        duplicates = [x for x in athlete_ids if athlete_ids.count(x) > 1]
+    brackets = []
+    for index, bracket in enumerate(request.brackets):
+        highest_slot = max((s.slot for s in bracket.participants_slots), default=1)
+        size = bracket.size or next_power_of_two(max(len(bracket.participants), highest_slot, 2))
+        if (
+            not MIN_EVALUATE_SIZE <= size <= MAX_EVALUATE_SIZE
+            or size != next_power_of_two(size)
+            or highest_slot > size
+            or any(s.slot < 1 for s in bracket.participants_slots)
+        ):
+            return JSONResponse(
+                status_code=400,
+                content=ErrorResponse(
+                    error=ErrorDetail(
+                        code="INVALID_SLOTS",
+                        message=f"Slots must be 1-based and fit a power-of-two bracket size of {MIN_EVALUATE_SIZE}-{MAX_EVALUATE_SIZE}",
+                        details={"bracket_index": index, "size": size, "highest_slot": highest_slot}
+                    )
+                ).dict()
+            )
+        slots = [None] * size
+        seeds = {}
+        for s in bracket.participants_slots:
+            slots[s.slot - 1] = s.athlete_id
+            if s.seed:
+                seeds[s.seed] = s.athlete_id
+        brackets.append({"slots": slots, "participants": bracket.participants, "seeds": seeds})
+
+    return negotiate(req, EvaluateBracketsResponse(results=[Quality(**q) for q in evaluate_brackets(brackets)]))
+
+@app.post("/v1/brackets/patch")
+def patch_bracket_endpoint(
+    request: PatchBracketRequest,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+
+    try:
+        snapshot = registry.get()
+        if snapshot:
+            request = request.model_copy(update={
+                "participants": snapshot.resolve(request.participants),
+                "add": snapshot.resolve(request.add),
+            })
+        return negotiate(req, patch_bracket(request))
+    except EngineError as e:
+        return JSONResponse(status_code=e.status_code, content=e.to_response().dict())
+
+@app.post("/v1/events/schedule")
+def schedule_event_endpoint(
+    request: ScheduleEventRequest,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+
+    try:
+        return negotiate(req, schedule_event(request))
+    except EngineError as e:
+        return JSONResponse(status_code=e.status_code, content=e.to_response().dict())
+
+def unknown_live_bracket(live_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=404,
+        content=ErrorResponse(
+            error=ErrorDetail(code="UNKNOWN_LIVE_BRACKET", message="No live results for this bracket", details={"live_id": live_id})
+        ).dict()
+    )
+
+# The live routes are async and run their work on their own threads, so
+# results and scoreboards never wait behind draws (see app.capacity)
+
+def start_live(live_id: str, bracket: GenerateBracketResponse, req: Request):
+    try:
+        live = live_brackets.create(live_id, bracket)
+    except ValueError as e:
         return JSONResponse(
             status_code=400,
             content=ErrorResponse(
-                error=ErrorDetail(
-                    code="DUPLICATE_ATHLETE_IDS",
-                    message="Athlete IDs must be unique",
-                    details={"duplicates": list(set(duplicates))}
-                )
+                error=ErrorDetail(code="INVALID_LIVE_ID", message=str(e), details={"live_id": live_id})
             ).dict()
         )
-
+    return negotiate(req, LiveBracketState(live_id=live_id, applied=live.applied, matches=live.snapshot()))
+
+def live_state(live_id: str, req: Request):
+    live = live_brackets.get(live_id)
+    if live is None:
+        return unknown_live_bracket(live_id)
+    return negotiate(req, LiveBracketState(live_id=live_id, applied=live.applied, matches=live.snapshot()))
+
+def apply_live_results(live_id: str, request: ApplyResultsRequest, req: Request):
+    live = live_brackets.get(live_id)
+    if live is None:
+        return unknown_live_bracket(live_id)
     try:
-        # Basic auth check (stub)
-        if not authorization.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Unauthorized")
-        
-        # Get draw_seed
-        draw_seed = request.context.draw_seed
-        if not draw_seed:
-            # Compute stable hash
-            data = f"{request.context.sport}{request.context.format}{request.rules.model_dump_json()}{[p.model_dump_json() for p in request.participants]}"
-            draw_seed = stable_hash(data)
-        
-        seeded_random(draw_seed)
-        
-        participants = request.participants
-        n = len(participants)
-        size = next_power_of_two(n)
-        rounds = int(math.log2(size))
-        byes = size - n
-        
-        # Seeding
-        seeds = {}
-        if request.rules.seeding_mode == "manual":
-            for p in participants:
-                if p.seed:
-                    if p.seed in seeds:
-                        raise HTTPException(status_code=400, detail="Duplicate seed")
-                    seeds[p.seed] = p.athlete_id
-        elif request.rules.seeding_mode == "auto":
-            threshold = request.rules.seeding_thresholds.min_16 if n >= 16 else request.rules.seeding_thresholds.lt_16
-            max_seeds = min(request.rules.max_seeds, threshold)
-            sorted_p = sorted(participants, key=lambda x: x.ranking_points or 0, reverse=True)
-            for i in range(max_seeds):
-                seeds[i+1] = sorted_p[i].athlete_id
-        
-        # Assign slots
-        slots = [None] * size
-        seeded_ids = set(seeds.values())
-        unseeded = [p for p in participants if p.athlete_id not in seeded_ids]
-        
-        # Place seeds using standard positions
-        seed_positions = get_seed_positions(size, len(seeds))
-        for seed_num, athlete_id in seeds.items():
-            if seed_num - 1 < len(seed_positions):
-                slots[seed_positions[seed_num - 1]] = athlete_id
-        
-        # Greedy placement for unseeded
-        available_slots = [i for i in range(size) if slots[i] is None]
-        for p in unseeded:
-            best_slot = min(available_slots, key=lambda slot: calculate_penalty(slot, p, slots, participants, request.rules, request.history))
-            slots[best_slot] = p.athlete_id
-            available_slots.remove(best_slot)
-        
-        # For now, skip advanced greedy scoring, collisions, rematches
-        
-        # Create matches
-        matches = []
-        match_counter = 0
-        def new_match_id():
-            nonlocal match_counter
-            match_counter += 1
-            return f"match-{match_counter}-{draw_seed[:8]}"
-        
-        # Round 1
-        for pos in range(size // 2):
-            m_id = new_match_id()
-            red = slots[pos*2] if pos*2 < len(slots) else None
-            white = slots[pos*2 + 1] if pos*2 + 1 < len(slots) else None
-            is_bye = (red is None or white is None)
-            match_type = "final" if rounds == 1 else "main"
-            matches.append(Match(
-                id=m_id,
-                match_type=match_type,
-                round=1,
-                position=pos+1,
-                athlete_red=red,
-                athlete_white=white,
-                is_bye=is_bye,
-                metadata={"path": f"R1:M{pos+1}"}
-            ))
-        
-        # Subsequent rounds
-        current_round_matches = matches[:]
-        for r in range(2, rounds+1):
-            next_round_matches = []
-            for pos in range(len(current_round_matches) // 2):
-                m_id = new_match_id()
-                next_round_matches.append(Match(
-                    id=m_id,
-                    match_type="main" if r < rounds else "final",
-                    round=r,
-                    position=pos+1,
-                    metadata={"path": f"R{r}:M{pos+1}"}
-                ))
-                # Link previous
-                current_round_matches[pos*2].next_match_id = m_id
-                current_round_matches[pos*2 + 1].next_match_id = m_id
-            matches.extend(next_round_matches)
-            current_round_matches = next_round_matches
-        
-        # Repechage (stub)
-        repechage_matches = []
-        if request.context.repechage:
-            # Simple repechage: one round for bronze
-            bronze_match_id = new_match_id()
-            repechage_matches.append(RepechageMatch(
-                id=bronze_match_id,
-                match_type="repechage",
-                round=1,
-                position=1,
-                source_loser_match_id=matches[0].id if matches else None,  # Stub
-                metadata={"path": "REP:R1:M1"}
-            ))
-            # Link to main final
-            if matches and len(matches) > 1:
-                final_match = next((m for m in matches if m.match_type == "final"), None)
-                if final_match:
-                    final_match.next_match_id = bronze_match_id  # Not accurate, but placeholder
-        
-        # Participants slots
-        participants_slots = []
-        for slot, athlete_id in enumerate(slots):
-            if athlete_id:
-                seed = next((s for s, aid in seeds.items() if aid == athlete_id), None)
-                participants_slots.append(ParticipantSlot(athlete_id=athlete_id, slot=slot+1, seed=seed))
-        
-        # Quality
-        num_seeds = len(seeds)
-        club_collisions = 0
-        nation_collisions = 0
-        for i in range(0, size, 2):
-            if slots[i] and slots[i+1]:
-                p1 = next((p for p in participants if p.athlete_id == slots[i]), None)
-                p2 = next((p for p in participants if p.athlete_id == slots[i+1]), None)
-                if p1 and p2:
-                    if p1.club_id and p2.club_id == p1.club_id:
-                        club_collisions += 1
-                    if p1.nation_code and p2.nation_code == p1.nation_code:
-                        nation_collisions += 1
-        
-        # Fix 1: Normalize nation collisions when nation entropy is low
-        # If 90%+ participants have the same nation_code, reduce nation penalty drastically
-        nation_codes = [p.nation_code for p in participants if p.nation_code]
-        most_common_count = 0
-        if nation_codes:
-            from collections import Counter
-            nation_counts = Counter(nation_codes)
-            most_common_nation, most_common_count = nation_counts.most_common(1)[0]
-        
-        # Fix 2: Two-pass fill with local swap optimization
-        # Try local swaps to reduce collisions without changing the overall structure
-        def calculate_collisions_for_slots(test_slots):
-            club_coll = 0
-            nation_coll = 0
-            for i in range(0, size, 2):
-                if test_slots[i] and test_slots[i+1]:
-                    p1 = next((p for p in participants if p.athlete_id == test_slots[i]), None)
-                    p2 = next((p for p in participants if p.athlete_id == test_slots[i+1]), None)
-                    if p1 and p2:
-                        if p1.club_id and p2.club_id == p1.club_id:
-                            club_coll += 1
-                        if p1.nation_code and p2.nation_code == p1.nation_code:
-                            nation_coll += 1
-            # Apply nation normalization
-            if nation_codes:
-                nation_dominance = most_common_count / len(nation_codes)
-                if nation_dominance >= 0.9:
-                    nation_coll = int(nation_coll * 0.1)
-            return club_coll + nation_coll
-        
-        initial_collisions = calculate_collisions_for_slots(slots)
-        
-        # Try swaps between adjacent pairs in R1
-        improved = True
-        while improved:
-            improved = False
-            for i in range(0, size, 2):
-                if not slots[i] or not slots[i+1]:
-                    continue
-                for j in range(i+2, size, 2):
-                    if not slots[j] or not slots[j+1]:
-                        continue
-                    # Try swapping slots[i+1] with slots[j]
-                    test_slots = slots.copy()
-                    test_slots[i+1], test_slots[j] = test_slots[j], test_slots[i+1]
-                    new_collisions = calculate_collisions_for_slots(test_slots)
-                    if new_collisions < initial_collisions:
-                        slots = test_slots
-                        initial_collisions = new_collisions
-                        improved = True
-                        break
-                    # Try swapping slots[i] with slots[j+1]
-                    test_slots = slots.copy()
-                    test_slots[i], test_slots[j+1] = test_slots[j+1], test_slots[i]
-                    new_collisions = calculate_collisions_for_slots(test_slots)
-                    if new_collisions < initial_collisions:
-                        slots = test_slots
-                        initial_collisions = new_collisions
-                        improved = True
-                        break
-                if improved:
-                    break
-        
-        # Recalculate collisions after optimization
-        club_collisions = 0
-        nation_collisions = 0
-        for i in range(0, size, 2):
-            if slots[i] and slots[i+1]:
-                p1 = next((p for p in participants if p.athlete_id == slots[i]), None)
-                p2 = next((p for p in participants if p.athlete_id == slots[i+1]), None)
-                if p1 and p2:
-                    if p1.club_id and p2.club_id == p1.club_id:
-                        club_collisions += 1
-                    if p1.nation_code and p2.nation_code == p1.nation_code:
-                        nation_collisions += 1
-        
-        # Apply nation normalization after optimization
-        if nation_codes:
-            nation_dominance = most_common_count / len(nation_codes)
-            if nation_dominance >= 0.9:  # 90%+ same nation
-                nation_collisions = int(nation_collisions * 0.1)  # Reduce penalty by 90%
-        
-        # Seed protection: how well top seeds are separated
-        seed_protection = 1.0
-        if num_seeds > 1:
-            # Check if top 2 seeds are not in same half
-            top_seeds = sorted(seeds.items(), key=lambda x: x[0])[:min(4, num_seeds)]  # Sort by seed_num ascending
-            positions = [slots.index(aid) for _, aid in top_seeds if aid in slots]
-            if len(positions) > 1:
-                # Simple: if top 2 are in different halves
-                half = size // 2
-                top1_half = positions[0] < half
-                top2_half = positions[1] < half
-                if top1_half != top2_half:
-                    seed_protection = 1.0
-                else:
-                    seed_protection = 0.5  # Penalty if same half
-        
-        # Bye fairness: if byes exist, are they fair?
-        bye_fairness = 1.0
-        if byes > 0:
-            # Simple: assume fair if byes are at the end
-            bye_positions = [i for i, s in enumerate(slots) if s is None]
-            if bye_positions:
-                # If byes are consecutive at the end, fair
-                expected_byes = list(range(size - byes, size))
-                if bye_positions == expected_byes:
-                    bye_fairness = 1.0
-                else:
-                    bye_fairness = 0.8  # Slight penalty
-        
-        # Overall score: 100 - penalties + bonuses
-        collision_penalty = (club_collisions + nation_collisions) * 5  # 5 points per collision
-        score = max(0, min(100, 100 - collision_penalty + int(seed_protection * 10) + int(bye_fairness * 10)))
-        
-        quality = Quality(
-            score=score,
-            club_collisions_r1=club_collisions,
-            nation_collisions_r1=nation_collisions,
-            seed_protection=seed_protection,
-            bye_fairness=bye_fairness
-        )
-        
-        summary = Summary(
-            participants=n,
-            size=size,
-            rounds=rounds,
-            byes=byes,
-            repechage=request.context.repechage,
-            quality=quality,
-            penalties=request.rules.penalties
-        )
-        
-        return GenerateBracketResponse(
-            summary=summary,
-            participants_slots=participants_slots,
-            matches=matches,
-            repechage_matches=repechage_matches
+        changed = live.apply(request.results)
+    except EngineError as e:
+        return JSONResponse(status_code=e.status_code, content=e.to_response().dict())
+    return negotiate(req, ApplyResultsResponse(applied=live.applied, changed=changed))
+
+@app.put("/v1/live/{live_id}")
+async def start_live_bracket(
+    live_id: str,
+    bracket: GenerateBracketResponse,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    return await anyio.to_thread.run_sync(start_live, live_id, bracket, req, limiter=live_threads)
+
+@app.get("/v1/live/{live_id}")
+async def get_live_bracket(
+    live_id: str,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    return await anyio.to_thread.run_sync(live_state, live_id, req, limiter=live_threads)
+
+@app.post("/v1/live/{live_id}/results")
+async def apply_results(
+    live_id: str,
+    request: ApplyResultsRequest,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    return await anyio.to_thread.run_sync(apply_live_results, live_id, request, req, limiter=live_threads)
+
+@app.put("/v1/profiles/{profile_id}")
+def register_profile(
+    profile_id: str,
+    rules: Rules,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    try:
+        evaluator = profiles.register(profile_id, rules)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content=ErrorResponse(
+                error=ErrorDetail(code="INVALID_PROFILE_ID", message=str(e), details={"profile_id": profile_id})
+            ).dict()
         )
-    
-        logger.info("Bracket generation completed", {
-            "quality_score": summary.quality.score,
-            "participants_count": len(request.participants)
-        })
-    
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    return negotiate(req, DrawProfile(profile_id=profile_id, rules=evaluator.rules))
+
+@app.get("/v1/profiles")
+def list_profiles(authorization: str = Header(..., alias="Authorization")):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    return {"profiles": profiles.ids()}
+
+@app.get("/v1/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    req: Request,
+    authorization: str = Header(..., alias="Authorization")
+):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    evaluator = profiles.get(profile_id)
+    if evaluator is None:
         return JSONResponse(
-            status_code=500,
+            status_code=404,
             content=ErrorResponse(
-                error=ErrorDetail(
-                    code="INTERNAL_ERROR",
-                    message="An internal error occurred",
-                    details={"error": str(e)}
-                )
+                error=ErrorDetail(code="UNKNOWN_PROFILE", message="Draw profile is not registered", details={"profile_id": profile_id})
             ).dict()
         )
+    return negotiate(req, DrawProfile(profile_id=profile_id, rules=evaluator.rules))
+
+def invalid_registry() -> JSONResponse:
+    return JSONResponse(
+        status_code=400,
+        content=ErrorResponse(
+            error=ErrorDetail(code="INVALID_REGISTRY", message=registry.error, details={"path": registry.path})
+        ).dict()
+    )
+
+def registry_not_configured() -> JSONResponse:
+    return JSONResponse(
+        status_code=404,
+        content=ErrorResponse(
+            error=ErrorDetail(
+                code="REGISTRY_NOT_CONFIGURED",
+                message="No athlete registry snapshot is loaded",
+                details={"path": registry.path}
+            )
+        ).dict()
+    )
+
+@app.get("/v1/registry")
+def registry_status(authorization: str = Header(..., alias="Authorization")):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    snapshot = registry.get()
+    if snapshot is None:
+        return invalid_registry() if registry.error else registry_not_configured()
+    status = snapshot.status()
+    if registry.error:
+        # Still serving the last good snapshot; the file on disk is broken
+        status["load_error"] = registry.error
+    return status
+
+@app.post("/v1/registry/reload")
+def reload_registry(authorization: str = Header(..., alias="Authorization")):
+    auth_error = check_authorization(authorization)
+    if auth_error:
+        return auth_error
+    try:
+        snapshot = registry.reload()
+    except ValueError:
+        return invalid_registry()
+    return snapshot.status() if snapshot else registry_not_configured()
+
+# The probes are async so they never wait behind draws for a worker thread
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """200 once the worker has warmed up (see app.warmup), 503 before."""
+    if readiness.ready:
+        return readiness.to_dict()
+    return JSONResponse(status_code=503, content=readiness.to_dict())
+
+@app.get("/capacity")
+async def capacity_report():
+    """Live load signals; 200 while the worker should get traffic, 503 to drain."""
+    report = capacity.report(readiness.ready)
+    return JSONResponse(status_code=200 if report["verdict"] == "ready" else 503, content=report)
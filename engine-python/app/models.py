@@ -0,0 +1,252 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Literal, Optional, Dict, Any
+
+# Pydantic Models
+
+class Context(BaseModel):
+    sport: str
+    format: str
+    repechage: bool = True
+    draw_seed: Optional[str] = None
+    engine_mode: str = "deterministic"
+    # Only used by the pool formats (see app.pools)
+    pools: Optional[int] = None
+    pool_qualifiers: int = 2
+
+class SeedingThresholds(BaseModel):
+    min_16: int = 8
+    lt_16: int = 4
+
+class Penalties(BaseModel):
+    same_club_r1: int = 1000
+    same_nation_r1: int = 600
+    rematch_recent: int = 400
+
+class Rules(BaseModel):
+    seeding_mode: str = "auto"
+    max_seeds: int = 8
+    seeding_thresholds: SeedingThresholds = SeedingThresholds()
+    separate_by: List[str] = ["club"]
+    avoid_rematch_days: int = 0
+    byes_policy: str = "prefer_high_seeds"
+    penalties: Penalties = Penalties()
+
+class Participant(BaseModel):
+    athlete_id: str
+    club_id: Optional[str] = None
+    nation_code: Optional[str] = None
+    ranking_points: Optional[int] = None
+    seed: Optional[int] = None
+    meta: Optional[Dict[str, Any]] = None
+
+class RecentPair(BaseModel):
+    a: str
+    b: str
+    date: str
+
+class History(BaseModel):
+    recent_pairs: List[RecentPair] = []
+
+def check_rules_source(request):
+    """Requests carry either an inline ``rules`` block or a registered ``profile_id``."""
+    if (request.rules is None) == (request.profile_id is None):
+        raise ValueError("Exactly one of rules or profile_id is required")
+    return request
+
+class GenerateBracketRequest(BaseModel):
+    context: Context
+    rules: Optional[Rules] = None
+    profile_id: Optional[str] = None
+    participants: List[Participant]
+    history: History = History()
+
+    _check_rules_source = model_validator(mode="after")(check_rules_source)
+
+class ParticipantSlot(BaseModel):
+    athlete_id: str
+    slot: int
+    seed: Optional[int] = None
+
+class Match(BaseModel):
+    id: str
+    match_type: str
+    round: int
+    position: int
+    athlete_red: Optional[str] = None
+    athlete_white: Optional[str] = None
+    is_bye: bool = False
+    next_match_id: Optional[str] = None
+    loser_next_match_id: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+    hash: Optional[str] = None
+    subtree_hash: Optional[str] = None
+
+class RepechageMatch(BaseModel):
+    id: str
+    match_type: str
+    round: int
+    position: int
+    source_loser_match_id: Optional[str] = None
+    next_match_id: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+    hash: Optional[str] = None
+
+class Quality(BaseModel):
+    score: int
+    club_collisions_r1: int = 0
+    nation_collisions_r1: int = 0
+    seed_protection: float
+    bye_fairness: float
+
+class Summary(BaseModel):
+    participants: int
+    size: int
+    rounds: int
+    byes: int
+    repechage: bool
+    quality: Quality
+    penalties: Penalties
+
+class ErrorDetail(BaseModel):
+    code: str
+    message: str
+    details: Optional[Dict[str, Any]] = None
+
+class ErrorResponse(BaseModel):
+    error: ErrorDetail
+
+class BracketHashes(BaseModel):
+    bracket: str
+    rounds: List[str]
+    repechage: str
+
+class GenerateBracketResponse(BaseModel):
+    engine_version: str = "1.0.0"
+    summary: Summary
+    participants_slots: List[ParticipantSlot]
+    matches: List[Match]
+    repechage_matches: List[RepechageMatch] = []
+    hashes: Optional[BracketHashes] = None
+
+class Pool(BaseModel):
+    pool: str
+    athletes: List[str]
+
+class PoolSummary(BaseModel):
+    participants: int
+    format: str
+    pools: int
+    pool_qualifiers: int
+    fixtures: int
+    rounds: int
+    knockout_size: int
+    club_collisions: int
+    nation_collisions: int
+
+class PoolDrawResponse(BaseModel):
+    engine_version: str = "1.0.0"
+    summary: PoolSummary
+    pools: List[Pool]
+    matches: List[Match]
+    knockout_matches: List[Match] = []
+
+class BatchGenerateRequest(BaseModel):
+    # Items are validated one by one, so one bad division does not fail the batch
+    requests: List[Dict[str, Any]]
+
+class BatchGenerateResponse(BaseModel):
+    engine_version: str = "1.0.0"
+    # One per request, in order: the generate response, or {"error": {...}}
+    results: List[Dict[str, Any]]
+
+class EvaluateBracket(BaseModel):
+    participants: List[Participant]
+    participants_slots: List[ParticipantSlot]
+    size: Optional[int] = None
+
+class EvaluateBracketsRequest(BaseModel):
+    brackets: List[EvaluateBracket]
+
+class EvaluateBracketsResponse(BaseModel):
+    engine_version: str = "1.0.0"
+    results: List[Quality]
+
+class PatchBracketRequest(BaseModel):
+    context: Context
+    rules: Optional[Rules] = None
+    profile_id: Optional[str] = None
+    participants: List[Participant]
+    history: History = History()
+    previous: GenerateBracketResponse
+    add: List[Participant] = []
+    withdraw: List[str] = []
+
+    _check_rules_source = model_validator(mode="after")(check_rules_source)
+
+class PatchBracketResponse(BaseModel):
+    engine_version: str = "1.0.0"
+    full_redraw: bool
+    changed_slots: List[int]
+    changed_matches: List[Match]
+    result: GenerateBracketResponse
+
+class DrawProfile(BaseModel):
+    profile_id: str
+    rules: Rules
+
+class ScheduleDivision(BaseModel):
+    division_id: str
+    bracket: GenerateBracketResponse
+    match_duration: Optional[int] = None
+
+class MatchRef(BaseModel):
+    division_id: str
+    match_id: str
+
+class ScheduledMatch(MatchRef):
+    round: int
+    mat: int
+    start: int
+    end: int
+
+class ScheduleEventRequest(BaseModel):
+    divisions: List[ScheduleDivision]
+    mats: int
+    match_duration: int = 6
+    min_rest: int = 10
+    start: int = 0
+    now: Optional[int] = None
+    fixed: List[ScheduledMatch] = []
+
+class ScheduleEventResponse(BaseModel):
+    engine_version: str = "1.0.0"
+    mats: int
+    makespan: int
+    matches: List[ScheduledMatch]
+    walkovers: List[MatchRef] = []
+
+class LiveMatch(BaseModel):
+    id: str
+    match_type: str
+    round: int
+    position: int
+    athlete_red: Optional[str] = None
+    athlete_white: Optional[str] = None
+    winner: Optional[str] = None
+    status: Literal["waiting", "ready", "completed", "walkover"] = "waiting"
+
+class MatchResult(BaseModel):
+    match_id: str
+    winner: str
+
+class ApplyResultsRequest(BaseModel):
+    results: List[MatchResult]
+
+class ApplyResultsResponse(BaseModel):
+    applied: int
+    changed: List[LiveMatch]
+
+class LiveBracketState(BaseModel):
+    live_id: str
+    applied: int
+    matches: List[LiveMatch]
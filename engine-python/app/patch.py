@@ -0,0 +1,130 @@
+"""Incremental redraw for late entries and withdrawals.
+
+Applies a participant delta to a previous engine result instead of redrawing:
+withdrawn athletes leave their slot empty (their opponent gets a bye) and new
+athletes take the empty slot with the lowest separation penalty, using the same
+compiled rule evaluator as the full draw. Seeds, match ids and every other
+slot are kept, so only the round-1 matches of touched pairs change.
+
+When the delta changes the bracket size (more entries than slots, or so few that
+a smaller power of two fits) the result falls back to a full redraw.
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from app.core import EngineError, MAX_PARTICIPANTS, MIN_PARTICIPANTS, generate, resolve_rules
+from app.draw import next_power_of_two
+from app.hashing import hash_bracket
+from app.models import (
+    GenerateBracketRequest,
+    Match,
+    ParticipantSlot,
+    PatchBracketRequest,
+    PatchBracketResponse,
+    Quality,
+)
+from app.profiles import compile_rules
+from app.quality import evaluate_bracket
+
+
+def _validate_delta(request: PatchBracketRequest, current_ids: Set[str]):
+    unknown = [aid for aid in request.withdraw if aid not in current_ids]
+    if unknown:
+        raise EngineError("UNKNOWN_ATHLETE_IDS", "Withdrawn athletes are not in the bracket", {"unknown": unknown})
+    added = Counter(p.athlete_id for p in request.add)
+    duplicates = sorted(aid for aid, count in added.items() if aid in current_ids or count > 1)
+    if duplicates:
+        raise EngineError("DUPLICATE_ATHLETE_IDS", "Athlete IDs must be unique", {"duplicates": duplicates})
+
+    count = len(current_ids) - len(set(request.withdraw)) + len(request.add)
+    if count < MIN_PARTICIPANTS or count > MAX_PARTICIPANTS:
+        raise EngineError(
+            "INVALID_PARTICIPANTS_COUNT",
+            f"Participants must stay between {MIN_PARTICIPANTS} and {MAX_PARTICIPANTS}",
+            {"count": count, "min": MIN_PARTICIPANTS, "max": MAX_PARTICIPANTS},
+        )
+
+
+def patch_bracket(request: PatchBracketRequest) -> PatchBracketResponse:
+    """Apply ``request.add`` / ``request.withdraw`` to ``request.previous``."""
+    request = resolve_rules(request)
+    previous = request.previous
+    size = previous.summary.size
+    slots: List[Optional[str]] = [None] * size
+    seeds: Dict[int, str] = {}
+    for s in previous.participants_slots:
+        slots[s.slot - 1] = s.athlete_id
+        if s.seed:
+            seeds[s.seed] = s.athlete_id
+
+    current_ids = {aid for aid in slots if aid is not None}
+    _validate_delta(request, current_ids)
+
+    withdrawn = set(request.withdraw)
+    participants = [p for p in request.participants if p.athlete_id not in withdrawn] + list(request.add)
+    if next_power_of_two(len(participants)) != size:
+        result = generate(GenerateBracketRequest(
+            context=request.context,
+            rules=request.rules,
+            participants=participants,
+            history=request.history,
+        ))
+        return PatchBracketResponse(
+            full_redraw=True,
+            changed_slots=list(range(1, result.summary.size + 1)),
+            changed_matches=result.matches,
+            result=result,
+        )
+
+    changed: Set[int] = set()
+    for i, athlete_id in enumerate(slots):
+        if athlete_id in withdrawn:
+            slots[i] = None
+            changed.add(i)
+    seeds = {seed: aid for seed, aid in seeds.items() if aid not in withdrawn}
+
+    penalty = compile_rules(request.rules).bind(participants, request.history)
+    available = [i for i in range(size) if slots[i] is None]
+    for p in request.add:
+        best_slot = min(available, key=lambda slot: penalty(slot, p, slots))
+        slots[best_slot] = p.athlete_id
+        available.remove(best_slot)
+        changed.add(best_slot)
+
+    # Only round-1 matches hold athletes, so touched pairs are the whole diff
+    seed_of = {aid: seed for seed, aid in seeds.items()}
+    match_index = {(m.round, m.position): i for i, m in enumerate(previous.matches)}
+    matches = list(previous.matches)
+    changed_matches: List[Match] = []
+    for pair in sorted({slot // 2 for slot in changed}):
+        index = match_index[(1, pair + 1)]
+        red, white = slots[pair * 2], slots[pair * 2 + 1]
+        matches[index] = matches[index].model_copy(update={
+            "athlete_red": red,
+            "athlete_white": white,
+            "is_bye": red is None or white is None,
+        })
+        changed_matches.append(matches[index])
+
+    participants_slots = [
+        ParticipantSlot(athlete_id=aid, slot=i + 1, seed=seed_of.get(aid))
+        for i, aid in enumerate(slots) if aid
+    ]
+    quality = Quality(**evaluate_bracket(slots, participants, seeds))
+    summary = previous.summary.model_copy(update={
+        "participants": len(participants),
+        "byes": size - len(participants),
+        "quality": quality,
+    })
+    result = hash_bracket(previous.model_copy(update={
+        "summary": summary,
+        "participants_slots": participants_slots,
+        "matches": matches,
+    }), changed_ids=[m.id for m in changed_matches])
+    changed_ids = {m.id for m in changed_matches}
+    return PatchBracketResponse(
+        full_redraw=False,
+        changed_slots=sorted(slot + 1 for slot in changed),
+        changed_matches=[m for m in result.matches if m.id in changed_ids],
+        result=result,
+    )
@@ -0,0 +1,256 @@
+"""Round-robin and pools-to-knockout draws with lazily generated fixtures.
+
+``"format": "round_robin"`` puts every athlete in one pool. ``"format":
+"pools"`` splits them into ``context.pools`` pools (by default pools of about
+``DEFAULT_POOL_SIZE``); the top ``context.pool_qualifiers`` of each pool go
+through to a single-elimination knockout.
+
+Pool allocation reuses the draw rules: seeded athletes (``seeding_mode`` auto,
+within the same ``seeding_thresholds`` as the elimination draw, or manual)
+are snaked over the pools first, skipping pools that are already full, then
+every other athlete, in draw-seed order, joins the open pool where they add
+the least ``separate_by``/rematch penalty against the athletes already there.
+
+Fixtures follow the circle method: one athlete stays fixed while the others
+rotate, giving every pair exactly once in n-1 rounds (n rounds for odd n, one
+athlete resting each round). A pool of n athletes has n(n-1)/2 fixtures, so
+nothing holds them all: ``PoolDraw.fixtures()`` yields them round by round
+across pools and ``PoolDraw.iter_json()`` streams the response body built
+from them. ``PoolDraw.to_response()`` materializes the same response for
+msgpack and library callers.
+
+Knockout matches name their entries by pool placing (``metadata.red_from``,
+e.g. ``"A1"`` for the winner of pool A). Pool winners take the seed
+positions, so byes go to them, and later placings are spread so athletes
+from the same pool meet as late as possible.
+"""
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib
+import itertools
+import math
+import random
+
+from app.draw import auto_seed_count, next_power_of_two, resolve_draw_seed
+from app.models import GenerateBracketRequest, Match, Participant, Pool, PoolDrawResponse, PoolSummary
+from app.profiles import compile_rules
+
+POOL_FORMATS = ("round_robin", "pools")
+DEFAULT_POOL_SIZE = 5
+# Fixtures per chunk of the streamed response body
+FIXTURE_BATCH = 256
+
+
+def pool_count(participants: int, context) -> int:
+    if context.format == "round_robin":
+        return 1
+    if context.pools is not None:
+        return context.pools
+    return max(2, math.ceil(participants / DEFAULT_POOL_SIZE))
+
+
+def pool_label(index: int) -> str:
+    """``A``..``Z``, then ``AA``, ``AB``, ..."""
+    label = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        label = chr(ord("A") + rest) + label
+    return label
+
+
+def circle_rounds(n: int) -> Iterator[List[Tuple[int, int]]]:
+    """Rounds of (red, white) index pairs covering every pair of ``n`` athletes once."""
+    ring: List[Optional[int]] = list(range(n))
+    if n % 2:
+        ring.append(None)  # whoever meets None rests this round
+    half = len(ring) // 2
+    for r in range(len(ring) - 1):
+        pairs = []
+        for i in range(half):
+            a, b = ring[i], ring[-1 - i]
+            if a is None or b is None:
+                continue
+            # The fixed athlete alternates colours
+            pairs.append((b, a) if i == 0 and r % 2 else (a, b))
+        yield pairs
+        ring.insert(1, ring.pop())
+
+
+def seed_order(size: int) -> List[int]:
+    """Seed number (1-based) at each slot of a standard ``size`` bracket."""
+    order = [1]
+    while len(order) < size:
+        n = len(order) * 2
+        order = [x for s in order for x in (s, n + 1 - s)]
+    return order
+
+
+def _meet_round(a: int, b: int) -> int:
+    return (a ^ b).bit_length()
+
+
+def knockout_entries(pools: int, qualifiers: int) -> List[Optional[str]]:
+    """Entry label (``"B2"``) at each knockout slot, None for byes."""
+    size = next_power_of_two(max(2, pools * qualifiers))
+    slot_of_seed = {seed: slot for slot, seed in enumerate(seed_order(size))}
+    entries: List[Optional[str]] = [None] * size
+    placed: Dict[int, List[int]] = {p: [] for p in range(pools)}
+    for rank in range(1, qualifiers + 1):
+        tier = sorted(slot_of_seed[seed] for seed in range((rank - 1) * pools + 1, rank * pools + 1))
+        for p in range(pools):
+            # Meet the same pool's qualifiers as late as possible
+            slot = max(tier, key=lambda s: (min((_meet_round(s, o) for o in placed[p]), default=0), -s))
+            tier.remove(slot)
+            placed[p].append(slot)
+            entries[slot] = f"{pool_label(p)}{rank}"
+    return entries
+
+
+def allocate_pools(request: GenerateBracketRequest, pools: int, rng: random.Random) -> List[List[Participant]]:
+    participants = request.participants
+    capacity = [len(participants) // pools + (p < len(participants) % pools) for p in range(pools)]
+    members: List[List[Participant]] = [[] for _ in range(pools)]
+
+    if request.rules.seeding_mode == "manual":
+        seeded = sorted((p for p in participants if p.seed), key=lambda p: p.seed)
+    elif request.rules.seeding_mode == "auto":
+        ranked = sorted((p for p in participants if p.ranking_points is not None), key=lambda p: p.ranking_points, reverse=True)
+        seeded = ranked[:auto_seed_count(request.rules, len(participants))]
+    else:
+        seeded = []
+    seeded = seeded[:len(participants)]
+    snake = itertools.cycle(list(range(pools)) + list(reversed(range(pools))))
+    for p in seeded:
+        members[next(k for k in snake if len(members[k]) < capacity[k])].append(p)
+
+    seeded_ids = {p.athlete_id for p in seeded}
+    rest = [p for p in participants if p.athlete_id not in seeded_ids]
+    rng.shuffle(rest)
+    conflict = compile_rules(request.rules).pair_penalty(request.history)
+    for p in rest:
+        open_pools = [k for k in range(pools) if len(members[k]) < capacity[k]]
+        best = min(open_pools, key=lambda k: (sum(conflict(p, o) for o in members[k]), len(members[k]), k))
+        members[best].append(p)
+    return members
+
+
+def _collisions(members: List[List[Participant]], attribute: str) -> int:
+    total = 0
+    for pool in members:
+        for count in Counter(getattr(p, attribute) for p in pool if getattr(p, attribute)).values():
+            total += count * (count - 1) // 2
+    return total
+
+
+def knockout_matches(entries: List[Optional[str]], first_id: int, draw_seed: str) -> List[Match]:
+    """Single-elimination matches over ``entries``; ids continue after the pool fixtures."""
+    size = len(entries)
+    rounds = size.bit_length() - 1
+    matches: List[Match] = []
+    current: List[Match] = []
+    for r in range(1, rounds + 1):
+        created = []
+        for pos in range(size >> r):
+            metadata = {"path": f"KO:R{r}:M{pos + 1}"}
+            is_bye = False
+            if r == 1:
+                red, white = entries[pos * 2], entries[pos * 2 + 1]
+                metadata.update(red_from=red, white_from=white)
+                is_bye = red is None or white is None
+            match = Match(
+                id=f"match-{first_id + len(matches) + len(created) + 1}-{draw_seed[:8]}",
+                match_type="final" if r == rounds else "main",
+                round=r,
+                position=pos + 1,
+                is_bye=is_bye,
+                metadata=metadata,
+            )
+            created.append(match)
+            if current:
+                current[pos * 2].next_match_id = current[pos * 2 + 1].next_match_id = match.id
+        matches.extend(created)
+        current = created
+    return matches
+
+
+class PoolDraw:
+    """A pool draw whose fixtures are generated on demand."""
+
+    def __init__(self, summary: PoolSummary, pools: List[Pool], knockout: List[Match], draw_seed: str):
+        self.summary = summary
+        self.pools = pools
+        self.knockout = knockout
+        self._suffix = draw_seed[:8]
+
+    def fixtures(self) -> Iterator[Match]:
+        """Pool matches, round by round across pools."""
+        counter = 0
+        generators = [circle_rounds(len(pool.athletes)) for pool in self.pools]
+        for r in range(1, self.summary.rounds + 1):
+            for pool, rounds in zip(self.pools, generators):
+                pairs = next(rounds, None)
+                if pairs is None:
+                    continue
+                for position, (red, white) in enumerate(pairs, 1):
+                    counter += 1
+                    yield Match(
+                        id=f"match-{counter}-{self._suffix}",
+                        match_type="pool",
+                        round=r,
+                        position=position,
+                        athlete_red=pool.athletes[red],
+                        athlete_white=pool.athletes[white],
+                        metadata={"path": f"{pool.pool}:R{r}:M{position}", "pool": pool.pool},
+                    )
+
+    def to_response(self) -> PoolDrawResponse:
+        return PoolDrawResponse(summary=self.summary, pools=self.pools, matches=list(self.fixtures()), knockout_matches=self.knockout)
+
+    def iter_json(self, batch: int = FIXTURE_BATCH) -> Iterator[bytes]:
+        """The ``to_response()`` JSON body in chunks, without building the fixture list."""
+        empty = PoolDrawResponse(summary=self.summary, pools=self.pools, matches=[], knockout_matches=self.knockout)
+        # Athlete ids are escaped inside JSON strings, so this key only matches the field itself
+        head, tail = empty.model_dump_json().encode().split(b'"matches":[]', 1)
+        yield head + b'"matches":['
+        chunk: List[bytes] = []
+        first = True
+        for match in self.fixtures():
+            chunk.append(match.model_dump_json().encode())
+            if len(chunk) >= batch:
+                yield (b"" if first else b",") + b",".join(chunk)
+                chunk, first = [], False
+        if chunk:
+            yield (b"" if first else b",") + b",".join(chunk)
+        yield b"]" + tail
+
+
+def run_pools(request: GenerateBracketRequest) -> PoolDraw:
+    """Allocate pools and lay out the knockout for an already validated request."""
+    draw_seed = resolve_draw_seed(request)
+    rng = random.Random(int(hashlib.md5(draw_seed.encode()).hexdigest(), 16) % (2**32))
+    n = len(request.participants)
+    count = pool_count(n, request.context)
+    members = allocate_pools(request, count, rng)
+    pools = [Pool(pool=pool_label(k), athletes=[p.athlete_id for p in pool]) for k, pool in enumerate(members)]
+    fixtures = sum(len(pool) * (len(pool) - 1) // 2 for pool in members)
+    pool_rounds = max(len(pool) - 1 + len(pool) % 2 for pool in members)
+
+    entries: List[Optional[str]] = []
+    qualifiers = 0
+    if request.context.format == "pools":
+        qualifiers = request.context.pool_qualifiers
+        entries = knockout_entries(count, qualifiers)
+
+    summary = PoolSummary(
+        participants=n,
+        format=request.context.format,
+        pools=count,
+        pool_qualifiers=qualifiers,
+        fixtures=fixtures,
+        rounds=pool_rounds,
+        knockout_size=len(entries),
+        club_collisions=_collisions(members, "club_id"),
+        nation_collisions=_collisions(members, "nation_code"),
+    )
+    return PoolDraw(summary, pools, knockout_matches(entries, fixtures, draw_seed) if entries else [], draw_seed)
@@ -0,0 +1,173 @@
+"""Registered draw profiles and compiled rule evaluators.
+
+A draw profile is a named ``Rules`` block registered once
+(``PUT /v1/profiles/{profile_id}``) and referenced from requests by
+``profile_id`` instead of resending the rules for every division.
+
+``compile_rules`` turns a rules block into a ``RuleEvaluator`` whose penalty
+function has the ``separate_by`` checks and penalty weights resolved ahead of
+time. Evaluators are cached by rules content, so inline rules blocks that
+repeat across requests are compiled once too.
+
+With ``DRAW_PROFILES_DIR`` set, profiles are also written there (one JSON file
+each, replaced atomically) so every worker process sees registrations made
+through any of them.
+"""
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import os
+import re
+import tempfile
+import threading
+
+from app.models import History, Participant, Rules
+
+PROFILE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# (participant attribute, separate_by key, penalty field)
+SEPARATION_CHECKS = (
+    ("club_id", "club", "same_club_r1"),
+    ("nation_code", "nation", "same_nation_r1"),
+)
+
+PenaltyFn = Callable[[int, Participant, List[Optional[str]]], float]
+PairPenaltyFn = Callable[[Participant, Participant], float]
+
+
+class RuleEvaluator:
+    """A rules block with its penalty branches resolved."""
+
+    def __init__(self, rules: Rules):
+        self.rules = rules
+        self._checks: Tuple[Tuple[str, int], ...] = tuple(
+            (attribute, getattr(rules.penalties, penalty))
+            for attribute, key, penalty in SEPARATION_CHECKS
+            if key in rules.separate_by
+        )
+        self._rematch = rules.penalties.rematch_recent
+
+    def _conflict(self, recent: Counter) -> PairPenaltyFn:
+        checks = self._checks
+        rematch = self._rematch
+
+        def conflict(participant: Participant, opponent: Participant) -> float:
+            total = 0.0
+            for attribute, weight in checks:
+                value = getattr(participant, attribute)
+                if value and getattr(opponent, attribute) == value:
+                    total += weight
+            for _ in range(recent[(participant.athlete_id, opponent.athlete_id)]):
+                total += rematch
+            return total
+
+        return conflict
+
+    def pair_penalty(self, history: History) -> PairPenaltyFn:
+        """Penalty of two participants meeting (same club/nation, recent rematch)."""
+        return self._conflict(_recent_pairs(history))
+
+    def bind(self, participants: List[Participant], history: History) -> PenaltyFn:
+        """Penalty of putting a participant in ``slot``, for one request.
+
+        Opponent and rematch lookups are dict hits; ``tests/test_profiles.py``
+        checks it against the plain per-slot scan.
+        """
+        recent = _recent_pairs(history)
+        if not self._checks and not recent:
+            return lambda slot, participant, slots: 0.0
+        conflict = self._conflict(recent)
+
+        by_id: Dict[str, Participant] = {}
+        for p in participants:
+            by_id.setdefault(p.athlete_id, p)
+
+        def penalty(slot: int, participant: Participant, slots: List[Optional[str]]) -> float:
+            opponent_slot = slot ^ 1
+            if opponent_slot >= len(slots) or not slots[opponent_slot]:
+                return 0.0
+            opponent = by_id.get(slots[opponent_slot])
+            if opponent is None:
+                return 0.0
+            return conflict(participant, opponent)
+
+        return penalty
+
+
+def _recent_pairs(history: History) -> Counter:
+    recent: Counter = Counter()
+    for pair in history.recent_pairs:
+        recent[(pair.a, pair.b)] += 1
+        if pair.a != pair.b:
+            recent[(pair.b, pair.a)] += 1
+    return recent
+
+
+@lru_cache(maxsize=256)
+def _compile(rules_json: str) -> RuleEvaluator:
+    return RuleEvaluator(Rules.model_validate_json(rules_json))
+
+
+def compile_rules(rules: Rules) -> RuleEvaluator:
+    """Cached ``RuleEvaluator`` for ``rules`` (keyed by content)."""
+    return _compile(rules.model_dump_json())
+
+
+class ProfileStore:
+    """Registered profiles, optionally shared between workers through a directory."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._profiles: Dict[str, Tuple[Optional[Tuple[int, int]], RuleEvaluator]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _signature(self, profile_id: str) -> Tuple[int, int]:
+        stat = os.stat(self._path(profile_id))
+        return stat.st_ino, stat.st_mtime_ns
+
+    def register(self, profile_id: str, rules: Rules) -> RuleEvaluator:
+        """Compile and store ``rules`` under ``profile_id`` (replacing any previous one)."""
+        if not PROFILE_ID.match(profile_id):
+            raise ValueError("Profile IDs are 1-64 letters, digits, '_', '-' or '.'")
+        evaluator = compile_rules(rules)
+        with self._lock:
+            signature = None
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".profile-")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(rules.model_dump_json())
+                os.replace(tmp_path, self._path(profile_id))
+                signature = self._signature(profile_id)
+            self._profiles[profile_id] = (signature, evaluator)
+        return evaluator
+
+    def get(self, profile_id: str) -> Optional[RuleEvaluator]:
+        if not self.directory:
+            cached = self._profiles.get(profile_id)
+            return cached[1] if cached else None
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            signature = self._signature(profile_id)
+        except FileNotFoundError:
+            return None
+        cached = self._profiles.get(profile_id)
+        if cached is None or cached[0] != signature:
+            with open(self._path(profile_id), encoding="utf-8") as f:
+                cached = (signature, compile_rules(Rules.model_validate_json(f.read())))
+            self._profiles[profile_id] = cached
+        return cached[1]
+
+    def ids(self) -> List[str]:
+        if not self.directory:
+            return sorted(self._profiles)
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json") and not name.startswith("."))
+
+
+profiles = ProfileStore(os.environ.get("DRAW_PROFILES_DIR"))
@@ -0,0 +1,346 @@
+"""Consistent-hash router in front of several engine instances.
+
+    competition-engine proxy --upstream http://127.0.0.1:8001 --upstream http://127.0.0.1:8002 --port 8000
+
+A result cache or idempotency store inside an engine only helps when repeats
+of a request reach the instance that saw it first; round-robin scatters
+them. This ASGI app sends every request to the instance its key hashes to on
+a ring with ``--replicas`` virtual nodes per instance:
+
+- ``/v1/live/{live_id}/...`` by live bracket, since its state lives on one
+  instance,
+- requests with a body by method, path, query and the canonical payload
+  (JSON or msgpack decoded, keys sorted), so the same division drawn twice
+  goes to the same instance whatever its encoding, key order or
+  ``Idempotency-Key`` (``engine_client`` sends a fresh one per call),
+- requests without a body by their ``Idempotency-Key`` header when there is
+  one, else method, path and query.
+
+``PUT /v1/profiles/{id}`` and ``POST /v1/registry/reload`` change instance
+state and go to every instance that is up; the answer is the worst one.
+
+Upstream connections are kept alive and pooled (``--pool-size`` each). An
+instance that refuses or drops a request twice is marked down for
+``--retry-after`` seconds and its requests go to the next instance on the
+ring. Only the down instance's keys move, spread over the others, and they
+move back when it answers again. Timeouts are answered with 504 and do not
+move keys. Live routes never move: another instance has no copy of the
+bracket, and a result sent twice is not safe to repeat, so they are tried
+once, on their own instance, and get 502 (or 503 while it is marked down).
+Responses carry ``X-Engine-Shard``.
+
+``GET /proxy/stats`` has per-instance requests, hit rate (requests whose
+key the instance served among its last ``RECENT_KEYS`` keys, so what a
+per-instance cache could hit), handoffs, errors and state. ``GET /health``
+is the router's own: 200 while at least one instance is up. Responses are
+buffered, so streamed round robins arrive whole.
+"""
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import re
+import sys
+import time
+
+from engine_client.aio import TRANSPORT_ERRORS, ConnectionPool
+
+try:
+    import msgpack
+except ImportError:  # JSON only
+    msgpack = None
+
+DEFAULT_REPLICAS = 160
+# Keys remembered per instance for the hit rate
+RECENT_KEYS = 65536
+ATTEMPTS_PER_INSTANCE = 2
+BROADCAST = (("PUT", re.compile(r"^/v1/profiles/[^/]+$")), ("POST", re.compile(r"^/v1/registry/reload$")))
+LIVE_PATH = re.compile(r"^/v1/live/([^/]+)")
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "host", "content-length",
+}
+# uvicorn sets its own
+RESPONSE_DROPPED = HOP_BY_HOP | {"date", "server"}
+
+
+def _hash(value: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """``replicas`` points per node on a 64-bit ring; a key belongs to the next point clockwise."""
+
+    def __init__(self, nodes: Sequence[str], replicas: int = DEFAULT_REPLICAS):
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}".encode()), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def lookup(self, key: bytes, down: Set[str] = frozenset()) -> Optional[str]:
+        """The node owning ``key``, skipping ``down`` ones (so only their keys move)."""
+        for node in self.candidates(key):
+            if node not in down:
+                return node
+        return None
+
+    def candidates(self, key: bytes) -> List[str]:
+        """Distinct nodes in ring order from ``key``: the owner, then where its keys go if it is down."""
+        start = bisect.bisect(self._hashes, _hash(key))
+        seen: List[str] = []
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in seen:
+                seen.append(node)
+                if len(seen) == len(self.nodes):
+                    break
+        return seen
+
+
+def canonical_payload(content_type: str, body: bytes) -> bytes:
+    """``body`` with encoding and key order normalised; the raw bytes when it does not decode."""
+    if not body:
+        return b""
+    try:
+        if content_type.split(";")[0].strip().lower() in ("application/msgpack", "application/x-msgpack"):
+            if msgpack is None:
+                return body
+            data = msgpack.unpackb(body, raw=False)
+        else:
+            data = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def routing_key(method: str, path: str, query: str, headers: Dict[str, str], body: bytes) -> bytes:
+    live = LIVE_PATH.match(path)
+    if live:
+        return b"live:" + live.group(1).encode()
+    idempotency_key = headers.get("idempotency-key")
+    if idempotency_key and not body:
+        return b"idempotency:" + idempotency_key.encode()
+    return f"{method} {path}?{query}\n".encode() + canonical_payload(headers.get("content-type", ""), body)
+
+
+class Shard:
+    """One engine instance: its pool, up/down state and counters."""
+
+    def __init__(self, url: str, pool_size: int):
+        parts = urlsplit(url)
+        self.url = url
+        self.pool = ConnectionPool(parts.hostname or "127.0.0.1", parts.port or 80, pool_size)
+        self.down_until = 0.0
+        self.requests = 0
+        self.hits = 0
+        self.handoffs = 0
+        self.errors = 0
+        self._recent: "OrderedDict[bytes, None]" = OrderedDict()
+
+    @property
+    def up(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def record(self, key: bytes, handoff: bool):
+        self.requests += 1
+        self.handoffs += handoff
+        if key in self._recent:
+            self.hits += 1
+            self._recent.move_to_end(key)
+        else:
+            self._recent[key] = None
+            if len(self._recent) > RECENT_KEYS:
+                self._recent.popitem(last=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "up": self.up,
+            "requests": self.requests,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.requests, 4) if self.requests else 0.0,
+            "handoffs": self.handoffs,
+            "errors": self.errors,
+        }
+
+
+class Response(NamedTuple):
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+def _error(status: int, code: str, message: str, shard: str = "") -> Response:
+    body = json.dumps({"error": {"code": code, "message": message}}).encode()
+    headers = [(b"content-type", b"application/json")]
+    if shard:
+        headers.append((b"x-engine-shard", shard.encode()))
+    return Response(status, headers, body)
+
+
+class Router:
+    """The ASGI app (see the module docstring)."""
+
+    def __init__(self, upstreams: Sequence[str], replicas: int = DEFAULT_REPLICAS, pool_size: int = 32,
+                 timeout: float = 30.0, retry_after: float = 2.0):
+        if not upstreams:
+            raise ValueError("At least one upstream is required")
+        self.shards = {url.rstrip("/"): Shard(url.rstrip("/"), pool_size) for url in upstreams}
+        self.ring = HashRing(list(self.shards), replicas)
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+    def down(self) -> Set[str]:
+        return {url for url, shard in self.shards.items() if not shard.up}
+
+    def stats(self) -> dict:
+        return {"shards": [shard.to_dict() for shard in self.shards.values()]}
+
+    async def close(self):
+        for shard in self.shards.values():
+            await shard.pool.close()
+
+    async def _send(self, shard: Shard, method: str, target: str, headers: Dict[str, str], body: bytes,
+                    attempts: int = ATTEMPTS_PER_INSTANCE) -> Response:
+        """One upstream exchange; raises the transport error after ``attempts`` tries."""
+        for attempt in range(1, attempts + 1):
+            try:
+                status, response_headers, payload = await asyncio.wait_for(
+                    shard.pool.request(method, target, body, headers), self.timeout
+                )
+                break
+            except asyncio.TimeoutError:
+                raise
+            except TRANSPORT_ERRORS:
+                # A kept-alive connection the instance has just closed fails once; a dead instance fails again
+                if attempt == attempts:
+                    raise
+        forwarded = [(k.encode(), v.encode()) for k, v in response_headers.items() if k not in RESPONSE_DROPPED]
+        forwarded.append((b"x-engine-shard", shard.url.encode()))
+        return Response(status, forwarded, payload)
+
+    async def forward(self, method: str, target: str, key: bytes, headers: Dict[str, str], body: bytes) -> Response:
+        candidates = self.ring.candidates(key)
+        home = candidates[0]
+        for url in candidates:
+            shard = self.shards[url]
+            if not shard.up:
+                continue
+            shard.record(key, handoff=url != home)
+            try:
+                return await self._send(shard, method, target, headers, body)
+            except asyncio.TimeoutError:
+                shard.errors += 1
+                return _error(504, "UPSTREAM_TIMEOUT", f"No response within {self.timeout:g}s", url)
+            except TRANSPORT_ERRORS:
+                shard.errors += 1
+                shard.down_until = time.monotonic() + self.retry_after
+        return _error(502, "UPSTREAM_UNAVAILABLE", "No engine instance is reachable")
+
+    async def forward_live(self, method: str, target: str, key: bytes, headers: Dict[str, str], body: bytes) -> Response:
+        """Live routes: the home instance only, one attempt (see the module docstring)."""
+        url = self.ring.candidates(key)[0]
+        shard = self.shards[url]
+        if not shard.up:
+            response = _error(503, "UPSTREAM_UNAVAILABLE", "The instance holding this live bracket is down", url)
+            retry_after = max(1, round(shard.down_until - time.monotonic()))
+            return response._replace(headers=response.headers + [(b"retry-after", str(retry_after).encode())])
+        shard.record(key, handoff=False)
+        try:
+            return await self._send(shard, method, target, headers, body, attempts=1)
+        except asyncio.TimeoutError:
+            shard.errors += 1
+            return _error(504, "UPSTREAM_TIMEOUT", f"No response within {self.timeout:g}s", url)
+        except TRANSPORT_ERRORS:
+            shard.errors += 1
+            return _error(502, "UPSTREAM_UNAVAILABLE", "The instance holding this live bracket did not answer", url)
+
+    async def broadcast(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Response:
+        shards = [shard for shard in self.shards.values() if shard.up]
+
+        async def one(shard: Shard) -> Response:
+            shard.requests += 1
+            try:
+                return await self._send(shard, method, target, headers, body)
+            except (asyncio.TimeoutError, *TRANSPORT_ERRORS):
+                shard.errors += 1
+                shard.down_until = time.monotonic() + self.retry_after
+                return _error(502, "UPSTREAM_UNAVAILABLE", f"{shard.url} is not reachable", shard.url)
+
+        responses = await asyncio.gather(*(one(shard) for shard in shards))
+        if not responses:
+            return _error(502, "UPSTREAM_UNAVAILABLE", "No engine instance is reachable")
+        return max(responses, key=lambda r: r.status)
+
+    async def handle(self, method: str, path: str, query: str, headers: Dict[str, str], body: bytes,
+                     raw_path: Optional[str] = None) -> Response:
+        """Route one request; ``path`` is decoded for matching, ``raw_path`` (as sent) is what goes upstream."""
+        if path == "/proxy/stats" and method == "GET":
+            return Response(200, [(b"content-type", b"application/json")], json.dumps(self.stats()).encode())
+        if path == "/health" and method == "GET":
+            up = len(self.shards) - len(self.down())
+            return Response(200 if up else 503, [(b"content-type", b"application/json")],
+                            json.dumps({"status": "ok" if up else "unavailable", "shards_up": up}).encode())
+        target = raw_path or path
+        target = f"{target}?{query}" if query else target
+        forwarded = {k: v for k, v in headers.items() if k not in HOP_BY_HOP}
+        if any(method == m and pattern.match(path) for m, pattern in BROADCAST):
+            return await self.broadcast(method, target, forwarded, body)
+        if LIVE_PATH.match(path):
+            return await self.forward_live(method, target, routing_key(method, path, query, headers, body), forwarded, body)
+        return await self.forward(method, target, routing_key(method, path, query, headers, body), forwarded, body)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await self.close()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        raw_path = scope.get("raw_path")
+        response = await self.handle(scope["method"], scope["path"], scope["query_string"].decode("latin-1"), headers,
+                                     b"".join(chunks), raw_path.decode("latin-1") if raw_path else None)
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + [(b"content-length", str(len(response.body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": response.body})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="competition-engine proxy", description="Consistent-hash router for engines")
+    parser.add_argument("--upstream", action="append", required=True, help="Engine base URL (repeat per instance)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--replicas", type=int, default=DEFAULT_REPLICAS, help="Ring points per instance")
+    parser.add_argument("--pool-size", type=int, default=32, help="Kept-alive connections per instance")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for an instance's response")
+    parser.add_argument("--retry-after", type=float, default=2.0, help="Seconds a failed instance is left out")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    router = Router(args.upstream, args.replicas, args.pool_size, args.timeout, args.retry_after)
+    uvicorn.run(router, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Vectorized bracket quality scoring.
+
+Scores slot arrays against participant attributes with NumPy so the same
+logic serves the generator (one bracket) and the evaluate endpoint (many
+stored brackets per request).
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Nation collisions are scaled down when a single nation dominates the field
+NATION_DOMINANCE_THRESHOLD = 0.9
+NATION_DOMINANCE_FACTOR = 0.1
+
+COLLISION_POINTS = 5
+EMPTY = -1
+
+
+class AttributeCodes:
+    """Maps club/nation strings to dense integer codes (``EMPTY`` for missing)."""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if not value:
+            return EMPTY
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._codes)
+            self._codes[value] = code
+        return code
+
+
+def nation_dominant(nation_codes: Iterable[Optional[str]]) -> bool:
+    """True when 90%+ of the participants with a nation share the same one."""
+    counts = Counter(c for c in nation_codes if c)
+    if not counts:
+        return False
+    most_common_count = counts.most_common(1)[0][1]
+    return most_common_count / sum(counts.values()) >= NATION_DOMINANCE_THRESHOLD
+
+
+def pair_collisions(club: np.ndarray, nation: np.ndarray):
+    """Count round-1 club and nation collisions.
+
+    ``club`` and ``nation`` are ``(size,)`` or ``(brackets, size)`` code arrays
+    in slot order; empty slots and missing attributes are ``EMPTY``.
+    """
+    club = club.reshape(club.shape[:-1] + (-1, 2))
+    nation = nation.reshape(nation.shape[:-1] + (-1, 2))
+    club_hits = (club[..., 0] != EMPTY) & (club[..., 0] == club[..., 1])
+    nation_hits = (nation[..., 0] != EMPTY) & (nation[..., 0] == nation[..., 1])
+    return club_hits.sum(axis=-1), nation_hits.sum(axis=-1)
+
+
+def normalize_nation_collisions(nation_collisions, dominant):
+    """Apply the low-entropy nation rule (keep 10% of the collisions)."""
+    scaled = (np.asarray(nation_collisions) * NATION_DOMINANCE_FACTOR).astype(np.int64)
+    return np.where(dominant, scaled, nation_collisions)
+
+
+def score_brackets(
+    club: np.ndarray,
+    nation: np.ndarray,
+    occupied: np.ndarray,
+    top_seed_slots: np.ndarray,
+    participants: np.ndarray,
+    dominant: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Score a batch of same-size brackets in one pass.
+
+    Args:
+        club, nation: ``(B, size)`` attribute codes in slot order.
+        occupied: ``(B, size)`` bool mask of filled slots.
+        top_seed_slots: ``(B, 2)`` 0-based slots of seeds 1 and 2 (``EMPTY`` if absent).
+        participants: ``(B,)`` participant counts.
+        dominant: ``(B,)`` nation dominance flags.
+    """
+    size = occupied.shape[1]
+    club_collisions, nation_collisions = pair_collisions(club, nation)
+    nation_collisions = normalize_nation_collisions(nation_collisions, dominant)
+
+    # Seed protection: top two seeds should sit in different halves
+    half = size // 2
+    both_seeded = (top_seed_slots >= 0).all(axis=1)
+    same_half = (top_seed_slots[:, 0] < half) == (top_seed_slots[:, 1] < half)
+    seed_protection = np.where(both_seeded & same_half, 0.5, 1.0)
+
+    # Bye fairness: byes are fair when they fill the tail of the draw
+    byes = size - participants
+    expected_empty = np.arange(size)[None, :] >= (size - byes)[:, None]
+    tail_byes = ((~occupied) == expected_empty).all(axis=1)
+    bye_fairness = np.where((byes > 0) & (~occupied).any(axis=1) & ~tail_byes, 0.8, 1.0)
+
+    collision_penalty = (club_collisions + nation_collisions) * COLLISION_POINTS
+    score = 100 - collision_penalty + (seed_protection * 10).astype(np.int64) + (bye_fairness * 10).astype(np.int64)
+    return {
+        "score": np.clip(score, 0, 100),
+        "club_collisions_r1": club_collisions,
+        "nation_collisions_r1": nation_collisions,
+        "seed_protection": seed_protection,
+        "bye_fairness": bye_fairness,
+    }
+
+
+def encode_bracket(slots: Sequence[Optional[str]], attributes: Dict[str, tuple], codes: AttributeCodes):
+    """Encode a slot list into club/nation code arrays using ``athlete_id -> (club, nation)``."""
+    club = np.full(len(slots), EMPTY, dtype=np.int64)
+    nation = np.full(len(slots), EMPTY, dtype=np.int64)
+    for i, athlete_id in enumerate(slots):
+        if athlete_id is None:
+            continue
+        club_id, nation_code = attributes.get(athlete_id, (None, None))
+        club[i] = codes.code(club_id)
+        nation[i] = codes.code(nation_code)
+    return club, nation
+
+
+def top_seed_slots(slots: Sequence[Optional[str]], seeds: Dict[int, str]) -> List[int]:
+    """0-based slots of the two best seeds present in the draw."""
+    slot_of = {athlete_id: i for i, athlete_id in enumerate(slots) if athlete_id is not None}
+    positions = [slot_of[aid] for _, aid in sorted(seeds.items()) if aid in slot_of][:2]
+    return positions + [EMPTY] * (2 - len(positions))
+
+
+def evaluate_brackets(brackets: Sequence[dict]) -> List[dict]:
+    """Score many brackets, batching those of equal size.
+
+    Each bracket is a dict with ``slots`` (athlete id or None per slot),
+    ``participants`` (objects with ``athlete_id``, ``club_id``, ``nation_code``)
+    and ``seeds`` (seed number -> athlete id).
+    """
+    codes = AttributeCodes()
+    by_size: Dict[int, List[int]] = {}
+    encoded = []
+    for index, bracket in enumerate(brackets):
+        slots = bracket["slots"]
+        participants = bracket["participants"]
+        attributes = {p.athlete_id: (p.club_id, p.nation_code) for p in participants}
+        club, nation = encode_bracket(slots, attributes, codes)
+        encoded.append((
+            club,
+            nation,
+            np.array([s is not None for s in slots]),
+            top_seed_slots(slots, bracket.get("seeds") or {}),
+            len(participants),
+            nation_dominant(p.nation_code for p in participants),
+        ))
+        by_size.setdefault(len(slots), []).append(index)
+
+    results: List[Optional[dict]] = [None] * len(brackets)
+    for indices in by_size.values():
+        rows = [encoded[i] for i in indices]
+        scored = score_brackets(
+            club=np.stack([r[0] for r in rows]),
+            nation=np.stack([r[1] for r in rows]),
+            occupied=np.stack([r[2] for r in rows]),
+            top_seed_slots=np.array([r[3] for r in rows], dtype=np.int64),
+            participants=np.array([r[4] for r in rows], dtype=np.int64),
+            dominant=np.array([r[5] for r in rows], dtype=bool),
+        )
+        for row, index in enumerate(indices):
+            results[index] = {
+                "score": int(scored["score"][row]),
+                "club_collisions_r1": int(scored["club_collisions_r1"][row]),
+                "nation_collisions_r1": int(scored["nation_collisions_r1"][row]),
+                "seed_protection": float(scored["seed_protection"][row]),
+                "bye_fairness": float(scored["bye_fairness"][row]),
+            }
+    return results
+
+
+def evaluate_bracket(slots: Sequence[Optional[str]], participants: Sequence, seeds: Dict[int, str]) -> dict:
+    """Score a single bracket; see :func:`evaluate_brackets`."""
+    return evaluate_brackets([{"slots": slots, "participants": participants, "seeds": seeds}])[0]
@@ -0,0 +1,235 @@
+"""Memory-mapped athlete registry.
+
+A registry snapshot is a single columnar file holding club, nation, ranking
+points and meta for every athlete. The engine memory-maps it read-only, so all
+worker processes share the same page cache, and requests can send just
+``athlete_id`` plus any fields they want to override: fields a participant
+does not set are filled from the registry.
+
+Snapshots are written to a temp file and renamed into place. ``RegistryHolder``
+notices the new file (inode/mtime change) and swaps it in atomically; requests
+already running keep the snapshot they started with. A file that cannot be
+loaded is logged and leaves the last good snapshot in place.
+
+File layout: ``MAGIC``, a little-endian uint64 header length, a JSON header
+describing each column (dtype, offset, count), then 64-byte aligned arrays.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from app.models import Participant
+
+MAGIC = b"ATHREG01"
+ALIGN = 64
+NULL_RANKING = np.iinfo(np.int64).min
+REGISTRY_FIELDS = ("club_id", "nation_code", "ranking_points", "meta")
+
+logger = logging.getLogger(__name__)
+
+
+def id_hash(athlete_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(athlete_id.encode(), digest_size=8).digest(), "little")
+
+
+def _string_table(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode() for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def write_registry(athletes: Iterable[Dict[str, Any]], path: str) -> int:
+    """Write a snapshot of ``athletes`` (participant-shaped dicts) atomically; returns the count."""
+    rows = sorted(athletes, key=lambda a: (id_hash(a["athlete_id"]), a["athlete_id"]))
+    clubs = sorted({a["club_id"] for a in rows if a.get("club_id")})
+    nations = sorted({a["nation_code"] for a in rows if a.get("nation_code")})
+    club_code = {c: i for i, c in enumerate(clubs)}
+    nation_code = {n: i for i, n in enumerate(nations)}
+
+    id_offsets, id_blob = _string_table([a["athlete_id"] for a in rows])
+    club_offsets, club_blob = _string_table(clubs)
+    nation_offsets, nation_blob = _string_table(nations)
+    meta_offsets, meta_blob = _string_table([json.dumps(a["meta"]) if a.get("meta") is not None else "" for a in rows])
+    columns = {
+        "id_hash": np.array([id_hash(a["athlete_id"]) for a in rows], dtype=np.uint64),
+        "id_offsets": id_offsets,
+        "id_blob": id_blob,
+        "club": np.array([club_code.get(a.get("club_id"), -1) for a in rows], dtype=np.int32),
+        "club_offsets": club_offsets,
+        "club_blob": club_blob,
+        "nation": np.array([nation_code.get(a.get("nation_code"), -1) for a in rows], dtype=np.int32),
+        "nation_offsets": nation_offsets,
+        "nation_blob": nation_blob,
+        "ranking": np.array([NULL_RANKING if a.get("ranking_points") is None else a["ranking_points"] for a in rows], dtype=np.int64),
+        "meta_offsets": meta_offsets,
+        "meta_blob": meta_blob,
+    }
+
+    header: Dict[str, Any] = {"count": len(rows), "created_at": time.time(), "columns": {}}
+    offset = 0
+    for name, array in columns.items():
+        header["columns"][name] = {"dtype": array.dtype.str, "offset": offset, "count": int(array.size)}
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".registry-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+            for name, array in columns.items():
+                f.seek(data_start + header["columns"][name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(rows)
+
+
+class AthleteRegistry:
+    """Read-only view over a memory-mapped snapshot."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an athlete registry snapshot")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(self._mmap[len(MAGIC) + 8:header_end])
+        data_start = -(-header_end // ALIGN) * ALIGN
+        self.count: int = header["count"]
+        self.created_at: float = header["created_at"]
+        self._columns = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(c["dtype"]), count=c["count"], offset=data_start + c["offset"])
+            for name, c in header["columns"].items()
+        }
+        self._clubs = self._strings("club")
+        self._nations = self._strings("nation")
+
+    def _strings(self, prefix: str) -> List[str]:
+        offsets = self._columns[f"{prefix}_offsets"]
+        blob = self._columns[f"{prefix}_blob"]
+        return [blob[offsets[i]:offsets[i + 1]].tobytes().decode() for i in range(len(offsets) - 1)]
+
+    def _athlete_id(self, row: int) -> str:
+        offsets = self._columns["id_offsets"]
+        return self._columns["id_blob"][offsets[row]:offsets[row + 1]].tobytes().decode()
+
+    def rows(self, athlete_ids: List[str]) -> np.ndarray:
+        """Row index per id (-1 when absent), found by binary search over id hashes."""
+        hashes = np.array([id_hash(aid) for aid in athlete_ids], dtype=np.uint64)
+        id_hashes = self._columns["id_hash"]
+        rows = np.searchsorted(id_hashes, hashes)
+        result = np.full(len(athlete_ids), -1, dtype=np.int64)
+        for i, (aid, row) in enumerate(zip(athlete_ids, rows)):
+            # Walk the (almost always single) run of equal hashes
+            while row < self.count and id_hashes[row] == hashes[i]:
+                if self._athlete_id(row) == aid:
+                    result[i] = row
+                    break
+                row += 1
+        return result
+
+    def record(self, row: int) -> Dict[str, Any]:
+        club = int(self._columns["club"][row])
+        nation = int(self._columns["nation"][row])
+        ranking = int(self._columns["ranking"][row])
+        meta_offsets = self._columns["meta_offsets"]
+        meta = self._columns["meta_blob"][meta_offsets[row]:meta_offsets[row + 1]].tobytes()
+        return {
+            "club_id": self._clubs[club] if club >= 0 else None,
+            "nation_code": self._nations[nation] if nation >= 0 else None,
+            "ranking_points": None if ranking == NULL_RANKING else ranking,
+            "meta": json.loads(meta) if meta else None,
+        }
+
+    def resolve(self, participants: List[Participant]) -> List[Participant]:
+        """Fill fields each participant did not set from the registry."""
+        pending = [i for i, p in enumerate(participants) if not set(REGISTRY_FIELDS) <= p.model_fields_set]
+        if not pending:
+            return participants
+        rows = self.rows([participants[i].athlete_id for i in pending])
+        resolved = list(participants)
+        for i, row in zip(pending, rows):
+            if row < 0:
+                continue
+            p = participants[i]
+            record = self.record(int(row))
+            resolved[i] = p.model_copy(update={k: v for k, v in record.items() if k not in p.model_fields_set})
+        return resolved
+
+    def status(self) -> Dict[str, Any]:
+        return {"path": self.path, "athletes": self.count, "created_at": self.created_at}
+
+
+class RegistryHolder:
+    """Current snapshot for a path, swapped in when the file on disk changes.
+
+    ``error`` describes the last file that failed to load (None once a load
+    succeeds); requests keep using the previous snapshot meanwhile.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.error: Optional[str] = None
+        self._registry: Optional[AthleteRegistry] = None
+        self._failed: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+
+    def reload(self) -> Optional[AthleteRegistry]:
+        """Open the file at ``path`` now and make it current.
+
+        Raises ``ValueError`` if it is not a readable snapshot; the previous
+        snapshot stays current.
+        """
+        with self._lock:
+            if self.path and os.path.exists(self.path):
+                try:
+                    self._registry = AthleteRegistry(self.path)
+                except Exception as e:
+                    self._failed = _signature(self.path)
+                    self.error = str(e) or type(e).__name__
+                    logger.error("Registry snapshot %s failed to load, keeping the previous one: %s", self.path, self.error)
+                    raise ValueError(self.error) from e
+                self.error = self._failed = None
+            return self._registry
+
+    def get(self) -> Optional[AthleteRegistry]:
+        """Current snapshot, reloading first if the file was replaced."""
+        if not self.path:
+            return None
+        current = self._registry
+        signature = _signature(self.path)
+        if signature is None or signature == self._failed:
+            return current
+        if current is None or current.signature != signature:
+            try:
+                return self.reload()
+            except ValueError:
+                return current
+        return current
+
+
+def _signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
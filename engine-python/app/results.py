@@ -0,0 +1,231 @@
+"""Live results: apply match results to a locked bracket as they arrive.
+
+``LiveBracket`` indexes a generated bracket once: every match gets the match
+(and side) its winner moves to via ``next_match_id`` and its loser moves to
+via ``loser_next_match_id`` (repechage or losers bracket). Applying a result is then a dict
+lookup plus at most two placements; only the matches that changed are
+returned, so callers can publish deltas instead of the whole bracket.
+
+Byes resolve on their own: a match that can only ever get one athlete is a
+walkover and that athlete moves on without a result.
+
+Every applied result is appended to a JSONL log. Replaying the log on a fresh
+``LiveBracket`` (``LiveBracket.replay``) rebuilds the exact state, which is
+how ``LiveStore`` recovers brackets after a restart.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import re
+import tempfile
+import threading
+
+from app.core import EngineError
+from app.models import GenerateBracketResponse, LiveMatch, MatchResult
+
+LIVE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+RED, WHITE = 0, 1
+
+
+class LiveBracket:
+    """Results state for one bracket; safe to share between threads."""
+
+    def __init__(self, bracket: GenerateBracketResponse, log_path: Optional[str] = None, fsync: bool = False):
+        self.bracket = bracket
+        self.matches: Dict[str, LiveMatch] = {}
+        for m in bracket.matches:
+            self.matches[m.id] = LiveMatch(
+                id=m.id, match_type=m.match_type, round=m.round, position=m.position,
+                athlete_red=m.athlete_red, athlete_white=m.athlete_white,
+            )
+        for m in bracket.repechage_matches:
+            self.matches[m.id] = LiveMatch(id=m.id, match_type=m.match_type, round=m.round, position=m.position)
+
+        # Feeders of each match, winners first, in bracket order: first feeder fights red
+        feeders: Dict[str, List[Tuple[int, int, int, str, str]]] = {}
+        routed = set()
+        for m in list(bracket.matches) + list(bracket.repechage_matches):
+            if m.next_match_id in self.matches:
+                feeders.setdefault(m.next_match_id, []).append((0, m.round, m.position, m.id, "winner"))
+            loser_next = getattr(m, "loser_next_match_id", None)
+            if loser_next in self.matches:
+                feeders.setdefault(loser_next, []).append((1, m.round, m.position, m.id, "loser"))
+                routed.add(m.id)
+        # Brackets drawn before loser routing only name the source on the repechage side
+        for m in bracket.repechage_matches:
+            if m.source_loser_match_id in self.matches and m.source_loser_match_id not in routed:
+                feeders.setdefault(m.id, []).append((1, 0, 0, m.source_loser_match_id, "loser"))
+        self._winner_to: Dict[str, Tuple[str, int]] = {}
+        self._loser_to: Dict[str, Tuple[str, int]] = {}
+        self._waiting: Dict[str, int] = {}
+        for target, sources in feeders.items():
+            sources.sort()
+            self._waiting[target] = len(sources)
+            for side, (_, _, _, source, kind) in enumerate(sources[:2]):
+                (self._winner_to if kind == "winner" else self._loser_to)[source] = (target, side)
+
+        self._lock = threading.Lock()
+        self.applied = 0
+        self._fsync = fsync
+        self._log = None
+        changed: Dict[str, LiveMatch] = {}
+        for match_id in [mid for mid in self.matches if self._waiting.get(mid, 0) == 0]:
+            self._resolve(self.matches[match_id], changed)
+        if log_path:
+            self._log = open(log_path, "a", encoding="utf-8")
+
+    @classmethod
+    def replay(cls, bracket: GenerateBracketResponse, log_path: str, fsync: bool = False) -> "LiveBracket":
+        """Rebuild state from ``log_path`` and keep appending to it."""
+        live = cls(bracket)
+        if os.path.exists(log_path):
+            with open(log_path, "rb+") as f:
+                good = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn final line from a crash mid-write
+                    live._apply(MatchResult(**json.loads(line)), {})
+                    good += len(line)
+                f.truncate(good)
+        live._fsync = fsync
+        live._log = open(log_path, "a", encoding="utf-8")
+        return live
+
+    def _resolve(self, match: LiveMatch, changed: Dict[str, LiveMatch]):
+        """All inputs of ``match`` are in: make it ready, or walk it over."""
+        athletes = [a for a in (match.athlete_red, match.athlete_white) if a]
+        changed[match.id] = match
+        if len(athletes) == 2:
+            match.status = "ready"
+            return
+        match.status = "walkover"
+        match.winner = athletes[0] if athletes else None
+        self._advance(match, match.winner, None, changed)
+
+    def _deliver(self, route: Optional[Tuple[str, int]], athlete: Optional[str], changed: Dict[str, LiveMatch]):
+        if route is None:
+            return
+        target = self.matches[route[0]]
+        if athlete:
+            if route[1] == RED:
+                target.athlete_red = athlete
+            else:
+                target.athlete_white = athlete
+            changed[target.id] = target
+        self._waiting[target.id] -= 1
+        if self._waiting[target.id] == 0:
+            self._resolve(target, changed)
+
+    def _advance(self, match: LiveMatch, winner: Optional[str], loser: Optional[str], changed: Dict[str, LiveMatch]):
+        self._deliver(self._winner_to.get(match.id), winner, changed)
+        self._deliver(self._loser_to.get(match.id), loser, changed)
+
+    def _apply(self, result: MatchResult, changed: Dict[str, LiveMatch]) -> bool:
+        match = self.matches.get(result.match_id)
+        if match is None:
+            raise EngineError("UNKNOWN_MATCH", "Match is not in this bracket", {"match_id": result.match_id})
+        if match.status == "completed":
+            if match.winner == result.winner:
+                return False  # replayed result
+            raise EngineError(
+                "RESULT_ALREADY_RECORDED", "Match already has a different winner",
+                {"match_id": match.id, "winner": match.winner}, status_code=409,
+            )
+        if match.status != "ready":
+            raise EngineError("MATCH_NOT_READY", "Match does not have both athletes yet", {"match_id": match.id, "status": match.status}, status_code=409)
+        if result.winner not in (match.athlete_red, match.athlete_white):
+            raise EngineError("INVALID_WINNER", "Winner is not in this match", {"match_id": match.id, "winner": result.winner})
+
+        loser = match.athlete_white if result.winner == match.athlete_red else match.athlete_red
+        match.winner = result.winner
+        match.status = "completed"
+        changed[match.id] = match
+        self._advance(match, result.winner, loser, changed)
+        self.applied += 1
+        return True
+
+    def apply(self, results: Iterable[MatchResult]) -> List[LiveMatch]:
+        """Apply ``results`` in order and return the matches they changed.
+
+        Results are logged as they are applied, so on an error the earlier
+        ones in the batch stay recorded (``details.index`` says where it stopped).
+        """
+        changed: Dict[str, LiveMatch] = {}
+        with self._lock:
+            try:
+                for index, result in enumerate(results):
+                    try:
+                        if self._apply(result, changed) and self._log:
+                            self._log.write(result.model_dump_json() + "\n")
+                    except EngineError as e:
+                        e.details = {**(e.details or {}), "index": index}
+                        raise
+            finally:
+                if self._log:
+                    self._log.flush()
+                    if self._fsync:
+                        os.fsync(self._log.fileno())
+            return [m.model_copy() for m in changed.values()]
+
+    def snapshot(self) -> List[LiveMatch]:
+        with self._lock:
+            return [m.model_copy() for m in self.matches.values()]
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+
+class LiveStore:
+    """Live brackets by id; with a directory, brackets and logs survive restarts."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._brackets: Dict[str, LiveBracket] = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, live_id: str) -> Tuple[str, str]:
+        return (os.path.join(self.directory, f"{live_id}.bracket.json"),
+                os.path.join(self.directory, f"{live_id}.results.jsonl"))
+
+    def create(self, live_id: str, bracket: GenerateBracketResponse) -> LiveBracket:
+        """Start (or restart from scratch) live results for ``bracket``."""
+        if not LIVE_ID.match(live_id):
+            raise ValueError("Live bracket IDs are 1-64 letters, digits, '_', '-' or '.'")
+        with self._lock:
+            previous = self._brackets.pop(live_id, None)
+            if previous:
+                previous.close()
+            log_path = None
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                bracket_path, log_path = self._paths(live_id)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".live-")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(bracket.model_dump_json())
+                os.replace(tmp_path, bracket_path)
+                open(log_path, "w").close()
+            live = LiveBracket(bracket, log_path)
+            self._brackets[live_id] = live
+            return live
+
+    def get(self, live_id: str) -> Optional[LiveBracket]:
+        live = self._brackets.get(live_id)
+        if live is not None or not self.directory or not LIVE_ID.match(live_id):
+            return live
+        with self._lock:
+            if live_id in self._brackets:
+                return self._brackets[live_id]
+            bracket_path, log_path = self._paths(live_id)
+            if not os.path.exists(bracket_path):
+                return None
+            with open(bracket_path, encoding="utf-8") as f:
+                bracket = GenerateBracketResponse.model_validate_json(f.read())
+            live = LiveBracket.replay(bracket, log_path)
+            self._brackets[live_id] = live
+            return live
+
+
+live_brackets = LiveStore(os.environ.get("RESULTS_LOG_DIR"))
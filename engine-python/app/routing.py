@@ -0,0 +1,121 @@
+"""Loser-routing tables for repechage and double elimination.
+
+The routing of losers depends only on the bracket size, so each table is built
+once per size and cached. A table lists the extra matches (emitted as
+``repechage_matches``) and, by index, where every main-draw match sends its
+loser and every extra match sends its winner. ``run_draw`` turns a table into
+match ids with plain lookups.
+
+Indices are global: main-draw matches first, in generation order (round 1
+positions first, the final last), then the extra matches.
+
+``repechage`` (judo/IJF): losers of the quarter-finals 1+2 and 3+4 meet in two
+repechage matches; each winner meets the loser of the semi-final from the
+other half in a bronze match. With four entries the two semi-final losers
+meet in a single bronze match.
+
+``double_elim``: losers of the winners bracket (main draw) drop into a losers
+bracket whose rounds alternate between pairing survivors and taking the next
+main-draw round's losers (in reverse order, to delay rematches). The main-draw
+final winner meets the losers-bracket winner in a grand final.
+"""
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+
+NONE = -1
+
+
+class ExtraMatch(NamedTuple):
+    match_type: str
+    round: int
+    position: int
+
+
+class RoutingTable(NamedTuple):
+    extra: Tuple[ExtraMatch, ...]
+    # Per main-draw match: global index of its loser's next match
+    loser_next: Tuple[int, ...]
+    # Per extra match: global index of its winner's next match
+    extra_next: Tuple[int, ...]
+    # Main-draw matches whose winner leaves the main draw: (main index, global index)
+    main_next: Tuple[Tuple[int, int], ...]
+
+
+def extra_path(match_type: str, round_: int, position: int) -> str:
+    """``metadata.path`` of an extra match."""
+    if match_type == "grand_final":
+        return "GF"
+    prefix = "LB" if match_type == "losers" else "REP"
+    return f"{prefix}:R{round_}:M{position}"
+
+
+def main_index(size: int, round_: int, position: int) -> int:
+    """Index of main-draw match ``round_``/``position`` (both 1-based)."""
+    return size - (size >> (round_ - 1)) + position - 1
+
+
+def _table(extra: List[ExtraMatch], loser_next: List[int], extra_next: List[int], main_next=()) -> RoutingTable:
+    return RoutingTable(tuple(extra), tuple(loser_next), tuple(extra_next), tuple(main_next))
+
+
+@lru_cache(maxsize=None)
+def repechage(size: int) -> RoutingTable:
+    main = size - 1
+    loser_next = [NONE] * main
+    if size < 4:
+        return _table([], loser_next, [])
+    rounds = size.bit_length() - 1
+    if size == 4:
+        bronze = ExtraMatch("bronze", 1, 1)
+        loser_next[main_index(size, 1, 1)] = loser_next[main_index(size, 1, 2)] = main
+        return _table([bronze], loser_next, [NONE])
+
+    qf, sf = rounds - 2, rounds - 1
+    extra = [
+        ExtraMatch("repechage", 1, 1),
+        ExtraMatch("repechage", 1, 2),
+        ExtraMatch("bronze", 2, 1),
+        ExtraMatch("bronze", 2, 2),
+    ]
+    rep1, rep2, bronze1, bronze2 = range(main, main + 4)
+    for position, target in ((1, rep1), (2, rep1), (3, rep2), (4, rep2)):
+        loser_next[main_index(size, qf, position)] = target
+    # Semi-final losers cross over to the other half's bronze match
+    loser_next[main_index(size, sf, 1)] = bronze2
+    loser_next[main_index(size, sf, 2)] = bronze1
+    return _table(extra, loser_next, [bronze1, bronze2, NONE, NONE])
+
+
+@lru_cache(maxsize=None)
+def double_elim(size: int) -> RoutingTable:
+    main = size - 1
+    loser_next = [NONE] * main
+    if size < 4:
+        return _table([], loser_next, [])
+    rounds = size.bit_length() - 1
+    extra: List[ExtraMatch] = []
+    extra_next: List[int] = []
+    # first[r] = global index of losers-bracket round r match 1
+    first = {}
+    for r in range(1, rounds):
+        count = size >> (r + 1)
+        for lb_round in (2 * r - 1, 2 * r):
+            first[lb_round] = main + len(extra)
+            for p in range(1, count + 1):
+                extra.append(ExtraMatch("losers", lb_round, p))
+                extra_next.append(NONE)
+    grand_final = main + len(extra)
+    extra.append(ExtraMatch("grand_final", 2 * rounds - 1, 1))
+    extra_next.append(NONE)
+
+    for p in range(1, size // 2 + 1):
+        loser_next[main_index(size, 1, p)] = first[1] + (p - 1) // 2
+    for r in range(1, rounds):
+        count = size >> (r + 1)
+        for k in range(count):
+            # Odd round winners meet the next main-draw round's losers, in reverse
+            extra_next[first[2 * r - 1] + k - main] = first[2 * r] + k
+            loser_next[main_index(size, r + 1, count - k)] = first[2 * r] + k
+            last = 2 * r == 2 * rounds - 2
+            extra_next[first[2 * r] + k - main] = grand_final if last else first[2 * r + 1] + k // 2
+    return _table(extra, loser_next, extra_next, [(main - 1, grand_final)])
@@ -0,0 +1,196 @@
+"""Multi-mat scheduling for whole events.
+
+Takes the engine's brackets for every division and assigns each contested
+match a mat and a start time (minutes from the event start). A match can start
+once the matches feeding it (``next_match_id``, ``loser_next_match_id``) have
+ended and their athletes have had ``min_rest`` minutes; an athlete entered in
+several divisions also gets ``min_rest`` between their round-1 bouts.
+
+The scheduler is a non-idling list scheduler: whenever a mat frees up it takes
+the released match with the longest remaining chain to the end of its division
+(critical path first). Byes, and matches left without two athletes by byes, are
+walkovers: they take no mat time and pass their release time through.
+
+Incremental rescheduling: send the matches that already started or finished
+as ``fixed`` with their actual times and the current time as ``now``; only the
+remaining matches are placed again, no earlier than ``now``.
+"""
+from heapq import heappop, heappush
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.core import EngineError
+from app.models import MatchRef, ScheduledMatch, ScheduleEventRequest, ScheduleEventResponse
+
+MAX_MATS = 1000
+
+
+def _validate(request: ScheduleEventRequest):
+    if request.mats < 1 or request.mats > MAX_MATS:
+        raise EngineError("INVALID_MATS", f"Mats must be between 1 and {MAX_MATS}", {"mats": request.mats, "max": MAX_MATS})
+    durations = [request.match_duration] + [d.match_duration for d in request.divisions if d.match_duration is not None]
+    if min(durations) < 1 or request.min_rest < 0:
+        raise EngineError(
+            "INVALID_DURATION",
+            "Match durations must be positive and min_rest non-negative",
+            {"match_duration": min(durations), "min_rest": request.min_rest},
+        )
+    seen = set()
+    duplicates = sorted({d.division_id for d in request.divisions if d.division_id in seen or seen.add(d.division_id)})
+    if duplicates:
+        raise EngineError("DUPLICATE_DIVISION_IDS", "Division IDs must be unique", {"duplicates": duplicates})
+
+
+def schedule_event(request: Union[ScheduleEventRequest, Dict[str, Any]]) -> ScheduleEventResponse:
+    """Schedule every contested match of ``request.divisions`` onto ``request.mats`` mats."""
+    if not isinstance(request, ScheduleEventRequest):
+        request = ScheduleEventRequest.model_validate(request)
+    _validate(request)
+    rest = request.min_rest
+    base = request.start if request.now is None else max(request.start, request.now)
+
+    # Flatten every division's matches into one graph, indexed by node number
+    keys: List[Tuple[str, str]] = []
+    rounds: List[int] = []
+    duration: List[int] = []
+    athletes: List[List[str]] = []
+    winner_to: List[Optional[int]] = []
+    loser_to: List[Optional[int]] = []
+    index: Dict[Tuple[str, str], int] = {}
+    for division in request.divisions:
+        length = division.match_duration or request.match_duration
+        bracket = division.bracket
+        for m in bracket.matches:
+            index[(division.division_id, m.id)] = len(keys)
+            keys.append((division.division_id, m.id))
+            rounds.append(m.round)
+            duration.append(length)
+            athletes.append([a for a in (m.athlete_red, m.athlete_white) if a])
+        for m in bracket.repechage_matches:
+            index[(division.division_id, m.id)] = len(keys)
+            keys.append((division.division_id, m.id))
+            rounds.append(m.round)
+            duration.append(length)
+            athletes.append([])
+        division_matches = list(bracket.matches) + list(bracket.repechage_matches)
+        for m in division_matches:
+            winner_to.append(index.get((division.division_id, m.next_match_id)))
+            loser_to.append(index.get((division.division_id, getattr(m, "loser_next_match_id", None))))
+        # Brackets drawn before loser routing only name the source on the repechage side
+        for m in bracket.repechage_matches:
+            source = index.get((division.division_id, m.source_loser_match_id))
+            if source is not None and loser_to[source] is None:
+                loser_to[source] = index[(division.division_id, m.id)]
+
+    n = len(keys)
+    successors: List[List[int]] = [[s for s in (winner_to[i], loser_to[i]) if s is not None] for i in range(n)]
+    indegree = [0] * n
+    for succ in successors:
+        for s in succ:
+            indegree[s] += 1
+
+    order: List[int] = []
+    remaining = indegree[:]
+    stack = [i for i in range(n) if remaining[i] == 0]
+    while stack:
+        i = stack.pop()
+        order.append(i)
+        for s in successors[i]:
+            remaining[s] -= 1
+            if remaining[s] == 0:
+                stack.append(s)
+
+    # A match is contested when two athletes can reach it; a loser only exists if it was
+    inputs = [len(a) for a in athletes]
+    live = [False] * n
+    for i in order:
+        live[i] = inputs[i] >= 2
+        if winner_to[i] is not None and inputs[i] >= 1:
+            inputs[winner_to[i]] += 1
+        if loser_to[i] is not None and live[i]:
+            inputs[loser_to[i]] += 1
+
+    # Priority: remaining critical path (minutes) to the end of the division
+    tail = [0] * n
+    for i in reversed(order):
+        own, gap = (duration[i], rest) if live[i] else (0, 0)
+        tail[i] = own + max((gap + tail[s] for s in successors[i]), default=0)
+
+    fixed: Dict[int, ScheduledMatch] = {}
+    unknown = []
+    for f in request.fixed:
+        i = index.get((f.division_id, f.match_id))
+        if i is None or f.mat < 1 or f.mat > request.mats:
+            unknown.append(f"{f.division_id}/{f.match_id}")
+        else:
+            fixed[i] = f
+    if unknown:
+        raise EngineError("UNKNOWN_MATCHES", "Fixed matches must reference scheduled matches on existing mats", {"unknown": unknown})
+
+    mat_free = [base] * request.mats
+    athlete_free: Dict[str, int] = {}
+    for f in fixed.values():
+        mat_free[f.mat - 1] = max(mat_free[f.mat - 1], f.end)
+        for aid in athletes[index[(f.division_id, f.match_id)]]:
+            athlete_free[aid] = max(athlete_free.get(aid, base), f.end + rest)
+    mats = sorted((t, m) for m, t in enumerate(mat_free))
+
+    release = [base] * n
+    scheduled: List[ScheduledMatch] = []
+    walkovers: List[MatchRef] = []
+    pending: List[Tuple[int, int, int]] = []  # (release, -tail, node)
+    ready: List[Tuple[int, int]] = []  # (-tail, node)
+
+    def finish(i: int, available: int):
+        """Record that node ``i`` hands its athletes on at ``available``."""
+        for s in successors[i]:
+            release[s] = max(release[s], available)
+            indegree[s] -= 1
+            if indegree[s] == 0:
+                enqueue(s)
+
+    def enqueue(i: int):
+        if i in fixed:
+            f = fixed[i]
+            scheduled.append(f)
+            finish(i, f.end + rest)
+        elif not live[i]:
+            walkovers.append(MatchRef(division_id=keys[i][0], match_id=keys[i][1]))
+            finish(i, release[i])
+        else:
+            heappush(pending, (release[i], -tail[i], i))
+
+    for i in [i for i in range(n) if indegree[i] == 0]:
+        enqueue(i)
+
+    while pending or ready:
+        mat_time, mat = heappop(mats)
+        if not ready and pending[0][0] > mat_time:
+            # Idle until the next release; mats must come off the heap in time order
+            heappush(mats, (pending[0][0], mat))
+            continue
+        while pending and pending[0][0] <= mat_time:
+            _, priority, i = heappop(pending)
+            heappush(ready, (priority, i))
+        _, i = heappop(ready)
+        # Athletes seen in another division may still be resting
+        athlete_ready = max((athlete_free.get(aid, base) for aid in athletes[i]), default=base)
+        if athlete_ready > mat_time:
+            heappush(pending, (athlete_ready, -tail[i], i))
+            heappush(mats, (mat_time, mat))
+            continue
+        end = mat_time + duration[i]
+        for aid in athletes[i]:
+            athlete_free[aid] = end + rest
+        scheduled.append(ScheduledMatch(
+            division_id=keys[i][0], match_id=keys[i][1], round=rounds[i], mat=mat + 1, start=mat_time, end=end,
+        ))
+        heappush(mats, (end, mat))
+        finish(i, end + rest)
+
+    scheduled.sort(key=lambda s: (s.start, s.mat))
+    return ScheduleEventResponse(
+        mats=request.mats,
+        makespan=max((s.end for s in scheduled), default=base),
+        matches=scheduled,
+        walkovers=walkovers,
+    )
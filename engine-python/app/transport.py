@@ -0,0 +1,97 @@
+"""MessagePack content negotiation.
+
+Requests sent as ``Content-Type: application/msgpack`` are unpacked straight
+into the Python objects FastAPI would get from ``json.loads`` and validated
+against the same models, so the schema is identical to the JSON API. Clients
+sending ``Accept: application/msgpack`` get the response packed the same way,
+error responses included.
+"""
+from typing import Any, Callable, Optional, Union
+import json
+
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.requests import Request
+import msgpack
+
+from app.models import ErrorDetail, ErrorResponse
+
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+def is_msgpack(content_type: str) -> bool:
+    return content_type.split(";")[0].strip().lower() in MSGPACK_TYPES
+
+
+def accepts_msgpack(request: Request) -> bool:
+    return any(is_msgpack(part) for part in request.headers.get("accept", "").split(","))
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def negotiate(request: Request, content: Union[BaseModel, dict], status_code: int = 200, headers: Optional[dict] = None):
+    """Return ``content`` (a model or plain dict) packed as msgpack if the client asked for it."""
+    if accepts_msgpack(request):
+        content = content.model_dump() if isinstance(content, BaseModel) else content
+        return MsgpackResponse(content, status_code=status_code, headers=headers)
+    if isinstance(content, BaseModel) and status_code == 200 and not headers:
+        return content
+    content = content.model_dump() if isinstance(content, BaseModel) else content
+    return JSONResponse(content, status_code=status_code, headers=headers)
+
+
+class UnpackedRequest(Request):
+    """Request whose body was sent as msgpack, served to FastAPI as parsed JSON."""
+
+    def __init__(self, request: Request, body: bytes, decoded: Any):
+        headers = [(k, v) for k, v in request.scope["headers"] if k != b"content-type"]
+        scope = {**request.scope, "headers": headers + [(b"content-type", b"application/json")]}
+        super().__init__(scope, request.receive)
+        self._unpacked_body = body
+        self._decoded = decoded
+
+    async def body(self) -> bytes:
+        return self._unpacked_body
+
+    async def json(self) -> Any:
+        return self._decoded
+
+
+def _negotiate_response(request: Request, response: Response) -> Response:
+    # Responses built as JSON (errors, 401s) are repacked for msgpack clients
+    if not isinstance(response, JSONResponse) or not accepts_msgpack(request):
+        return response
+    headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    return negotiate(request, json.loads(response.body), response.status_code, headers)
+
+
+class MsgpackRoute(APIRoute):
+    """Route that accepts msgpack request bodies alongside JSON."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if not is_msgpack(request.headers.get("content-type", "")):
+                return _negotiate_response(request, await handler(request))
+            body = await request.body()
+            try:
+                decoded = msgpack.unpackb(body, raw=False)
+            except (ValueError, msgpack.UnpackException) as e:
+                return negotiate(
+                    request,
+                    ErrorResponse(
+                        error=ErrorDetail(code="INVALID_MSGPACK", message="Request body is not valid msgpack", details={"error": str(e)})
+                    ),
+                    status_code=400,
+                )
+            return _negotiate_response(request, await handler(UnpackedRequest(request, body, decoded)))
+
+        return route_handler
@@ -0,0 +1,165 @@
+"""Warm-up phase and readiness for new engine workers.
+
+A fresh worker answers ``/health`` as soon as it listens, but its first
+requests are slow: FastAPI builds the OpenAPI schema on first use, and the
+first draw of each kind pays for validator and serializer setup, NumPy code
+paths and the cached routing tables. ``warm_up`` pays those costs in the
+background right after startup:
+
+- fills the repechage and double-elimination routing tables for every
+  bracket size
+- sends ``WARMUP_REQUESTS`` through the app in-process, with the request id
+  ``WARMUP_REQUEST_ID`` (traffic capture skips them)
+- builds the OpenAPI schema
+
+``/ready`` answers 503 until ``Readiness`` is marked ready, so a load
+balancer only routes to warm workers. ``ENGINE_WARMUP=0`` skips the phase
+(the worker is ready at once).
+"""
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from app import routing
+
+logger = logging.getLogger(__name__)
+
+# Bracket sizes whose routing tables are built ahead of time
+SIZES = [1 << k for k in range(2, 9)]
+WARMUP_REQUEST_ID = "warmup"
+HEADERS = [
+    (b"authorization", b"Bearer test"),
+    (b"content-type", b"application/json"),
+    (b"x-request-id", WARMUP_REQUEST_ID.encode()),
+]
+
+
+def _participants(n: int) -> List[dict]:
+    return [
+        {"athlete_id": f"warmup_{i}", "club_id": f"club_{i % 5}", "nation_code": ["ITA", "FRA", "JPN"][i % 3],
+         "ranking_points": None if i % 7 == 0 else 1000 - i}
+        for i in range(n)
+    ]
+
+
+def _generate(n: int, format: str, **context) -> dict:
+    return {
+        "context": {"sport": "judo", "format": format, "draw_seed": f"warmup-{format}-{n}", **context},
+        "rules": {"seeding_mode": "auto", "max_seeds": 8, "separate_by": ["club", "nation"]},
+        "participants": _participants(n),
+        "history": {"recent_pairs": [{"a": "warmup_1", "b": "warmup_2", "date": "2025-01-01"}]},
+    }
+
+
+# (path, body) pairs covering every draw format; evaluate and schedule requests
+# are built from the first response (see _follow_ups)
+WARMUP_REQUESTS: List[Tuple[str, dict]] = [
+    ("/v1/brackets/generate", _generate(8, "single_elim", repechage=True)),
+    ("/v1/brackets/generate", _generate(40, "single_elim", repechage=True)),
+    ("/v1/brackets/generate", _generate(12, "double_elim")),
+    ("/v1/brackets/generate", _generate(5, "round_robin")),
+    ("/v1/brackets/generate", _generate(12, "pools", pools=3)),
+]
+
+
+def _follow_ups(request: dict, response: dict) -> List[Tuple[str, dict]]:
+    return [
+        ("/v1/brackets/evaluate", {"brackets": [
+            {"participants": request["participants"], "participants_slots": response["participants_slots"]},
+        ]}),
+        ("/v1/events/schedule", {"mats": 2, "divisions": [{"division_id": "warmup", "bracket": response}]}),
+    ]
+
+
+class Readiness:
+    """Whether this worker has finished warming up, with what it took."""
+
+    def __init__(self):
+        self.state = "starting"
+        self.warmup_ms: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def to_dict(self) -> dict:
+        data = {"status": self.state}
+        if self.warmup_ms is not None:
+            data["warmup_ms"] = round(self.warmup_ms, 1)
+            data["steps"] = {k: round(v, 1) for k, v in self.steps.items()}
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+async def _call(asgi_app, path: str, body: dict) -> Tuple[int, bytes]:
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": HEADERS + [(b"content-length", str(len(payload)).encode())],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 0),
+    }
+    sent = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.Future()  # never disconnect
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await asgi_app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def warm_up(app, readiness: Readiness, requests: List[Tuple[str, dict]] = WARMUP_REQUESTS):
+    """Run the warm-up steps and mark ``readiness`` ready (or failed)."""
+    readiness.state = "warming"
+    loop = asyncio.get_running_loop()
+    start = last = time.perf_counter()
+
+    def lap(step: str):
+        nonlocal last
+        now = time.perf_counter()
+        readiness.steps[step] = (now - last) * 1000
+        last = now
+
+    try:
+        for size in SIZES:
+            routing.repechage(size)
+            routing.double_elim(size)
+        lap("routing_tables")
+        pending = list(requests)
+        first = True
+        while pending:
+            path, body = pending.pop(0)
+            status, content = await _call(app, path, body)
+            if status != 200:
+                raise RuntimeError(f"{path} answered {status}: {content[:200].decode(errors='replace')}")
+            if first:
+                pending += _follow_ups(body, json.loads(content))
+                first = False
+        lap("requests")
+        await loop.run_in_executor(None, app.openapi)
+        lap("openapi")
+    except Exception as e:
+        readiness.state = "failed"
+        readiness.error = str(e)
+        logger.error(f"Warm-up failed: {e}", extra={"correlation_id": "warmup"})
+        return
+    readiness.warmup_ms = (time.perf_counter() - start) * 1000
+    readiness.state = "ready"
@@ -0,0 +1,98 @@
+"""Round-robin and pool draw generation and serialization time.
+
+Usage:
+    python -m benchmarks.bench_pools [--athletes 16 64 128] [--repeat 5] [--json out.json]
+
+For each size, a round-robin draw (one pool) and a pools-to-knockout draw
+(pools of five, two qualifiers) are timed in four steps: pool allocation
+(``generate_pools``, validation included), generating every fixture, the
+streamed JSON body (``iter_json``) and, for comparison, materializing the
+whole response model and dumping it. ``first_chunk`` is the time to the first
+streamed chunk, which is what a client waits for before bytes start arriving.
+"""
+from typing import List, Optional
+import argparse
+import json
+import random
+import sys
+import time
+
+from app.core import generate_pools
+
+
+def build_request(athletes: int, fmt: str, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {
+        "context": {"sport": "kata", "format": fmt, "draw_seed": f"bench-{athletes}"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 8},
+        "participants": [
+            {"athlete_id": f"a{i}", "club_id": f"club_{rng.randrange(12)}", "ranking_points": rng.randrange(1000)}
+            for i in range(athletes)
+        ],
+    }
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes: List[int], repeat: int) -> List[dict]:
+    rows = []
+    for athletes in sizes:
+        for fmt in ("round_robin", "pools"):
+            request = build_request(athletes, fmt)
+            draw = generate_pools(request)
+            body = b"".join(draw.iter_json())
+            rows.append({
+                "format": fmt,
+                "athletes": athletes,
+                "pools": draw.summary.pools,
+                "fixtures": draw.summary.fixtures,
+                "bytes": len(body),
+                "draw_ms": _best_ms(lambda: generate_pools(request), repeat),
+                "fixtures_ms": _best_ms(lambda: sum(1 for _ in draw.fixtures()), repeat),
+                "first_chunk_ms": _best_ms(lambda: next(draw.iter_json()), repeat),
+                "stream_ms": _best_ms(lambda: b"".join(draw.iter_json()), repeat),
+                "materialized_ms": _best_ms(lambda: draw.to_response().model_dump_json(), repeat),
+            })
+    return rows
+
+
+def format_table(rows: List[dict]) -> str:
+    header = (
+        f"{'format':>11} {'athl':>5} {'pools':>5} {'fixtures':>8} {'KB':>7} {'draw':>7} "
+        f"{'fixtures':>9} {'1st chunk':>9} {'stream':>8} {'materialized':>12}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['format']:>11} {r['athletes']:>5} {r['pools']:>5} {r['fixtures']:>8} {r['bytes'] / 1024:>7.1f} "
+            f"{r['draw_ms']:>7.2f} {r['fixtures_ms']:>9.2f} {r['first_chunk_ms']:>9.2f} {r['stream_ms']:>8.2f} "
+            f"{r['materialized_ms']:>12.2f}"
+        )
+    lines.append("(times in milliseconds, best of --repeat)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Round-robin / pool draw benchmark")
+    parser.add_argument("--athletes", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args.athletes, args.repeat)
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Event scheduling time on synthetic events.
+
+Usage:
+    python -m benchmarks.bench_schedule [--matches 1000 5000 20000] [--mats 8] [--repeat 5] [--json out.json]
+
+Each event is built from real engine brackets: divisions of 5-64 athletes
+(some sharing athletes across divisions) until the event has at least the
+requested number of matches. Measures a full schedule from the validated
+request, a full schedule including request validation, and an incremental
+reschedule with the first half of the schedule fixed.
+"""
+from typing import List, Optional
+import argparse
+import json
+import random
+import sys
+import time
+
+from app.core import generate
+from app.models import ScheduleEventRequest
+from app.schedule import schedule_event
+
+
+def build_event(matches: int, mats: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    divisions = []
+    total = 0
+    while total < matches:
+        d = len(divisions)
+        n = rng.randint(5, 64)
+        participants = [
+            # About one athlete in twenty also enters the previous division
+            {"athlete_id": f"d{d - 1}-a{i}" if d and rng.random() < 0.05 else f"d{d}-a{i}", "club_id": f"club_{rng.randrange(12)}"}
+            for i in range(n)
+        ]
+        unique = list({p["athlete_id"]: p for p in participants}.values())
+        if len(unique) < 4:
+            continue
+        bracket = generate({
+            "context": {"sport": "judo", "format": "single_elim", "repechage": rng.random() < 0.5, "draw_seed": f"bench-{d}"},
+            "rules": {"seeding_mode": "off"},
+            "participants": unique,
+        })
+        divisions.append({"division_id": f"div-{d}", "bracket": bracket.model_dump(), "match_duration": rng.choice([4, 5, 6])})
+        total += len(bracket.matches) + len(bracket.repechage_matches)
+    return {"divisions": divisions, "mats": mats, "min_rest": 10}
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes: List[int], mats: int, repeat: int) -> List[dict]:
+    rows = []
+    for matches in sizes:
+        event = build_event(matches, mats)
+        request = ScheduleEventRequest.model_validate(event)
+        result = schedule_event(request)
+        now = result.makespan // 2
+        fixed = [m.model_dump() for m in result.matches if m.start < now]
+        incremental = ScheduleEventRequest.model_validate({**event, "now": now, "fixed": fixed})
+        rows.append({
+            "divisions": len(event["divisions"]),
+            "matches": sum(len(d["bracket"]["matches"]) + len(d["bracket"]["repechage_matches"]) for d in event["divisions"]),
+            "scheduled": len(result.matches),
+            "walkovers": len(result.walkovers),
+            "mats": mats,
+            "makespan_min": result.makespan,
+            "schedule_ms": _best_ms(lambda: schedule_event(request), repeat),
+            "validate_schedule_ms": _best_ms(lambda: schedule_event(event), repeat),
+            "reschedule_ms": _best_ms(lambda: schedule_event(incremental), repeat),
+        })
+    return rows
+
+
+def format_table(rows: List[dict]) -> str:
+    header = f"{'divs':>5} {'matches':>8} {'sched':>6} {'w/o':>5} {'mats':>5} {'makespan':>9} {'schedule':>9} {'+validate':>10} {'resched':>8}"
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['divisions']:>5} {r['matches']:>8} {r['scheduled']:>6} {r['walkovers']:>5} {r['mats']:>5} "
+            f"{r['makespan_min']:>9} {r['schedule_ms']:>9.1f} {r['validate_schedule_ms']:>10.1f} {r['reschedule_ms']:>8.1f}"
+        )
+    lines.append("(makespan in minutes, times in milliseconds, best of --repeat)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Event scheduling benchmark")
+    parser.add_argument("--matches", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--mats", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args.matches, args.mats, args.repeat)
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Per-stage timing of in-process bracket generation.
+
+Usage:
+    python -m benchmarks.bench_stages [--sizes 4 8 16 32 64 128 256] [--distributions uniform seed_payload ...]
+                                      [--repeat 5] [--json baselines/stages.json]
+    python -m benchmarks.compare baselines/stages.json new.json
+
+Runs ``run_draw`` with an ``app.instrument.Probe`` and reports the time spent
+in each stage (seeding, greedy placement, swap optimizer, match
+construction, quality scoring, hashing) plus JSON and columnar serialization
+of the result, best of ``--repeat`` per stage. ``run_draw`` is called
+directly, skipping request validation, so ``--sizes`` may go beyond the API
+limit of 256.
+
+Participant distributions (``DISTRIBUTIONS``):
+
+- ``uniform``: one club per six athletes, four nations, distinct rankings
+- ``seed_payload``: the ``scripts/seed_payload.py`` mix: eight clubs from big
+  to small, 10% without club, 15% without ranking, one nation
+- ``one_club``: every athlete in the same club and nation
+- ``two_nations``: every athlete in their own club, two nations
+"""
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import random
+import sys
+
+from app.columnar import to_columnar
+from app.draw import run_draw
+from app.instrument import DRAW_STAGES, Probe
+from app.models import GenerateBracketRequest
+
+
+def _uniform(n: int, rng: random.Random) -> List[dict]:
+    clubs = max(2, n // 6)
+    return [
+        {"athlete_id": f"athlete_{i:05d}", "club_id": f"club_{i % clubs}", "nation_code": ["ITA", "FRA", "ESP", "GER"][i % 4],
+         "ranking_points": (i * 7919) % 3000}
+        for i in range(n)
+    ]
+
+
+def _seed_payload(n: int, rng: random.Random) -> List[dict]:
+    club_ids = [f"club_{i}" for i in range(8)]
+    weights = [8 - i for i in range(8)]
+    participants = []
+    for i in range(n):
+        club = rng.choices(club_ids, weights=weights, k=1)[0]
+        if rng.random() < 0.1:
+            club = None
+        ranking = rng.randint(1, 3000)
+        if rng.random() < 0.15:
+            ranking = None
+        participants.append({"athlete_id": f"athlete_{i}", "club_id": club, "nation_code": "ITA", "ranking_points": ranking})
+    return participants
+
+
+def _one_club(n: int, rng: random.Random) -> List[dict]:
+    return [{"athlete_id": f"athlete_{i}", "club_id": "club_0", "nation_code": "ITA", "ranking_points": rng.randint(1, 3000)} for i in range(n)]
+
+
+def _two_nations(n: int, rng: random.Random) -> List[dict]:
+    return [{"athlete_id": f"athlete_{i}", "club_id": f"club_{i}", "nation_code": ["ITA", "FRA"][i % 2], "ranking_points": rng.randint(1, 3000)} for i in range(n)]
+
+
+DISTRIBUTIONS: Dict[str, Callable[[int, random.Random], List[dict]]] = {
+    "uniform": _uniform,
+    "seed_payload": _seed_payload,
+    "one_club": _one_club,
+    "two_nations": _two_nations,
+}
+
+
+def build_request(n: int, distribution: str) -> GenerateBracketRequest:
+    return GenerateBracketRequest.model_validate({
+        "context": {"sport": "judo", "format": "single_elim", "repechage": True, "draw_seed": f"stages_{distribution}_{n}"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 8, "separate_by": ["club", "nation"]},
+        "participants": DISTRIBUTIONS[distribution](n, random.Random(n)),
+    })
+
+
+def run(sizes: List[int], distributions: List[str], repeat: int) -> List[dict]:
+    rows = []
+    for distribution in distributions:
+        for n in sizes:
+            request = build_request(n, distribution)
+            best = {stage: float("inf") for stage in DRAW_STAGES}
+            best["total"] = best["json"] = best["columnar"] = float("inf")
+            for _ in range(repeat):
+                probe = Probe()
+                result = run_draw(request, probe)
+                for stage, seconds in probe.timings.items():
+                    best[stage] = min(best[stage], seconds)
+                best["total"] = min(best["total"], sum(probe.timings.values()))
+                probe.start()
+                result.model_dump_json()
+                probe.lap("json")
+                json.dumps(to_columnar(result))
+                probe.lap("columnar")
+                best["json"] = min(best["json"], probe.timings["json"])
+                best["columnar"] = min(best["columnar"], probe.timings["columnar"])
+            rows.append({
+                "distribution": distribution,
+                "participants": n,
+                **{f"{stage}_ms": seconds * 1000 for stage, seconds in best.items()},
+            })
+    return rows
+
+
+def format_table(rows: List[dict]) -> str:
+    columns = [*DRAW_STAGES, "total", "json", "columnar"]
+    header = f"{'distribution':>13} {'athl':>5} " + " ".join(f"{c:>9}" for c in columns)
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(f"{r['distribution']:>13} {r['participants']:>5} " + " ".join(f"{r[c + '_ms']:>9.3f}" for c in columns))
+    lines.append("(milliseconds, best of --repeat; total is the draw without serialization)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-stage draw benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16, 32, 64, 128, 256])
+    parser.add_argument("--distributions", nargs="+", choices=sorted(DISTRIBUTIONS), default=list(DISTRIBUTIONS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results as JSON (a baseline for benchmarks.compare)")
+    args = parser.parse_args(argv)
+
+    rows = run(args.sizes, args.distributions, args.repeat)
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Cold start of an engine worker: time to first request and first-request latency.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 3] [--modes warm cold] [--json startup.json]
+
+Each run starts ``uvicorn app.main:app`` (one worker) and measures, from
+process start:
+
+- ``listen_ms``: the port accepts connections
+- ``health_ms``: ``/health`` answers 200
+- ``ready_ms``: ``/ready`` answers 200 (warm-up done, see ``app.warmup``)
+
+then the latency of the first generate request sent after ``/ready``
+(``first_request_ms``) against the median of the following ones
+(``steady_ms``), each with a fresh payload. Mode ``warm`` is the default
+engine; ``cold`` sets ``ENGINE_WARMUP=0``, so the first request pays for
+everything the warm-up would have done.
+"""
+from typing import List, Optional
+from statistics import median
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.load import HEADERS, PATH, HttpConnection, Scenario, build_payload, spawn_engine
+
+MODES = {"warm": {}, "cold": {"ENGINE_WARMUP": "0"}}
+SCENARIO = Scenario("startup", 32, clubs=10, club_skew=1.0, history=20)
+
+
+async def _measure(url: str, started: float, steady: int) -> dict:
+    parts = urlsplit(url)
+    connection = HttpConnection(parts.hostname, parts.port)
+    try:
+        row = {"listen_ms": (time.perf_counter() - started) * 1000}
+        for key, path in (("health_ms", "/health"), ("ready_ms", "/ready")):
+            while (await connection.request("GET", path))[0] != 200:
+                await asyncio.sleep(0.005)
+            row[key] = (time.perf_counter() - started) * 1000
+        latencies = []
+        for variant in range(steady + 1):
+            body = json.dumps(build_payload(SCENARIO, variant)).encode()
+            start = time.perf_counter()
+            status, _ = await connection.request("POST", PATH, body, HEADERS)
+            if status != 200:
+                raise RuntimeError(f"generate answered {status}")
+            latencies.append((time.perf_counter() - start) * 1000)
+        row["first_request_ms"] = latencies[0]
+        row["steady_ms"] = median(latencies[1:])
+        return row
+    finally:
+        await connection.close()
+
+
+def run(runs: int, modes: List[str], steady: int) -> List[dict]:
+    rows = []
+    for mode in modes:
+        for i in range(runs):
+            started = time.perf_counter()
+            with spawn_engine(env=MODES[mode]) as engine:
+                rows.append({"mode": mode, "run": i, **asyncio.run(_measure(engine.url, started, steady))})
+    return rows
+
+
+def format_table(rows: List[dict]) -> str:
+    columns = ["listen_ms", "health_ms", "ready_ms", "first_request_ms", "steady_ms"]
+    header = f"{'mode':>5} {'runs':>5} " + " ".join(f"{c[:-3]:>14}" for c in columns)
+    lines = [header, "-" * len(header)]
+    for mode in dict.fromkeys(r["mode"] for r in rows):
+        subset = [r for r in rows if r["mode"] == mode]
+        lines.append(f"{mode:>5} {len(subset):>5} " + " ".join(f"{median(r[c] for r in subset):>14.1f}" for c in columns))
+    lines.append("(milliseconds, median of runs; listen/health/ready from process start)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Engine cold start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--steady", type=int, default=20, help="Requests after the first one")
+    parser.add_argument("--json", help="Write results as JSON (a baseline for benchmarks.compare)")
+    args = parser.parse_args(argv)
+
+    rows = run(args.runs, args.modes, args.steady)
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
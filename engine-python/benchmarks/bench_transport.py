@@ -0,0 +1,97 @@
+"""JSON vs MessagePack payload size and encode/decode time.
+
+Usage:
+    python -m benchmarks.bench_transport [--sizes 16 64 256] [--repeat 200] [--json out.json]
+
+For each bracket size, measures the generate request and response as bytes on
+the wire, encode and decode time, and decode + model validation time (what the
+engine does on every request).
+"""
+from typing import Callable, List, Optional
+import argparse
+import json
+import sys
+import timeit
+
+import msgpack
+
+from app.core import generate
+from app.models import GenerateBracketRequest, GenerateBracketResponse
+
+
+def build_request(n: int) -> dict:
+    clubs = max(2, n // 6)
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": True, "draw_seed": f"bench_{n}"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 8, "separate_by": ["club"]},
+        "participants": [
+            {"athlete_id": f"athlete_{i:05d}", "club_id": f"club_{i % clubs}", "nation_code": ["ITA", "FRA", "ESP", "GER"][i % 4],
+             "ranking_points": (i * 7919) % 3000, "seed": None, "meta": {"belt": "black"}}
+            for i in range(n)
+        ],
+        "history": {"recent_pairs": []},
+    }
+
+
+def _per_call_us(fn: Callable, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat * 1e6
+
+
+def bench_payload(label: str, n: int, data: dict, model, repeat: int) -> dict:
+    as_json = json.dumps(data).encode()
+    as_msgpack = msgpack.packb(data, use_bin_type=True)
+    return {
+        "payload": label,
+        "participants": n,
+        "json_bytes": len(as_json),
+        "msgpack_bytes": len(as_msgpack),
+        "json_encode_us": _per_call_us(lambda: json.dumps(data).encode(), repeat),
+        "msgpack_encode_us": _per_call_us(lambda: msgpack.packb(data, use_bin_type=True), repeat),
+        "json_decode_us": _per_call_us(lambda: json.loads(as_json), repeat),
+        "msgpack_decode_us": _per_call_us(lambda: msgpack.unpackb(as_msgpack, raw=False), repeat),
+        "json_decode_validate_us": _per_call_us(lambda: model.model_validate_json(as_json), repeat),
+        "msgpack_decode_validate_us": _per_call_us(lambda: model.model_validate(msgpack.unpackb(as_msgpack, raw=False)), repeat),
+    }
+
+
+def run(sizes: List[int], repeat: int) -> List[dict]:
+    rows = []
+    for n in sizes:
+        request = build_request(n)
+        response = generate(request).model_dump()
+        rows.append(bench_payload("request", n, request, GenerateBracketRequest, repeat))
+        rows.append(bench_payload("response", n, response, GenerateBracketResponse, repeat))
+    return rows
+
+
+def format_table(rows: List[dict]) -> str:
+    header = f"{'payload':<9} {'n':>4} {'json B':>8} {'mp B':>8} {'ratio':>6} {'enc json':>9} {'enc mp':>8} {'dec json':>9} {'dec mp':>8} {'dec+val json':>13} {'dec+val mp':>11}"
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['payload']:<9} {r['participants']:>4} {r['json_bytes']:>8} {r['msgpack_bytes']:>8} "
+            f"{r['msgpack_bytes'] / r['json_bytes']:>6.2f} {r['json_encode_us']:>9.1f} {r['msgpack_encode_us']:>8.1f} "
+            f"{r['json_decode_us']:>9.1f} {r['msgpack_decode_us']:>8.1f} "
+            f"{r['json_decode_validate_us']:>13.1f} {r['msgpack_decode_validate_us']:>11.1f}"
+        )
+    lines.append("(times in microseconds per call)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="JSON vs MessagePack transport benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args.sizes, args.repeat)
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
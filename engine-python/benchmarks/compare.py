@@ -0,0 +1,101 @@
+"""Compare two benchmark JSON files and flag regressions.
+
+Usage:
+    python -m benchmarks.compare BASELINE CURRENT [--threshold 0.2] [--floor-ms 0.05] [--key distribution participants]
+
+Works with the ``--json`` output of every ``benchmarks.bench_*`` module: a
+list of rows. Rows are matched on their key fields (by default every field
+that is not a timing); timing fields are the ones ending in ``_ms`` or
+``_us``. A timing regresses when it is more than ``--threshold`` (relative)
+slower than the baseline and the absolute difference is above
+``--floor-ms``, which keeps sub-noise stages from flapping. Exits 1 if
+anything regressed.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import json
+import sys
+
+TIMING_SUFFIXES = {"_ms": 1.0, "_us": 0.001}
+
+
+def timing_scale(field: str) -> Optional[float]:
+    """Milliseconds per unit of a timing field, None for other fields."""
+    for suffix, scale in TIMING_SUFFIXES.items():
+        if field.endswith(suffix):
+            return scale
+    return None
+
+
+def load_rows(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["rows"] if isinstance(data, dict) else data
+
+
+def _row_key(row: dict, key_fields: Optional[Sequence[str]]) -> Tuple:
+    fields = key_fields or sorted(f for f, v in row.items() if timing_scale(f) is None and not isinstance(v, float))
+    return tuple((f, row.get(f)) for f in fields)
+
+
+def compare(baseline: List[dict], current: List[dict], threshold: float = 0.2, floor_ms: float = 0.05,
+            key_fields: Optional[Sequence[str]] = None) -> Tuple[List[dict], List[Tuple]]:
+    """Return (one entry per compared timing, keys of current rows without a baseline)."""
+    base_by_key: Dict[Tuple, dict] = {_row_key(row, key_fields): row for row in baseline}
+    changes = []
+    unmatched = []
+    for row in current:
+        key = _row_key(row, key_fields)
+        base = base_by_key.get(key)
+        if base is None:
+            unmatched.append(key)
+            continue
+        for field, value in row.items():
+            scale = timing_scale(field)
+            if scale is None or not isinstance(base.get(field), (int, float)):
+                continue
+            before, after = base[field] * scale, value * scale
+            ratio = after / before if before else float("inf")
+            changes.append({
+                "key": dict(key),
+                "field": field,
+                "baseline_ms": before,
+                "current_ms": after,
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold and after - before > floor_ms,
+            })
+    return changes, unmatched
+
+
+def format_changes(changes: List[dict], show_all: bool = False) -> str:
+    lines = []
+    for c in changes:
+        if not (c["regression"] or show_all):
+            continue
+        key = " ".join(f"{k}={v}" for k, v in c["key"].items())
+        flag = "REGRESSION" if c["regression"] else ""
+        lines.append(f"{key:<40} {c['field']:<22} {c['baseline_ms']:>10.3f} -> {c['current_ms']:>10.3f} ms  x{c['ratio']:.2f} {flag}")
+    regressions = sum(c["regression"] for c in changes)
+    lines.append(f"{regressions} regressions in {len(changes)} timings")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmark results against a baseline")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--floor-ms", type=float, default=0.05, help="Ignore differences smaller than this")
+    parser.add_argument("--key", nargs="+", help="Fields that identify a row (default: all non-timing fields)")
+    parser.add_argument("--all", action="store_true", help="List every timing, not only regressions")
+    args = parser.parse_args(argv)
+
+    changes, unmatched = compare(load_rows(args.baseline), load_rows(args.current), args.threshold, args.floor_ms, args.key)
+    print(format_changes(changes, args.all))
+    if unmatched:
+        print(f"{len(unmatched)} rows have no baseline", file=sys.stderr)
+    return 1 if any(c["regression"] for c in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
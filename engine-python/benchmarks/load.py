@@ -0,0 +1,397 @@
+"""Concurrent load test against a running (or locally started) engine.
+
+Usage:
+    python -m benchmarks.load --spawn [--concurrency 16] [--requests 2000 | --duration 30]
+                              [--mix mix.json] [--json report.json]
+    python -m benchmarks.load --url http://localhost:8000 ...
+
+``--spawn`` starts ``uvicorn app.main:app`` on a free local port for the run
+(``--workers`` processes) and stops it afterwards; otherwise ``--url`` points
+at an engine that is already up.
+
+The request mix is a list of scenarios, each with a relative ``weight``:
+``participants``, ``clubs`` with a Zipf ``club_skew`` (0 is uniform, higher
+puts more athletes in the first clubs), ``history`` recent pairs and
+``format``. ``--mix`` reads the list from a JSON file; the default covers
+small to large divisions. ``--variants`` payloads per scenario are built
+before the run starts, so the clients spend their time on HTTP, and they are
+reused during the run: every repeat of a payload is also a determinism check
+(the response body must be byte-identical to the first one).
+
+Each of ``--concurrency`` clients keeps one HTTP/1.1 connection open and
+sends its next request as soon as the previous response is in (closed loop).
+The report has throughput, latency percentiles (overall and per scenario),
+status and error counts, and determinism results; ``--json`` writes it for
+comparing releases.
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+HEADERS = {"Authorization": "Bearer test", "Content-Type": "application/json"}
+PATH = "/v1/brackets/generate"
+
+
+class Scenario(NamedTuple):
+    name: str
+    participants: int
+    clubs: int = 8
+    club_skew: float = 0.0
+    history: int = 0
+    format: str = "single_elim"
+    weight: float = 1.0
+
+
+DEFAULT_MIX = [
+    Scenario("small", 8, clubs=4, weight=4),
+    Scenario("medium", 32, clubs=10, club_skew=1.0, history=20, weight=3),
+    Scenario("large", 128, clubs=24, club_skew=1.2, history=100, weight=2),
+    Scenario("max-skewed", 256, clubs=8, club_skew=2.0, history=300, weight=1),
+]
+
+
+def load_mix(path: str) -> List[Scenario]:
+    with open(path, encoding="utf-8") as f:
+        return [Scenario(**entry) for entry in json.load(f)]
+
+
+def build_payload(scenario: Scenario, variant: int) -> dict:
+    rng = random.Random(f"{scenario.name}-{variant}")
+    clubs = [f"club_{k}" for k in range(max(1, scenario.clubs))]
+    weights = [1 / (k + 1) ** scenario.club_skew for k in range(len(clubs))]
+    ids = [f"{scenario.name}-{variant}-a{i}" for i in range(scenario.participants)]
+    pairs = [rng.sample(ids, 2) for _ in range(scenario.history if len(ids) > 1 else 0)]
+    return {
+        "context": {"sport": "judo", "format": scenario.format, "draw_seed": f"load-{scenario.name}-{variant}"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 8, "separate_by": ["club", "nation"]},
+        "participants": [
+            {
+                "athlete_id": athlete_id,
+                "club_id": rng.choices(clubs, weights)[0],
+                "nation_code": rng.choice(["ITA", "FRA", "JPN", "BRA", "GER"]),
+                "ranking_points": rng.randrange(2000),
+            }
+            for athlete_id in ids
+        ],
+        "history": {"recent_pairs": [{"a": a, "b": b, "date": "2025-01-01"} for a, b in pairs]},
+    }
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) if values else 0.0,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else 0.0,
+    }
+
+
+class HttpConnection:
+    """A minimal keep-alive HTTP/1.1 client (Content-Length and chunked bodies)."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        if self._writer is None:
+            await self._connect()
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        try:
+            self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+            await self._writer.drain()
+            status, response_headers = await self._read_head()
+            payload = await self._read_body(response_headers)
+        except BaseException:
+            await self.close()
+            raise
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
+
+    async def _read_head(self) -> Tuple[int, Dict[str, str]]:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return status, headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _read_body(self, headers: Dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()  # no trailers are sent
+                    return b"".join(chunks)
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readexactly(2)
+        return await self._reader.readexactly(int(headers.get("content-length", 0)))
+
+
+class _Run:
+    """Shared state of one load run."""
+
+    def __init__(self, mix: List[Scenario], variants: int, requests: Optional[int], deadline: Optional[float], seed: int):
+        self.mix = mix
+        self.payloads = {s.name: [json.dumps(build_payload(s, v)).encode() for v in range(variants)] for s in mix}
+        self.weights = [s.weight for s in mix]
+        self.rng = random.Random(seed)
+        self.remaining = requests
+        self.deadline = deadline
+        self.latencies: Dict[str, List[float]] = {s.name: [] for s in mix}
+        self.statuses: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.digests: Dict[Tuple[str, int], str] = {}
+        self.determinism_checks = 0
+        self.determinism_mismatches: List[dict] = []
+
+    def next_request(self) -> Optional[Tuple[Scenario, int]]:
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return None
+            self.remaining -= 1
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return None
+        scenario = self.rng.choices(self.mix, self.weights)[0]
+        return scenario, self.rng.randrange(len(self.payloads[scenario.name]))
+
+    def record(self, scenario: Scenario, variant: int, status: int, body: bytes, elapsed: float):
+        self.latencies[scenario.name].append(elapsed * 1000)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status != 200:
+            return
+        key = (scenario.name, variant)
+        digest = hashlib.sha256(body).hexdigest()
+        if key not in self.digests:
+            self.digests[key] = digest
+            return
+        self.determinism_checks += 1
+        if self.digests[key] != digest:
+            self.determinism_mismatches.append({"scenario": scenario.name, "variant": variant})
+
+    def record_error(self, error: BaseException):
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+
+async def _client(run: _Run, host: str, port: int, timeout: float):
+    connection = HttpConnection(host, port)
+    try:
+        while True:
+            job = run.next_request()
+            if job is None:
+                return
+            scenario, variant = job
+            start = time.perf_counter()
+            try:
+                status, body = await asyncio.wait_for(
+                    connection.request("POST", PATH, run.payloads[scenario.name][variant], HEADERS), timeout
+                )
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                run.record_error(e)
+                continue
+            run.record(scenario, variant, status, body, time.perf_counter() - start)
+    finally:
+        await connection.close()
+
+
+async def run_load(
+    url: str,
+    mix: List[Scenario] = DEFAULT_MIX,
+    concurrency: int = 16,
+    requests: Optional[int] = 1000,
+    duration: Optional[float] = None,
+    variants: int = 20,
+    timeout: float = 30.0,
+    seed: int = 0,
+) -> dict:
+    """Drive ``url`` with ``concurrency`` closed-loop clients and return the report."""
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    run = _Run(mix, variants, requests, None, seed)
+    # Warm the connection path (and the engine) before the clock starts
+    warmup = HttpConnection(host, port)
+    await warmup.request("GET", "/health")
+    await warmup.close()
+
+    start = time.perf_counter()
+    if duration is not None:
+        run.deadline = start + duration
+    await asyncio.gather(*(_client(run, host, port, timeout) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [v for values in run.latencies.values() for v in values]
+    completed = len(all_latencies)
+    failed = sum(run.errors.values()) + sum(c for s, c in run.statuses.items() if s != "200")
+    attempted = completed + sum(run.errors.values())
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "requests": attempted,
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "error_rate": failed / attempted if attempted else 0.0,
+        "statuses": run.statuses,
+        "errors": run.errors,
+        "latency": latency_stats(all_latencies),
+        "scenarios": {
+            s.name: {**s._asdict(), "latency": latency_stats(run.latencies[s.name])} for s in mix
+        },
+        "determinism": {"checks": run.determinism_checks, "mismatches": run.determinism_mismatches},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class spawn_engine:
+    """Context manager running ``uvicorn app.main:app`` on a free local port."""
+
+    def __init__(self, workers: int = 1, startup_timeout: float = 30.0, env: Optional[Dict[str, str]] = None):
+        self.port = _free_port()
+        self.env = env
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.workers = workers
+        self.startup_timeout = startup_timeout
+        self._process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "spawn_engine":
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=root,
+            env={**os.environ, **self.env} if self.env else None,
+            # The engine logs every request; keep it out of the report
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Engine exited during startup (code {self._process.returncode})")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.5):
+                    return self
+            except OSError:
+                time.sleep(0.02)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"Engine did not start within {self.startup_timeout}s")
+
+    def __exit__(self, *exc):
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+
+
+def format_report(report: dict) -> str:
+    latency = report["latency"]
+    lines = [
+        f"{report['requests']} requests in {report['duration_s']:.1f}s at concurrency {report['concurrency']}: "
+        f"{report['throughput_rps']:.1f} req/s, error rate {report['error_rate']:.2%}",
+        f"statuses {report['statuses']}" + (f", errors {report['errors']}" if report["errors"] else ""),
+        f"determinism: {report['determinism']['checks']} repeats checked, "
+        f"{len(report['determinism']['mismatches'])} mismatches",
+        "",
+    ]
+    header = f"{'scenario':>12} {'athl':>5} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    lines += [header, "-" * len(header)]
+    rows = [(name, s["participants"], s["latency"]) for name, s in report["scenarios"].items()]
+    rows.append(("all", "", latency))
+    for name, athletes, stats in rows:
+        lines.append(
+            f"{name:>12} {athletes:>5} {stats['count']:>6} {stats['mean_ms']:>8.1f} {stats['p50_ms']:>8.1f} "
+            f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}"
+        )
+    lines.append("(latencies in milliseconds)")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Engine load test")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Engine base URL")
+    target.add_argument("--spawn", action="store_true", help="Start a local engine for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    parser.add_argument("--concurrency", type=int, default=16)
+    amount = parser.add_mutually_exclusive_group()
+    amount.add_argument("--requests", type=int, default=None)
+    amount.add_argument("--duration", type=float, default=None, help="Seconds to run instead of a request count")
+    parser.add_argument("--mix", help="JSON file with a list of scenarios")
+    parser.add_argument("--variants", type=int, default=20, help="Distinct payloads per scenario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    requests = args.requests if args.requests is not None or args.duration is not None else 1000
+    mix = load_mix(args.mix) if args.mix else DEFAULT_MIX
+
+    def go(url: str) -> dict:
+        return asyncio.run(run_load(
+            url, mix, args.concurrency, requests, args.duration, args.variants, args.timeout, args.seed
+        ))
+
+    if args.spawn:
+        with spawn_engine(args.workers) as engine:
+            report = go(engine.url)
+    else:
+        report = go(args.url)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["determinism"]["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
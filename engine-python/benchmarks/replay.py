@@ -0,0 +1,256 @@
+"""Replay captured engine traffic.
+
+Usage:
+    python -m benchmarks.replay capture.jsonl --spawn [--speed 1 | --speed 0] [--concurrency 16]
+                                [--json report.json]
+    python -m benchmarks.replay capture.jsonl --url http://localhost:8000 ...
+    python -m benchmarks.replay capture.jsonl --spawn --speed 0 --baseline baseline.jsonl
+
+Re-sends every line of a capture written by ``app.capture`` (set
+``ENGINE_CAPTURE_PATH`` on the engine) and compares each response with the
+recording:
+
+- latency: the replayed request time against the captured ``duration_ms``
+  (server time, so the delta also includes the network and client)
+- determinism: the status must match the captured ``status``, and the
+  SHA-256 of the response body the captured ``response_hash`` when there is
+  one
+
+Anonymized captures have no ``response_hash`` (the engine does not draw the
+renamed athletes while serving). ``--baseline`` writes the capture again
+with the hash and size of this replay's response on every such line; replay
+that file against other engines to check them against this one.
+
+``--speed 1`` sends requests at their original pace (open loop, relative to
+the first captured request), ``--speed 10`` ten times faster, and
+``--speed 0`` as fast as ``--concurrency`` keep-alive connections allow.
+The report has latency percentiles for the capture and the replay, delta
+percentiles, per-path summaries and the list of mismatching requests;
+``--json`` also writes one row per request. Exits 1 on any mismatch.
+"""
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+
+from app.capture import encode_body
+from benchmarks.load import HttpConnection, latency_stats, spawn_engine
+
+CONTENT_TYPES = {"json": "application/json", "msgpack": "application/msgpack"}
+
+
+def load_capture(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return sorted((json.loads(line) for line in f if line.strip()), key=lambda r: r["ts"])
+
+
+class _Pool:
+    """Keep-alive connections, opened on demand up to ``size``."""
+
+    def __init__(self, host: str, port: int, size: int):
+        self.host, self.port = host, port
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[HttpConnection] = []
+        self._all: List[HttpConnection] = []
+
+    async def request(self, method: str, path: str, body: bytes, headers: Dict[str, str], timeout: float):
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else HttpConnection(self.host, self.port)
+            if connection not in self._all:
+                self._all.append(connection)
+            try:
+                start = time.perf_counter()
+                status, payload = await asyncio.wait_for(connection.request(method, path, body, headers), timeout)
+                return status, payload, time.perf_counter() - start
+            finally:
+                self._idle.append(connection)
+
+    async def close(self):
+        for connection in self._all:
+            await connection.close()
+
+
+async def _send(pool: _Pool, index: int, record: dict, token: str, timeout: float) -> dict:
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": CONTENT_TYPES[record.get("encoding", "json")]}
+    if record.get("accept"):
+        headers["Accept"] = record["accept"]
+    path = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    row = {
+        "index": index,
+        "path": record["path"],
+        "original_status": record.get("status"),
+        "original_ms": record.get("duration_ms"),
+        "status": None,
+        "replay_ms": None,
+        "delta_ms": None,
+        "match": None,
+        "error": None,
+        "response_bytes": None,
+        "response_hash": None,
+    }
+    try:
+        status, body, elapsed = await pool.request(
+            record.get("method", "POST"), path, encode_body(record["body"], record.get("encoding", "json")), headers, timeout
+        )
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+        row["error"] = type(e).__name__
+        return row
+    row["status"] = status
+    row["replay_ms"] = elapsed * 1000
+    if row["original_ms"] is not None:
+        row["delta_ms"] = row["replay_ms"] - row["original_ms"]
+    row["response_bytes"] = len(body)
+    row["response_hash"] = hashlib.sha256(body).hexdigest()
+    if record.get("status") is not None:
+        row["match"] = status == record["status"] and record.get("response_hash") in (None, row["response_hash"])
+    return row
+
+
+async def run_replay(url: str, records: List[dict], speed: float = 1.0, concurrency: int = 16, timeout: float = 30.0,
+                     token: str = "test") -> dict:
+    """Replay ``records`` against ``url`` and return the report."""
+    parts = urlsplit(url)
+    pool = _Pool(parts.hostname or "127.0.0.1", parts.port or 80, concurrency)
+    warmup = HttpConnection(pool.host, pool.port)
+    await warmup.request("GET", "/health")
+    await warmup.close()
+
+    start = time.perf_counter()
+    first_ts = records[0]["ts"] if records else 0.0
+
+    async def paced(index: int, record: dict) -> dict:
+        if speed > 0:
+            delay = start + (record["ts"] - first_ts) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return await _send(pool, index, record, token, timeout)
+
+    try:
+        rows = await asyncio.gather(*(paced(i, r) for i, r in enumerate(records)))
+    finally:
+        await pool.close()
+    elapsed = time.perf_counter() - start
+    return build_report(url, speed, concurrency, elapsed, list(rows))
+
+
+def _delta_stats(deltas: List[float]) -> Dict[str, float]:
+    values = sorted(deltas)
+    if not values:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    stats = latency_stats(values)
+    return {"count": stats["count"], "mean_ms": stats["mean_ms"], "p50_ms": stats["p50_ms"], "p95_ms": stats["p95_ms"]}
+
+
+def build_report(url: str, speed: float, concurrency: int, elapsed: float, rows: List[dict]) -> dict:
+    done = [r for r in rows if r["error"] is None]
+    paths = {}
+    for path in sorted({r["path"] for r in rows}):
+        subset = [r for r in done if r["path"] == path]
+        paths[path] = {
+            "original": latency_stats([r["original_ms"] for r in subset if r["original_ms"] is not None]),
+            "replay": latency_stats([r["replay_ms"] for r in subset]),
+            "delta": _delta_stats([r["delta_ms"] for r in subset if r["delta_ms"] is not None]),
+        }
+    errors: Dict[str, int] = {}
+    for r in rows:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    return {
+        "url": url,
+        "speed": speed,
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "requests": len(rows),
+        "errors": errors,
+        "original": latency_stats([r["original_ms"] for r in done if r["original_ms"] is not None]),
+        "replay": latency_stats([r["replay_ms"] for r in done]),
+        "delta": _delta_stats([r["delta_ms"] for r in done if r["delta_ms"] is not None]),
+        "paths": paths,
+        "determinism": {
+            "checks": sum(r["match"] is not None for r in done),
+            "mismatches": [
+                {"index": r["index"], "path": r["path"], "original_status": r["original_status"], "status": r["status"]}
+                for r in done if r["match"] is False
+            ],
+        },
+        "rows": rows,
+    }
+
+
+def format_report(report: dict, slowest: int = 10) -> str:
+    lines = [
+        f"{report['requests']} requests replayed in {report['duration_s']:.1f}s "
+        f"(speed {report['speed'] or 'max'}, concurrency {report['concurrency']})"
+        + (f", errors {report['errors']}" if report["errors"] else ""),
+        f"determinism: {report['determinism']['checks']} responses checked, "
+        f"{len(report['determinism']['mismatches'])} mismatches",
+        "",
+    ]
+    header = f"{'path':<24} {'count':>6} {'orig p50':>9} {'orig p95':>9} {'repl p50':>9} {'repl p95':>9} {'delta p50':>10} {'delta p95':>10}"
+    lines += [header, "-" * len(header)]
+    summaries = [(path, s["original"], s["replay"], s["delta"]) for path, s in report["paths"].items()]
+    summaries.append(("all", report["original"], report["replay"], report["delta"]))
+    for path, original, replay, delta in summaries:
+        lines.append(
+            f"{path:<24} {replay['count']:>6} {original['p50_ms']:>9.1f} {original['p95_ms']:>9.1f} {replay['p50_ms']:>9.1f} "
+            f"{replay['p95_ms']:>9.1f} {delta['p50_ms']:>+10.1f} {delta['p95_ms']:>+10.1f}"
+        )
+    lines.append("(milliseconds; delta = replay - original)")
+    slow = sorted((r for r in report["rows"] if r["delta_ms"] is not None), key=lambda r: r["delta_ms"], reverse=True)[:slowest]
+    if slow:
+        lines += ["", "largest slowdowns:"]
+        lines += [f"  #{r['index']:<6} {r['path']:<24} {r['original_ms']:>9.1f} -> {r['replay_ms']:>9.1f} ms" for r in slow]
+    for m in report["determinism"]["mismatches"]:
+        lines.append(f"MISMATCH #{m['index']} {m['path']} (status {m['original_status']} -> {m['status']})")
+    return "\n".join(lines)
+
+
+def write_baseline(path: str, records: List[dict], rows: List[dict]):
+    """``records`` with the replayed hash and size filled in where the capture had no hash."""
+    with open(path, "w", encoding="utf-8") as f:
+        for record, row in zip(records, rows):
+            if record.get("response_hash") is None and row["error"] is None:
+                record = {**record, "response_bytes": row["response_bytes"], "response_hash": row["response_hash"]}
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay captured engine traffic")
+    parser.add_argument("capture", help="JSONL capture written by ENGINE_CAPTURE_PATH")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Engine base URL")
+    target.add_argument("--spawn", action="store_true", help="Start a local engine for the replay")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pace multiplier; 0 sends as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum open connections")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--token", default="test", help="API key sent as the Bearer token")
+    parser.add_argument("--json", help="Write the report (with one row per request) as JSON")
+    parser.add_argument("--baseline", help="Write the capture with this replay's response hashes where it has none")
+    args = parser.parse_args(argv)
+
+    records = load_capture(args.capture)
+
+    def go(url: str) -> dict:
+        return asyncio.run(run_replay(url, records, args.speed, args.concurrency, args.timeout, args.token))
+
+    if args.spawn:
+        with spawn_engine(args.workers) as engine:
+            report = go(engine.url)
+    else:
+        report = go(args.url)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        write_baseline(args.baseline, records, report["rows"])
+    return 1 if report["determinism"]["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""Synthetic large-event generator.
+
+Usage:
+    python -m benchmarks.synthetic_event --athletes 100000 [--divisions 3300] [--seed 0]
+                                         [--events 1] [--format jsonl|sql] [--out event.jsonl]
+
+Writes an event one division at a time, so memory stays flat however large
+the event is (only the club table and a short window of recent athletes are
+kept):
+
+- ``jsonl``: one ``/v1/brackets/generate`` request per division, ready for
+  ``competition-engine generate --in`` or the load and benchmark tools
+- ``sql``: ``INSERT`` statements for the tables of
+  ``orchestrator-ts/scripts/seed_db.sql`` (events, athletes, event_divisions,
+  event_registrations), with explicit ids and the sequences moved past them
+  at the end; load it into a database created from that file's tables,
+  without its test rows
+
+Athlete ids are the database ids (as strings in ``jsonl``), so both outputs
+of the same ``--seed`` describe the same event. ``--events N`` writes N
+such events (ids 1..N, seeds ``--seed`` onwards), with division and
+athlete ids numbered on across them, e.g. to seed an orchestrator load run
+(``orchestrator_load.py``).
+
+The event is shaped like a large open: division sizes are log-normal
+(clipped to ``--min-size``..``--max-size``), clubs have Zipf-distributed
+sizes and each belongs to one nation, ``--home-share`` of the clubs are
+from the host nation, ``--null-ranking-rate`` and ``--null-club-rate`` of
+athletes have no ranking or club, each division adds ``--multi-entry-rate``
+re-entries of athletes from earlier divisions (open weight, age group up),
+and ``--history-rate`` of athletes have a recent bout against someone in
+their division.
+"""
+from bisect import bisect
+from collections import deque
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Iterator, List, NamedTuple, Optional, TextIO, Tuple
+import argparse
+import json
+import math
+import random
+import sys
+
+NATIONS = [
+    "ITA", "FRA", "JPN", "BRA", "GER", "ESP", "NED", "GEO", "KOR", "RUS", "UZB", "MGL", "AZE", "ISR", "GBR",
+    "USA", "CAN", "POL", "HUN", "AUT", "SUI", "BEL", "POR", "CRO", "SRB", "SLO", "UKR", "KAZ", "TUR", "CHN",
+    "CUB", "ARG", "MEX", "EGY", "ALG", "TUN", "MAR", "SEN", "AUS", "NZL",
+]
+SEXES = ["MALE", "FEMALE"]
+AGE_GROUPS = ["U13", "U15", "U18", "U21", "SENIOR", "VETERAN"]
+WEIGHTS = {
+    "MALE": ["60KG", "66KG", "73KG", "81KG", "90KG", "100KG", "+100KG"],
+    "FEMALE": ["48KG", "52KG", "57KG", "63KG", "70KG", "78KG", "+78KG"],
+}
+BELTS = ["white", "yellow", "orange", "green", "blue", "brown", "black"]
+
+
+class EventSpec(NamedTuple):
+    athletes: int = 10000
+    divisions: Optional[int] = None
+    seed: int = 0
+    sport: str = "judo"
+    event_name: str = "Synthetic Open"
+    start_date: date = date(2026, 6, 1)
+    min_size: int = 4
+    max_size: int = 256
+    athletes_per_club: int = 25
+    club_skew: float = 1.1
+    home_nation: str = "ITA"
+    home_share: float = 0.4
+    null_ranking_rate: float = 0.15
+    null_club_rate: float = 0.05
+    multi_entry_rate: float = 0.03
+    history_rate: float = 0.1
+
+
+class Athlete(NamedTuple):
+    id: int
+    club_id: Optional[str]
+    nation_code: str
+    ranking_points: Optional[int]
+    belt: str
+
+
+class Division(NamedTuple):
+    id: int
+    code: str
+    athletes: List[Athlete]
+    recent_pairs: List[Tuple[int, int, str]]
+
+
+def division_sizes(spec: EventSpec, rng: random.Random) -> List[int]:
+    """Fresh athletes per division, summing to ``spec.athletes``."""
+    count = spec.divisions or max(1, round(spec.athletes / 30))
+    if count * spec.min_size > spec.athletes or count * spec.max_size < spec.athletes:
+        raise ValueError(f"{spec.athletes} athletes do not fit {count} divisions of {spec.min_size}-{spec.max_size}")
+    mean = spec.athletes / count
+    sigma = 0.8
+    mu = math.log(mean) - sigma * sigma / 2
+    sizes = [min(spec.max_size, max(spec.min_size, round(rng.lognormvariate(mu, sigma)))) for _ in range(count)]
+    # Nudge random divisions until the total matches exactly
+    total = sum(sizes)
+    while total != spec.athletes:
+        k = rng.randrange(count)
+        step = 1 if total < spec.athletes else -1
+        if spec.min_size <= sizes[k] + step <= spec.max_size:
+            sizes[k] += step
+            total += step
+    return sizes
+
+
+def division_code(spec: EventSpec, index: int) -> str:
+    sex = SEXES[index % 2]
+    weights = WEIGHTS[sex]
+    age = AGE_GROUPS[(index // 2) % len(AGE_GROUPS)]
+    weight = weights[(index // (2 * len(AGE_GROUPS))) % len(weights)]
+    group = index // (2 * len(AGE_GROUPS) * len(weights))
+    code = f"{spec.sport.upper()}|{sex}|{age}|{weight}"
+    return f"{code}|G{group + 1}" if group else code
+
+
+def generate_event(spec: EventSpec) -> Iterator[Division]:
+    """Yield the event's divisions in order, each with its athletes."""
+    rng = random.Random(spec.seed)
+    sizes = division_sizes(spec, rng)
+
+    clubs = max(1, spec.athletes // spec.athletes_per_club)
+    club_weights = list(accumulate(1 / (k + 1) ** spec.club_skew for k in range(clubs)))
+    nation_weights = list(accumulate(1 / (k + 1) for k in range(len(NATIONS))))
+    club_nation = [
+        spec.home_nation if rng.random() < spec.home_share
+        else NATIONS[bisect(nation_weights, rng.random() * nation_weights[-1])]
+        for _ in range(clubs)
+    ]
+
+    next_id = 1
+    recent: "deque[Athlete]" = deque(maxlen=1000)
+    for index, size in enumerate(sizes):
+        athletes: List[Athlete] = []
+        for _ in range(size):
+            club = bisect(club_weights, rng.random() * club_weights[-1])
+            ranking = None if rng.random() < spec.null_ranking_rate else min(5000, int(rng.paretovariate(1.2) * 50))
+            athletes.append(Athlete(
+                id=next_id,
+                club_id=None if rng.random() < spec.null_club_rate else f"club_{club}",
+                nation_code=club_nation[club],
+                ranking_points=ranking,
+                belt=rng.choice(BELTS),
+            ))
+            next_id += 1
+        # Re-entries come on top of the fresh athletes, so --athletes stays the distinct count
+        entries = sum(rng.random() < spec.multi_entry_rate for _ in range(size))
+        picks = []
+        if recent and entries:
+            picks = rng.sample(recent, min(entries, len(recent), spec.max_size - size))
+        # Only fresh athletes join the window, so it holds each athlete once
+        # and no division gets the same re-entry twice
+        recent.extend(athletes)
+        athletes.extend(picks)
+
+        pairs = []
+        if len(athletes) > 1:
+            for _ in range(round(len(athletes) * spec.history_rate)):
+                a, b = rng.sample(athletes, 2)
+                bout = spec.start_date - timedelta(days=rng.randint(7, 365))
+                pairs.append((a.id, b.id, bout.isoformat()))
+        yield Division(id=index + 1, code=division_code(spec, index), athletes=athletes, recent_pairs=pairs)
+
+
+def generate_events(spec: EventSpec, events: int = 1) -> Iterator[Tuple[int, EventSpec, Division]]:
+    """``(event id, event spec, division)`` for ``events`` events seeded ``spec.seed`` onwards.
+
+    Division and athlete ids carry on from one event to the next, so the
+    events can be loaded into one database.
+    """
+    division_base = athlete_base = 0
+    for event_id in range(1, events + 1):
+        event = spec._replace(seed=spec.seed + event_id - 1)
+        if events > 1:
+            event = event._replace(event_name=f"{spec.event_name} {event_id}")
+        last_division = last_athlete = 0
+        for division in generate_event(event):
+            if division_base or athlete_base:
+                division = division._replace(
+                    id=division.id + division_base,
+                    athletes=[a._replace(id=a.id + athlete_base) for a in division.athletes],
+                    recent_pairs=[(a + athlete_base, b + athlete_base, d) for a, b, d in division.recent_pairs],
+                )
+            last_division = division.id
+            last_athlete = max(last_athlete, max(a.id for a in division.athletes))
+            yield event_id, event, division
+        division_base, athlete_base = last_division, last_athlete
+
+
+def engine_payload(spec: EventSpec, division: Division) -> dict:
+    return {
+        "context": {
+            "sport": spec.sport,
+            "format": "single_elim",
+            "repechage": True,
+            "draw_seed": f"synthetic-{spec.seed}-{division.id}",
+        },
+        "rules": {"seeding_mode": "auto", "max_seeds": 8, "separate_by": ["club", "nation"]},
+        "participants": [
+            {
+                "athlete_id": str(a.id),
+                "club_id": a.club_id,
+                "nation_code": a.nation_code,
+                "ranking_points": a.ranking_points,
+                "meta": {"belt": a.belt, "division": division.code},
+            }
+            for a in division.athletes
+        ],
+        "history": {"recent_pairs": [{"a": str(a), "b": str(b), "date": d} for a, b, d in division.recent_pairs]},
+    }
+
+
+def write_jsonl(spec: EventSpec, out: TextIO, events: int = 1) -> int:
+    count = 0
+    for _, event, division in generate_events(spec, events):
+        out.write(json.dumps(engine_payload(event, division), separators=(",", ":")) + "\n")
+        count += 1
+    return count
+
+
+def _sql(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def write_sql(spec: EventSpec, out: TextIO, events: int = 1) -> int:
+    out.write("-- Synthetic event data for the schema in orchestrator-ts/scripts/seed_db.sql\n")
+    out.write("BEGIN;\n")
+    end_date = spec.start_date + timedelta(days=max(1, spec.athletes // 20000))
+    count = max_athlete = current = 0
+    for event_id, event, division in generate_events(spec, events):
+        if event_id != current:
+            out.write(
+                "INSERT INTO events (id, name, sport, start_date, end_date) VALUES "
+                f"({event_id}, {_sql(event.event_name)}, {_sql(spec.sport)}, {_sql(spec.start_date.isoformat())}, "
+                f"{_sql(end_date.isoformat())});\n"
+            )
+            current = event_id
+        out.write(f"INSERT INTO event_divisions (id, event_id, code) VALUES ({division.id}, {event_id}, {_sql(division.code)});\n")
+        fresh = [a for a in division.athletes if a.id > max_athlete]
+        if fresh:
+            rows = ",\n".join(
+                f"({a.id}, {_sql(a.club_id)}, {_sql(a.nation_code)}, {_sql(a.ranking_points)}, {_sql(json.dumps({'belt': a.belt}))})"
+                for a in fresh
+            )
+            out.write(f"INSERT INTO athletes (id, club_id, nation_code, ranking_points, meta) VALUES\n{rows};\n")
+            max_athlete = fresh[-1].id
+        rows = ",\n".join(f"({event_id}, {a.id}, {division.id}, 'confirmed', NULL)" for a in division.athletes)
+        out.write(f"INSERT INTO event_registrations (event_id, athlete_id, division_id, status, seed) VALUES\n{rows};\n")
+        count += 1
+    for table in ("events", "event_divisions", "athletes"):
+        out.write(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}));\n")
+    out.write("COMMIT;\n")
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = EventSpec()
+    parser = argparse.ArgumentParser(description="Generate a synthetic event")
+    parser.add_argument("--athletes", type=int, default=defaults.athletes, help="Distinct athletes in the event")
+    parser.add_argument("--divisions", type=int, help="Number of divisions (default: about 30 athletes each)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--events", type=int, default=1, help="Events to write, each of --athletes (seeds --seed onwards)")
+    parser.add_argument("--format", choices=["jsonl", "sql"], default="jsonl")
+    parser.add_argument("--out", default="-", help="Output path ('-' for stdout)")
+    parser.add_argument("--min-size", type=int, default=defaults.min_size)
+    parser.add_argument("--max-size", type=int, default=defaults.max_size)
+    parser.add_argument("--club-skew", type=float, default=defaults.club_skew, help="Zipf exponent of club sizes")
+    parser.add_argument("--home-share", type=float, default=defaults.home_share, help="Share of clubs from the host nation")
+    parser.add_argument("--null-ranking-rate", type=float, default=defaults.null_ranking_rate)
+    parser.add_argument("--null-club-rate", type=float, default=defaults.null_club_rate)
+    parser.add_argument("--multi-entry-rate", type=float, default=defaults.multi_entry_rate)
+    parser.add_argument("--history-rate", type=float, default=defaults.history_rate)
+    args = parser.parse_args(argv)
+
+    spec = defaults._replace(
+        athletes=args.athletes, divisions=args.divisions, seed=args.seed, min_size=args.min_size, max_size=args.max_size,
+        club_skew=args.club_skew, home_share=args.home_share, null_ranking_rate=args.null_ranking_rate,
+        null_club_rate=args.null_club_rate, multi_entry_rate=args.multi_entry_rate, history_rate=args.history_rate,
+    )
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        count = (write_sql if args.format == "sql" else write_jsonl)(spec, out, args.events)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Wrote {count} divisions", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
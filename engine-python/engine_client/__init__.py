@@ -0,0 +1,21 @@
+"""Python client for the competition engine API.
+
+::
+
+    from engine_client import EngineClient
+
+    with EngineClient("http://localhost:8000", token="test") as client:
+        bracket = client.generate(request, deadline=2.0)
+        draws = client.generate_many(requests)
+
+``AsyncEngineClient`` is the asyncio variant; concurrent ``generate`` calls
+are micro-batched into ``/v1/brackets/batch`` calls. Both keep connections
+alive in a pool, send an ``Idempotency-Key`` with every POST (the same one
+on retries), propagate the caller's deadline as ``X-Request-Deadline-Ms``
+and speak msgpack when the ``msgpack`` package is installed.
+"""
+from engine_client._common import EngineClientError
+from engine_client.aio import AsyncEngineClient
+from engine_client.sync import EngineClient
+
+__all__ = ["AsyncEngineClient", "EngineClient", "EngineClientError"]
@@ -0,0 +1,147 @@
+"""Pieces shared by the sync and asyncio clients: encoding, headers, errors, retries."""
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+import json
+import time
+import uuid
+
+try:
+    import msgpack
+except ImportError:  # JSON only
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+BATCH_PATH = "/v1/brackets/batch"
+# The engine's MAX_BATCH_REQUESTS
+MAX_BATCH = 64
+# Answers worth another attempt with the same Idempotency-Key
+RETRY_STATUSES = (429, 502, 503)
+RETRY_BACKOFF_S = 0.05
+# Idle connections older than this are not reused (uvicorn closes them after 5s)
+IDLE_KEEPALIVE_S = 4.0
+
+
+class EngineClientError(Exception):
+    """An engine error response, or a request that could not be completed.
+
+    ``status`` is the HTTP status (None when no response arrived) and
+    ``code``, ``message`` and ``details`` come from the engine's error body.
+    """
+
+    def __init__(self, status: Optional[int], code: str, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(f"{code}: {message}")
+        self.status = status
+        self.code = code
+        self.message = message
+        self.details = details
+
+    @classmethod
+    def from_body(cls, status: Optional[int], body: Any) -> "EngineClientError":
+        error = body.get("error") if isinstance(body, dict) else None
+        if not isinstance(error, dict):
+            return cls(status, "HTTP_ERROR", f"Engine answered {status}", {"body": body})
+        return cls(status, error.get("code", "HTTP_ERROR"), error.get("message", ""), error.get("details"))
+
+
+class Deadline:
+    """An absolute point in time from a budget in seconds (None: no deadline)."""
+
+    def __init__(self, budget: Optional[float]):
+        self.at = None if budget is None else time.monotonic() + budget
+
+    def remaining(self) -> Optional[float]:
+        return None if self.at is None else self.at - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, default: float) -> float:
+        """Socket timeout for the next attempt."""
+        remaining = self.remaining()
+        return default if remaining is None else max(0.001, min(default, remaining))
+
+
+def deadline_exceeded() -> EngineClientError:
+    return EngineClientError(None, "DEADLINE_EXCEEDED", "The request deadline passed before the engine answered")
+
+
+def split_url(url: str) -> Tuple[str, int]:
+    parts = urlsplit(url)
+    if parts.scheme not in ("", "http"):
+        raise ValueError(f"Unsupported scheme {parts.scheme!r} (plain http only)")
+    return parts.hostname or "127.0.0.1", parts.port or 80
+
+
+def resolve_msgpack(wanted: Optional[bool]) -> bool:
+    """Use msgpack when asked (or, by default, when it is installed)."""
+    if wanted and msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack is not None if wanted is None else wanted
+
+
+def new_idempotency_key() -> str:
+    return str(uuid.uuid4())
+
+
+def target(path: str, query: Optional[Dict[str, str]]) -> str:
+    return f"{path}?{urlencode(query)}" if query else path
+
+
+def request_headers(token: str, use_msgpack: bool, body: bool, idempotency_key: Optional[str],
+                    deadline: Deadline) -> Dict[str, str]:
+    media = MSGPACK if use_msgpack else JSON
+    headers = {"Authorization": f"Bearer {token}", "Accept": media}
+    if body:
+        headers["Content-Type"] = media
+    if idempotency_key:
+        headers["Idempotency-Key"] = idempotency_key
+    remaining = deadline.remaining()
+    if remaining is not None:
+        headers[DEADLINE_HEADER] = str(max(0, int(remaining * 1000)))
+    return headers
+
+
+def encode(body: Any, use_msgpack: bool) -> bytes:
+    if body is None:
+        return b""
+    return msgpack.packb(body, use_bin_type=True) if use_msgpack else json.dumps(body).encode()
+
+
+def decode(content_type: Optional[str], payload: bytes) -> Any:
+    """The decoded body; text when it is neither msgpack nor JSON (e.g. a proxy's error page)."""
+    if not payload:
+        return None
+    try:
+        if (content_type or "").split(";")[0].strip().lower() in (MSGPACK, "application/x-msgpack"):
+            return msgpack.unpackb(payload, raw=False)
+        return json.loads(payload)
+    except ValueError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def backoff(attempt: int, deadline: Deadline) -> Optional[float]:
+    """Seconds to wait before retry ``attempt`` (1-based), None if the deadline leaves no room."""
+    delay = RETRY_BACKOFF_S * (2 ** (attempt - 1))
+    remaining = deadline.remaining()
+    return None if remaining is not None and remaining <= delay else delay
+
+
+def result_or_error(status: int, body: Any) -> Any:
+    if 200 <= status < 300:
+        return body
+    raise EngineClientError.from_body(status, body)
+
+
+def batch_item(item: Any) -> Any:
+    """A batch result as a response dict, or the ``EngineClientError`` it carries."""
+    if isinstance(item, dict) and set(item) == {"error"}:
+        return EngineClientError.from_body(None, item)
+    return item
+
+
+def batch_unsupported(error: EngineClientError) -> bool:
+    """Engines older than the batch endpoint answer 404 or 405."""
+    return error.status in (404, 405)
@@ -0,0 +1,293 @@
+"""asyncio client: keep-alive connection pool and transparent micro-batching of generate calls."""
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+import time
+
+from engine_client._common import (
+    BATCH_PATH, IDLE_KEEPALIVE_S, MAX_BATCH, RETRY_STATUSES, Deadline, EngineClientError, backoff, batch_item,
+    batch_unsupported, deadline_exceeded, decode, encode, new_idempotency_key, request_headers, resolve_msgpack,
+    result_or_error, split_url, target,
+)
+
+TRANSPORT_ERRORS = (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError)
+GENERATE_PATH = "/v1/brackets/generate"
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection (Content-Length and chunked bodies)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.idle_since = time.monotonic()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def open(self) -> bool:
+        return self._writer is not None
+
+    async def close(self):
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        try:
+            self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+            await self._writer.drain()
+            status, response_headers = await self._read_head()
+            payload = await self._read_body(response_headers)
+        except BaseException:
+            await self.close()
+            raise
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        self.idle_since = time.monotonic()
+        return status, response_headers, payload
+
+    async def _read_head(self) -> Tuple[int, Dict[str, str]]:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return status, headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _read_body(self, headers: Dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()  # no trailers are sent
+                    return b"".join(chunks)
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readexactly(2)
+        return await self._reader.readexactly(int(headers.get("content-length", 0)))
+
+
+class ConnectionPool:
+    """Up to ``size`` connections, opened on demand; idle ones are reused while the server still keeps them."""
+
+    def __init__(self, host: str, port: int, size: int):
+        self.host, self.port = host, port
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[_Connection] = []
+
+    async def request(self, method: str, path: str, body: bytes, headers: Dict[str, str]):
+        async with self._slots:
+            connection = None
+            while self._idle and connection is None:
+                candidate = self._idle.pop()
+                if time.monotonic() - candidate.idle_since < IDLE_KEEPALIVE_S:
+                    connection = candidate
+                else:
+                    await candidate.close()
+            connection = connection or _Connection(self.host, self.port)
+            try:
+                return await connection.request(method, path, body, headers)
+            finally:
+                if connection.open:
+                    self._idle.append(connection)
+
+    async def close(self):
+        while self._idle:
+            await self._idle.pop().close()
+
+
+class AsyncEngineClient:
+    """Engine API client for asyncio code.
+
+    Concurrent ``generate`` calls made within ``batch_window`` seconds of
+    each other are sent together as one ``/v1/brackets/batch`` call (up to
+    ``batch_size`` requests); each caller still gets its own response or
+    ``EngineClientError``. ``batch_window=0`` sends every call on its own, and
+    engines without the batch endpoint are detected and get single calls.
+    Otherwise the same as ``EngineClient``.
+    """
+
+    def __init__(self, url: str = "http://localhost:8000", token: str = "test", *, msgpack: Optional[bool] = None,
+                 pool_size: int = 8, timeout: float = 30.0, retries: int = 2, batch_size: int = MAX_BATCH,
+                 batch_window: float = 0.002):
+        self.url = url
+        self.token = token
+        self.use_msgpack = resolve_msgpack(msgpack)
+        self.timeout = timeout
+        self.retries = retries
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.batch_supported: Optional[bool] = None
+        self._pool = ConnectionPool(*split_url(url), pool_size)
+        # Generate calls waiting for the next batch: (request, deadline, future)
+        self._queue: List[Tuple[dict, Deadline, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def close(self):
+        """Send what is queued, wait for it, then close the connections."""
+        self._flush()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self._pool.close()
+
+    async def __aenter__(self) -> "AsyncEngineClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def request(self, method: str, path: str, body: Any = None, *, query: Optional[Dict[str, str]] = None,
+                      idempotency_key: Optional[str] = None, deadline: Optional[float] = None) -> Any:
+        """Send one request (retried on connection errors and ``RETRY_STATUSES``) and return the decoded body."""
+        return await self._request(method, path, body, query, idempotency_key, Deadline(deadline))
+
+    async def _request(self, method: str, path: str, body: Any, query: Optional[Dict[str, str]],
+                       idempotency_key: Optional[str], deadline: Deadline) -> Any:
+        if method == "POST" and idempotency_key is None:
+            idempotency_key = new_idempotency_key()
+        payload = encode(body, self.use_msgpack)
+        attempt = 0
+        while True:
+            if deadline.expired():
+                raise deadline_exceeded()
+            headers = request_headers(self.token, self.use_msgpack, body is not None, idempotency_key, deadline)
+            try:
+                status, response_headers, data = await asyncio.wait_for(
+                    self._pool.request(method, target(path, query), payload, headers), deadline.timeout(self.timeout)
+                )
+            except TRANSPORT_ERRORS as e:
+                error = EngineClientError(None, "CONNECTION_ERROR", str(e) or type(e).__name__)
+            else:
+                result = decode(response_headers.get("content-type"), data)
+                if status not in RETRY_STATUSES:
+                    return result_or_error(status, result)
+                error = EngineClientError.from_body(status, result)
+            attempt += 1
+            delay = backoff(attempt, deadline) if attempt <= self.retries else None
+            if delay is None:
+                if deadline.expired():
+                    raise deadline_exceeded() from error
+                raise error
+            await asyncio.sleep(delay)
+
+    async def generate(self, request: dict, *, idempotency_key: Optional[str] = None, deadline: Optional[float] = None,
+                       columnar: bool = False) -> dict:
+        """One division's draw; batched with concurrent calls unless a key or the columnar format is asked for."""
+        if columnar or idempotency_key is not None or self.batch_window <= 0 or self.batch_supported is False:
+            query = {"format": "columnar"} if columnar else None
+            return await self.request("POST", GENERATE_PATH, request, query=query, idempotency_key=idempotency_key,
+                                      deadline=deadline)
+        limit = Deadline(deadline)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((request, limit, future))
+        if len(self._queue) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        remaining = limit.remaining()
+        try:
+            return await asyncio.wait_for(future, remaining) if remaining is not None else await future
+        except asyncio.TimeoutError:
+            raise deadline_exceeded() from None
+
+    async def generate_many(self, requests: Sequence[dict], *, deadline: Optional[float] = None) -> List[Any]:
+        """Generate every request, in order; each item is the response dict or its ``EngineClientError``."""
+        return list(await asyncio.gather(*(self.generate(r, deadline=deadline) for r in requests), return_exceptions=True))
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._queue:
+            items, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+            self._spawn(self._send_batch(items))
+
+    def _spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, items: List[Tuple[dict, Deadline, asyncio.Future]]):
+        items = [item for item in items if not item[2].done()]  # callers that gave up
+        if not items:
+            return
+        if len(items) == 1 or self.batch_supported is False:
+            await asyncio.gather(*(self._send_single(*item) for item in items))
+            return
+        # The batch runs until its last caller's deadline; each caller stops waiting at its own
+        ats = [limit.at for _, limit, _ in items]
+        limit = Deadline(None) if None in ats else Deadline(max(ats) - time.monotonic())
+        try:
+            response = await self._request("POST", BATCH_PATH, {"requests": [r for r, _, _ in items]}, None, None, limit)
+        except EngineClientError as e:
+            if batch_unsupported(e):
+                self.batch_supported = False
+                await asyncio.gather(*(self._send_single(*item) for item in items))
+                return
+            for _, _, future in items:
+                _resolve(future, e)
+            return
+        self.batch_supported = True
+        for (_, _, future), item in zip(items, response["results"]):
+            _resolve(future, batch_item(item))
+
+    async def _send_single(self, request: dict, limit: Deadline, future: asyncio.Future):
+        try:
+            result = await self._request("POST", GENERATE_PATH, request, None, None, limit)
+        except EngineClientError as e:
+            result = e
+        _resolve(future, result)
+
+    async def _probe(self, path: str) -> dict:
+        # One attempt: a 503 from the probes is an answer (warming or drain), not a failure
+        headers = request_headers(self.token, self.use_msgpack, False, None, Deadline(None))
+        try:
+            status, response_headers, data = await asyncio.wait_for(self._pool.request("GET", path, b"", headers), self.timeout)
+        except TRANSPORT_ERRORS as e:
+            raise EngineClientError(None, "CONNECTION_ERROR", str(e) or type(e).__name__) from e
+        body = decode(response_headers.get("content-type"), data)
+        if status not in (200, 503):
+            raise EngineClientError.from_body(status, body)
+        return body
+
+    async def evaluate(self, request: dict, *, deadline: Optional[float] = None) -> dict:
+        return await self.request("POST", "/v1/brackets/evaluate", request, deadline=deadline)
+
+    async def patch(self, request: dict, *, deadline: Optional[float] = None) -> dict:
+        return await self.request("POST", "/v1/brackets/patch", request, deadline=deadline)
+
+    async def schedule(self, request: dict, *, deadline: Optional[float] = None) -> dict:
+        return await self.request("POST", "/v1/events/schedule", request, deadline=deadline)
+
+    async def health(self) -> dict:
+        return await self._probe("/health")
+
+    async def ready(self) -> dict:
+        """The ``/ready`` body; ``status`` is ``ready`` once the worker has warmed up."""
+        return await self._probe("/ready")
+
+    async def capacity(self) -> dict:
+        """The ``/capacity`` report; ``verdict`` is ``ready``, ``warming`` or ``drain``."""
+        return await self._probe("/capacity")
+
+
+def _resolve(future: asyncio.Future, result: Any):
+    if future.done():
+        return
+    if isinstance(result, EngineClientError):
+        future.set_exception(result)
+    else:
+        future.set_result(result)
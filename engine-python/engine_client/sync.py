@@ -0,0 +1,212 @@
+"""Blocking client over a thread-safe pool of keep-alive ``http.client`` connections."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import http.client
+import queue
+import socket
+import threading
+import time
+
+from engine_client._common import (
+    BATCH_PATH, IDLE_KEEPALIVE_S, MAX_BATCH, RETRY_STATUSES, Deadline, EngineClientError, backoff, batch_item, batch_unsupported,
+    deadline_exceeded, decode, encode, new_idempotency_key, request_headers, resolve_msgpack, result_or_error,
+    split_url, target,
+)
+
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException)
+
+
+class _Pool:
+    """Up to ``size`` connections; idle ones are reused, broken ones dropped."""
+
+    def __init__(self, host: str, port: int, size: int):
+        self.host, self.port = host, port
+        self._slots = threading.BoundedSemaphore(size)
+        # (connection, idle since)
+        self._idle: "queue.LifoQueue[Tuple[http.client.HTTPConnection, float]]" = queue.LifoQueue()
+
+    def acquire(self, timeout: float) -> http.client.HTTPConnection:
+        if not self._slots.acquire(timeout=timeout):
+            raise socket.timeout("No free connection in the pool")
+        connection = None
+        while connection is None:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+                break
+            if time.monotonic() - idle_since >= IDLE_KEEPALIVE_S:
+                connection.close()
+                connection = None
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection
+
+    def release(self, connection: http.client.HTTPConnection, reusable: bool):
+        if reusable:
+            self._idle.put((connection, time.monotonic()))
+        else:
+            connection.close()
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                return
+
+
+class EngineClient:
+    """Engine API client for threads and scripts.
+
+    ``msgpack=None`` negotiates msgpack when the package is installed and
+    JSON otherwise. ``deadline`` on a call is a budget in seconds covering
+    every attempt; ``timeout`` caps each attempt. Safe to share between
+    threads (at most ``pool_size`` requests run at once).
+    """
+
+    def __init__(self, url: str = "http://localhost:8000", token: str = "test", *, msgpack: Optional[bool] = None,
+                 pool_size: int = 8, timeout: float = 30.0, retries: int = 2, batch_size: int = MAX_BATCH):
+        self.url = url
+        self.token = token
+        self.use_msgpack = resolve_msgpack(msgpack)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.batch_size = batch_size
+        self.batch_supported: Optional[bool] = None
+        self._pool = _Pool(*split_url(url), pool_size)
+
+    def close(self):
+        self._pool.close()
+
+    def __enter__(self) -> "EngineClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _attempt(self, method: str, path: str, body: bytes, headers: Dict[str, str], timeout: float):
+        connection = self._pool.acquire(timeout)
+        reusable = False
+        try:
+            connection.request(method, path, body=body or None, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+            reusable = not response.will_close
+            return response.status, response.getheader("Content-Type"), payload
+        finally:
+            self._pool.release(connection, reusable)
+
+    def request(self, method: str, path: str, body: Any = None, *, query: Optional[Dict[str, str]] = None,
+                idempotency_key: Optional[str] = None, deadline: Optional[float] = None) -> Any:
+        """Send one request (retried on connection errors and ``RETRY_STATUSES``) and return the decoded body."""
+        return self._request(method, path, body, query, idempotency_key, Deadline(deadline))
+
+    def _request(self, method: str, path: str, body: Any, query: Optional[Dict[str, str]],
+                 idempotency_key: Optional[str], deadline: Deadline) -> Any:
+        if method == "POST" and idempotency_key is None:
+            idempotency_key = new_idempotency_key()
+        payload = encode(body, self.use_msgpack)
+        attempt = 0
+        while True:
+            if deadline.expired():
+                raise deadline_exceeded()
+            headers = request_headers(self.token, self.use_msgpack, body is not None, idempotency_key, deadline)
+            try:
+                status, content_type, data = self._attempt(method, target(path, query), payload, headers,
+                                                           deadline.timeout(self.timeout))
+            except TRANSPORT_ERRORS as e:
+                error = EngineClientError(None, "CONNECTION_ERROR", str(e) or type(e).__name__)
+            else:
+                result = decode(content_type, data)
+                if status not in RETRY_STATUSES:
+                    return result_or_error(status, result)
+                error = EngineClientError.from_body(status, result)
+            attempt += 1
+            delay = backoff(attempt, deadline) if attempt <= self.retries else None
+            if delay is None:
+                if deadline.expired():
+                    raise deadline_exceeded() from error
+                raise error
+            time.sleep(delay)
+
+    def generate(self, request: dict, *, idempotency_key: Optional[str] = None, deadline: Optional[float] = None,
+                 columnar: bool = False) -> dict:
+        query = {"format": "columnar"} if columnar else None
+        return self.request("POST", "/v1/brackets/generate", request, query=query, idempotency_key=idempotency_key,
+                            deadline=deadline)
+
+    def generate_many(self, requests: Sequence[dict], *, deadline: Optional[float] = None) -> List[Any]:
+        """Generate every request, in order, through batch calls of ``batch_size``.
+
+        Each item is the response dict or the ``EngineClientError`` for that
+        division; a failed batch call fails all of its items. Engines without
+        the batch endpoint get concurrent single calls instead.
+        """
+        shared = Deadline(deadline)
+        results: List[Any] = [None] * len(requests)
+        pending = range(len(requests))
+        with ThreadPoolExecutor(self.pool_size) as executor:
+            if self.batch_supported is not False:
+                starts = range(0, len(requests), self.batch_size)
+                chunks = [list(requests[i:i + self.batch_size]) for i in starts]
+                for start, items in zip(starts, executor.map(lambda c: self._batch(c, shared), chunks)):
+                    if items is not None:
+                        results[start:start + len(items)] = items
+                pending = [i for i in pending if results[i] is None]
+            for i, item in zip(pending, executor.map(lambda i: self._single(requests[i], shared), pending)):
+                results[i] = item
+        return results
+
+    def _batch(self, chunk: List[dict], deadline: Deadline) -> Optional[List[Any]]:
+        """Results of one batch call, or None if the engine has no batch endpoint."""
+        try:
+            response = self._request("POST", BATCH_PATH, {"requests": chunk}, None, None, deadline)
+        except EngineClientError as e:
+            if batch_unsupported(e):
+                self.batch_supported = False
+                return None
+            return [e] * len(chunk)
+        self.batch_supported = True
+        return [batch_item(item) for item in response["results"]]
+
+    def _single(self, request: dict, deadline: Deadline) -> Any:
+        try:
+            return self._request("POST", "/v1/brackets/generate", request, None, None, deadline)
+        except EngineClientError as e:
+            return e
+
+    def evaluate(self, request: dict, *, deadline: Optional[float] = None) -> dict:
+        return self.request("POST", "/v1/brackets/evaluate", request, deadline=deadline)
+
+    def patch(self, request: dict, *, deadline: Optional[float] = None) -> dict:
+        return self.request("POST", "/v1/brackets/patch", request, deadline=deadline)
+
+    def schedule(self, request: dict, *, deadline: Optional[float] = None) -> dict:
+        return self.request("POST", "/v1/events/schedule", request, deadline=deadline)
+
+    def _probe(self, path: str) -> dict:
+        # One attempt: a 503 from the probes is an answer (warming or drain), not a failure
+        headers = request_headers(self.token, self.use_msgpack, False, None, Deadline(None))
+        try:
+            status, content_type, data = self._attempt("GET", path, b"", headers, self.timeout)
+        except TRANSPORT_ERRORS as e:
+            raise EngineClientError(None, "CONNECTION_ERROR", str(e) or type(e).__name__) from e
+        body = decode(content_type, data)
+        if status not in (200, 503):
+            raise EngineClientError.from_body(status, body)
+        return body
+
+    def health(self) -> dict:
+        return self._probe("/health")
+
+    def ready(self) -> dict:
+        """The ``/ready`` body; ``status`` is ``ready`` once the worker has warmed up."""
+        return self._probe("/ready")
+
+    def capacity(self) -> dict:
+        """The ``/capacity`` report; ``verdict`` is ``ready``, ``warming`` or ``drain``."""
+        return self._probe("/capacity")
@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from app import main
+from app.main import MAX_BATCH_REQUESTS, app
+from app.warmup import WARMUP_REQUESTS
+
+client = TestClient(app)
+
+HEADERS = {"Authorization": "Bearer test"}
+REQUESTS = [body for path, body in WARMUP_REQUESTS if path == "/v1/brackets/generate"]
+
+
+def test_batch_results_match_single_calls_in_order():
+    response = client.post("/v1/brackets/batch", json={"requests": REQUESTS}, headers=HEADERS)
+    assert response.status_code == 200
+    singles = [client.post("/v1/brackets/generate", json=r, headers=HEADERS).json() for r in REQUESTS]
+    assert response.json()["results"] == singles
+
+
+def test_batch_errors_are_per_request():
+    unknown_profile = {**REQUESTS[0], "profile_id": "missing"}
+    del unknown_profile["rules"]
+    body = {"requests": [REQUESTS[0], {"context": {}}, unknown_profile]}
+    first, invalid, unknown = client.post("/v1/brackets/batch", json=body, headers=HEADERS).json()["results"]
+    assert "matches" in first
+    assert invalid["error"]["code"] == "INVALID_REQUEST"
+    assert unknown["error"]["code"] == "UNKNOWN_PROFILE"
+
+
+def test_unexpected_error_fails_only_its_division(monkeypatch):
+    real_generate = main.generate
+
+    def flaky(request):
+        if request.context.draw_seed == "explodes":
+            raise RuntimeError("boom")
+        return real_generate(request)
+
+    monkeypatch.setattr(main, "generate", flaky)
+    broken = {**REQUESTS[0], "context": {**REQUESTS[0]["context"], "draw_seed": "explodes"}}
+    response = client.post("/v1/brackets/batch", json={"requests": [REQUESTS[0], broken, REQUESTS[1]]}, headers=HEADERS)
+    assert response.status_code == 200
+    first, failed, last = response.json()["results"]
+    assert "matches" in first and "matches" in last
+    assert failed["error"]["code"] == "INTERNAL_ERROR"
+    assert failed["error"]["details"] == {"error": "boom"}
+
+
+def test_batch_size_is_capped():
+    response = client.post("/v1/brackets/batch", json={"requests": [REQUESTS[0]] * (MAX_BATCH_REQUESTS + 1)}, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "BATCH_TOO_LARGE"
+
+
+def test_batch_requires_authorization():
+    response = client.post("/v1/brackets/batch", json={"requests": []}, headers={"Authorization": "Bearer nope"})
+    assert response.status_code == 401
+
+
+def test_expired_deadline_skips_the_draw():
+    expired = {**HEADERS, "X-Request-Deadline-Ms": "0"}
+    response = client.post("/v1/brackets/generate", json=REQUESTS[0], headers=expired)
+    assert response.status_code == 504
+    assert response.json()["error"]["code"] == "DEADLINE_EXCEEDED"
+    results = client.post("/v1/brackets/batch", json={"requests": REQUESTS[:2]}, headers=expired).json()["results"]
+    assert [r["error"]["code"] for r in results] == ["DEADLINE_EXCEEDED"] * 2
+    generous = {**HEADERS, "X-Request-Deadline-Ms": "60000"}
+    assert client.post("/v1/brackets/generate", json=REQUESTS[0], headers=generous).status_code == 200
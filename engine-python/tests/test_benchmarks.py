@@ -0,0 +1,38 @@
+from app.core import generate
+from app.draw import run_draw
+from app.instrument import DRAW_STAGES, Probe
+from benchmarks.bench_stages import build_request
+from benchmarks.bench_startup import run as run_startup
+from benchmarks.compare import compare
+
+
+def test_probe_times_every_stage_without_changing_the_draw():
+    request = build_request(24, "seed_payload")
+    probe = Probe()
+    assert run_draw(request, probe) == generate(request)
+    assert list(probe.timings) == list(DRAW_STAGES)
+    assert all(seconds >= 0 for seconds in probe.timings.values())
+
+
+def test_compare_flags_regressions_above_threshold_and_floor():
+    baseline = [
+        {"distribution": "uniform", "participants": 64, "swaps_ms": 20.0, "seeding_ms": 0.01, "json_us": 200.0},
+        {"distribution": "uniform", "participants": 128, "swaps_ms": 80.0},
+    ]
+    current = [
+        {"distribution": "uniform", "participants": 64, "swaps_ms": 30.0, "seeding_ms": 0.03, "json_us": 210.0},
+        {"distribution": "one_club", "participants": 64, "swaps_ms": 1.0},
+    ]
+    changes, unmatched = compare(baseline, current, threshold=0.2, floor_ms=0.05)
+    regressed = {c["field"] for c in changes if c["regression"]}
+    # seeding tripled but by less than the floor; json_us is converted to ms
+    assert regressed == {"swaps_ms"}
+    assert {c["field"]: round(c["current_ms"], 3) for c in changes}["json_us"] == 0.21
+    assert unmatched == [(("distribution", "one_club"), ("participants", 64))]
+
+
+def test_startup_benchmark_measures_a_worker():
+    [row] = run_startup(1, ["warm"], steady=2)
+    assert row["mode"] == "warm"
+    assert row["listen_ms"] <= row["health_ms"] <= row["ready_ms"]
+    assert row["first_request_ms"] > 0 and row["steady_ms"] > 0
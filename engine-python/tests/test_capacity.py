@@ -0,0 +1,130 @@
+import asyncio
+
+import anyio
+import anyio.to_thread
+import httpx
+from fastapi.testclient import TestClient
+
+from app import main
+from app.capacity import CapacityLimits, CapacityTracker, capacity_limits_from_env, limit_worker_threads, size_bucket
+from app.main import app
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.cpu = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def tracker(limits=CapacityLimits()):
+    clock = FakeClock()
+    return clock, CapacityTracker(limits, clock=clock, cpu_clock=lambda: clock.cpu)
+
+
+def test_queued_work_uses_concurrency_adjusted_estimates():
+    clock, t = tracker()
+    bucket = size_bucket(5000)
+    # Two requests of the same size share the CPU: 2s of latency is 1s of work each
+    a, b = t.begin(bucket), t.begin(bucket)
+    clock.now += 2.0
+    t.end(a)
+    t.end(b)
+    assert t.report()["queued_ms"] == 0
+    c = t.begin(bucket)
+    clock.now += 0.25
+    report = t.report()
+    assert report["in_flight"] == 1
+    assert report["queued_ms"] == 750.0
+    # Larger unseen sizes fall back to the nearest smaller bucket; smaller ones are unknown
+    t.begin(size_bucket(50000))
+    t.begin(size_bucket(50))
+    assert t.report()["queued_ms"] == 750.0 + 1000.0
+    t.end(c)
+    assert t.report()["completed"] == 3
+
+
+def test_p95_covers_the_recent_window():
+    clock, t = tracker()
+    for ms in [10] * 19 + [500]:
+        token = t.begin(1)
+        clock.now += ms / 1000
+        t.end(token)
+    assert t.report()["p95_ms"] == 10.0
+    token = t.begin(1)
+    clock.now += 0.9
+    t.end(token)
+    assert t.report()["p95_ms"] == 500.0
+    clock.now += 60
+    assert t.report()["p95_ms"] == 0.0
+
+
+def test_cpu_rate_and_verdict():
+    clock, t = tracker(CapacityLimits(max_in_flight=2, max_queued_ms=10_000, max_p95_ms=1000, max_cpu_per_s=0.9))
+    clock.now += 2.0
+    clock.cpu += 1.0
+    report = t.report()
+    assert report["cpu_per_s"] == 0.5
+    assert (report["verdict"], report["reasons"]) == ("ready", [])
+    t.begin(1)
+    t.begin(1)
+    clock.now += 1.0
+    clock.cpu += 0.95
+    report = t.report()
+    assert report["verdict"] == "drain"
+    assert report["reasons"] == ["in_flight", "cpu_per_s"]
+    assert report["limits"]["max_in_flight"] == 2
+    assert t.report(ready=False)["verdict"] == "warming"
+
+
+def test_limits_and_threads_from_env():
+    limits = capacity_limits_from_env({"ENGINE_MAX_IN_FLIGHT": "8", "ENGINE_MAX_P95_MS": "750"})
+    assert limits == CapacityLimits(max_in_flight=8, max_p95_ms=750.0)
+
+    async def configure():
+        threads = limit_worker_threads({"ENGINE_WORKER_THREADS": "3"})
+        return threads, anyio.to_thread.current_default_thread_limiter().total_tokens
+
+    assert asyncio.run(configure()) == (3, 3)
+
+
+def test_capacity_endpoint(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(main.readiness, "state", "ready")
+    before = client.get("/capacity").json()["completed"]
+    participants = [{"athlete_id": f"a{i}", "club_id": f"c{i % 3}"} for i in range(8)]
+    client.post("/v1/brackets/generate", headers=HEADERS, json={
+        "context": {"sport": "judo", "format": "single_elim"}, "rules": {"seeding_mode": "auto"}, "participants": participants,
+    })
+    response = client.get("/capacity")
+    body = response.json()
+    assert body["completed"] == before + 1
+    assert body["in_flight"] == 0
+    assert response.status_code == (200 if body["verdict"] == "ready" else 503)
+    monkeypatch.setattr(main.readiness, "state", "warming")
+    response = client.get("/capacity")
+    assert response.status_code == 503
+    assert response.json()["verdict"] == "warming"
+
+
+def test_probes_and_live_routes_answer_while_the_pool_is_busy():
+    async def probe():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = 1
+        await limiter.acquire()  # a draw holds the only worker thread
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://engine") as client:
+                with anyio.fail_after(2):
+                    health = await client.get("/health")
+                    live = await client.get("/v1/live/not-started", headers=HEADERS)
+                with anyio.move_on_after(0.2) as blocked:
+                    await client.get("/v1/profiles", headers=HEADERS)
+            return health.status_code, live.status_code, blocked.cancelled_caught
+        finally:
+            limiter.release()
+
+    assert asyncio.run(probe()) == (200, 404, True)
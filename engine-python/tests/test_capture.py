@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.capture import CaptureMiddleware, anonymize
+from app.main import app
+from benchmarks.load import Scenario, run_load, spawn_engine
+from benchmarks.replay import load_capture, run_replay, write_baseline
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+def payload():
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "draw_seed": "capture"},
+        "rules": {"seeding_mode": "manual", "separate_by": ["club"]},
+        "participants": [
+            {"athlete_id": f"a{i}", "club_id": f"club_{i % 3}", "seed": 1 if i == 0 else None} for i in range(6)
+        ],
+        "history": {"recent_pairs": [{"a": "a1", "b": "a2", "date": "2025-01-01"}]},
+    }
+
+
+def wait_for_lines(path, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.exists() and len(path.read_text().splitlines()) >= count:
+            break
+        time.sleep(0.02)
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+def test_anonymize_replaces_athlete_ids_everywhere():
+    body = anonymize(payload(), b"salt")
+    ids = [p["athlete_id"] for p in body["participants"]]
+    assert all(i.startswith("anon_") for i in ids) and len(set(ids)) == 6
+    assert body["history"]["recent_pairs"][0]["a"] == ids[1]
+    assert body["participants"][0]["club_id"] == "club_0"
+    assert anonymize(payload(), b"salt") == body
+    assert anonymize(payload(), b"other") != body
+
+
+def test_middleware_records_anonymized_requests_without_rerunning_them(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    with TestClient(CaptureMiddleware(app, str(path), seed=0)) as client:
+        response = client.post("/v1/brackets/generate", json=payload(), headers=HEADERS)
+        assert response.status_code == 200
+        client.get("/health")
+        [record] = wait_for_lines(path, 1)
+    assert record["path"] == "/v1/brackets/generate"
+    assert record["anonymized"] is True
+    assert not {p["athlete_id"] for p in record["body"]["participants"]} & {f"a{i}" for i in range(6)}
+    assert "Bearer" not in json.dumps(record)
+    assert record["duration_ms"] > 0
+    # The original answer's status and size; the hash is left to an offline baseline
+    assert record["status"] == 200
+    assert record["response_bytes"] == len(response.content)
+    assert record["response_hash"] is None
+
+
+def test_middleware_sampling_and_plain_capture(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    with TestClient(CaptureMiddleware(app, str(path), sample=0.0)) as client:
+        client.post("/v1/brackets/generate", json=payload(), headers=HEADERS)
+    assert not path.exists()
+    with TestClient(CaptureMiddleware(app, str(path), anonymize=False)) as client:
+        response = client.post("/v1/brackets/generate", json=payload(), headers=HEADERS)
+        [record] = wait_for_lines(path, 1)
+    assert record["body"] == payload()
+    assert record["response_hash"] == hashlib.sha256(response.content).hexdigest()
+
+
+def test_capture_and_replay_against_local_engine(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    baseline = tmp_path / "baseline.jsonl"
+    mix = [Scenario("tiny", 6, clubs=2), Scenario("pool", 5, format="round_robin")]
+    with spawn_engine(env={"ENGINE_CAPTURE_PATH": str(path)}) as engine:
+        asyncio.run(run_load(engine.url, mix, concurrency=2, requests=8, variants=2))
+        records = wait_for_lines(path, 8)
+        assert len(records) == 8
+        report = asyncio.run(run_replay(engine.url, load_capture(str(path)), speed=0, concurrency=2))
+        write_baseline(str(baseline), load_capture(str(path)), report["rows"])
+        again = asyncio.run(run_replay(engine.url, load_capture(str(baseline)), speed=0, concurrency=2))
+    assert report["requests"] == 8
+    assert report["errors"] == {}
+    # Statuses only: anonymized lines have no hash until the baseline run
+    assert report["determinism"] == {"checks": 8, "mismatches": []}
+    assert report["delta"]["count"] == 8
+    assert {row["path"] for row in report["rows"]} == {"/v1/brackets/generate"}
+    assert all(r["response_hash"] for r in load_capture(str(baseline)))
+    assert again["determinism"] == {"checks": 8, "mismatches": []}
+    assert [r["response_hash"] for r in again["rows"]] == [r["response_hash"] for r in report["rows"]]
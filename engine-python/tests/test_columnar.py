@@ -0,0 +1,50 @@
+import json
+
+import msgpack
+from fastapi.testclient import TestClient
+from app.columnar import from_columnar
+from app.main import app
+
+client = TestClient(app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+def make_request(n=11, repechage=True):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": repechage, "draw_seed": "columnar_test"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % 3}", "ranking_points": 100 - i}
+            for i in range(n)
+        ],
+    }
+
+
+def test_columnar_round_trips_to_default_format():
+    for repechage in (True, False):
+        default = client.post("/v1/brackets/generate", json=make_request(repechage=repechage), headers=HEADERS)
+        columnar = client.post("/v1/brackets/generate?format=columnar", json=make_request(repechage=repechage), headers=HEADERS)
+        assert columnar.status_code == 200
+        data = columnar.json()
+        assert data["format"] == "columnar"
+        assert from_columnar(data) == default.json()
+
+
+def test_columnar_is_smaller():
+    default = client.post("/v1/brackets/generate", json=make_request(128), headers=HEADERS)
+    columnar = client.post("/v1/brackets/generate?format=columnar", json=make_request(128), headers=HEADERS)
+    assert len(columnar.content) < len(default.content) * 0.75
+    assert len(json.loads(columnar.content)["matches"]["red"]) == 127
+
+
+def test_columnar_with_msgpack():
+    headers = {**HEADERS, "Accept": "application/msgpack"}
+    response = client.post("/v1/brackets/generate?format=columnar", json=make_request(), headers=headers)
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["format"] == "columnar"
+
+
+def test_unknown_format_is_rejected():
+    response = client.post("/v1/brackets/generate?format=xml", json=make_request(), headers=HEADERS)
+    assert response.status_code == 422
@@ -0,0 +1,116 @@
+"""Scaling budgets for the draw, checked on adversarial inputs.
+
+Operation counts come from ``app.instrument.Probe`` and are exact, so the
+fitted exponents are the same on every machine. Every counted operation is
+bounded by size^2, so one wall-time check on the worst inputs guards against
+costs the counters do not see: time must not grow faster than n^2.
+"""
+import math
+import random
+import time
+
+import pytest
+
+from app.core import generate
+from app.draw import next_power_of_two, run_draw
+from app.instrument import Probe
+from app.models import GenerateBracketRequest
+
+SIZES = [16, 32, 64, 128, 256]
+# Exponents are fitted on the largest sizes, where seeds and fixed costs no longer dominate
+FIT_SIZES = SIZES[-3:]
+
+# operation: (max fitted exponent, absolute bound for n participants)
+BUDGETS = {
+    # Greedy placement scores every free slot for every unseeded athlete
+    "penalty_evals": (2.0, lambda n: n * n / 2),
+    # Each optimizer pass tries at most two swaps per pair of round-1 matches
+    # (size^2 / 4); with at most three passes that is under size^2
+    "swap_evals": (2.0, lambda n: next_power_of_two(n) ** 2),
+    # Work per swap is constant: the two round-1 pairs it touches, before and
+    # after, plus one full count up front. Rescoring the whole bracket per
+    # swap would make this size^3.
+    "pair_checks": (2.0, lambda n: 4 * next_power_of_two(n) ** 2 + next_power_of_two(n) // 2),
+    # A pass keeps scanning after an improvement, so the next one only finds
+    # what its own swaps opened up; passes must not grow with n. Restarting
+    # the scan after each improvement took n/4 passes on nation_skew.
+    "swap_passes": (0.0, lambda n: 3),
+}
+EXPONENT_TOLERANCE = 0.15
+TIME_EXPONENT_BUDGET = 2.0
+
+
+def adversarial(kind, n):
+    rng = random.Random(n)
+    if kind == "one_club":
+        participants = [{"athlete_id": f"a{i}", "club_id": "club", "nation_code": "ITA", "ranking_points": rng.randrange(3000)} for i in range(n)]
+    elif kind == "null_rankings":
+        participants = [{"athlete_id": f"a{i}", "club_id": f"club_{i % 4}"} for i in range(n)]
+    elif kind == "two_nations":
+        participants = [{"athlete_id": f"a{i}", "club_id": f"club_{i % 2}", "nation_code": ["ITA", "FRA"][i % 2]} for i in range(n)]
+    elif kind == "nation_skew":
+        # Default rules (clubs only) still weigh nation collisions; one nation is half the field
+        participants = [{"athlete_id": f"a{i}", "club_id": f"club_{i}", "nation_code": "ITA" if i < n // 2 else "FRA", "ranking_points": n - i} for i in range(n)]
+    elif kind == "manual_seeds":
+        participants = [{"athlete_id": f"a{i}", "club_id": f"club_{i % 5}", "seed": i + 1} for i in range(n)]
+    else:
+        raise ValueError(kind)
+    rules = {"seeding_mode": "manual" if kind == "manual_seeds" else "auto"}
+    if kind != "nation_skew":
+        rules["separate_by"] = ["club", "nation"]
+    return GenerateBracketRequest.model_validate({
+        "context": {"sport": "judo", "format": "single_elim", "repechage": True, "draw_seed": f"complexity_{kind}"},
+        "rules": rules,
+        "participants": participants,
+        "history": {"recent_pairs": [{"a": f"a{i}", "b": f"a{i + 1}", "date": "2025-01-01"} for i in range(0, n - 1, 2)]},
+    })
+
+
+def fit_exponent(sizes, values):
+    """Least-squares slope of log(value) against log(size)."""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(v, 1)) for v in values]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+
+
+def test_fit_exponent():
+    assert fit_exponent([1, 2, 4, 8], [3, 12, 48, 192]) == pytest.approx(2.0)
+    assert fit_exponent([1, 2, 4], [5, 5, 5]) == pytest.approx(0.0)
+
+
+KINDS = ["one_club", "null_rankings", "two_nations", "nation_skew", "manual_seeds"]
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_operation_counts_stay_within_budget(kind):
+    counts = {operation: [] for operation in BUDGETS}
+    for n in SIZES:
+        probe = Probe()
+        run_draw(adversarial(kind, n), probe)
+        for operation, (_, bound) in BUDGETS.items():
+            value = probe.counts.get(operation, 0)
+            assert value <= bound(n), f"{operation}={value} over budget {bound(n):.0f} at n={n} ({kind})"
+            counts[operation].append(value)
+    for operation, (exponent, _) in BUDGETS.items():
+        tail = counts[operation][-len(FIT_SIZES):]
+        if any(tail):
+            fitted = fit_exponent(FIT_SIZES, tail)
+            assert fitted <= exponent + EXPONENT_TOLERANCE, f"{operation} scales as n^{fitted:.2f} ({kind})"
+
+
+@pytest.mark.parametrize("kind", ["two_nations", "nation_skew"])
+def test_generate_time_scaling(kind):
+    sizes = FIT_SIZES
+    timings = []
+    for n in sizes:
+        request = adversarial(kind, n)
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            generate(request)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+    fitted = fit_exponent(sizes, [t * 1e6 for t in timings])
+    # Wall time is noisy; the draw fits about n^1.7 here
+    assert fitted <= TIME_EXPONENT_BUDGET + EXPONENT_TOLERANCE, f"generate scales as n^{fitted:.2f} ({kind})"
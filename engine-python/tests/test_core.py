@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from app import EngineError, generate
+from app import cli
+from app.cli import generate_stream
+
+
+def make_request(n=8, draw_seed="core_test"):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "draw_seed": draw_seed},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % 3}", "ranking_points": 100 - i}
+            for i in range(n)
+        ],
+    }
+
+
+def test_generate_without_http():
+    result = generate(make_request(6))
+    assert result.summary.participants == 6
+    assert result.summary.size == 8
+    assert generate(make_request(6)) == result
+
+
+def test_core_import_does_not_load_fastapi():
+    code = "import sys, app; app.generate; assert 'fastapi' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_generate_raises_engine_errors():
+    request = make_request(5)
+    request["participants"][1]["athlete_id"] = "P0"
+    with pytest.raises(EngineError) as exc:
+        generate(request)
+    assert exc.value.code == "DUPLICATE_ATHLETE_IDS"
+    assert exc.value.details == {"duplicates": ["P0"]}
+
+    with pytest.raises(EngineError) as exc:
+        generate(make_request(3))
+    assert exc.value.code == "INVALID_PARTICIPANTS_COUNT"
+
+    request = make_request(5)
+    request["rules"] = {"seeding_mode": "manual"}
+    for i, seed in enumerate([1, 2, 1]):
+        request["participants"][i]["seed"] = seed
+    with pytest.raises(EngineError) as exc:
+        generate(request)
+    assert exc.value.code == "DUPLICATE_SEED"
+    assert exc.value.details == {"duplicates": [1]}
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_generate_stream_keeps_input_order(jobs):
+    lines = [json.dumps(make_request(n, draw_seed=f"s{n}")) for n in range(4, 12)]
+    lines.insert(3, json.dumps(make_request(2)))
+    lines.append("{not json")
+    results = [json.loads(line) for line in generate_stream(lines, jobs=jobs)]
+
+    assert len(results) == len(lines)
+    assert results[3]["error"]["code"] == "INVALID_PARTICIPANTS_COUNT"
+    assert results[-1]["error"]["code"] == "INVALID_REQUEST"
+    sizes = [r["summary"]["participants"] for r in results if "summary" in r]
+    assert sizes == list(range(4, 12))
+
+
+def test_generate_stream_reports_unexpected_errors_per_line(monkeypatch):
+    real_generate = cli.generate
+
+    def flaky(request):
+        if request["context"]["draw_seed"] == "explodes":
+            raise RuntimeError("boom")
+        return real_generate(request)
+
+    monkeypatch.setattr(cli, "generate", flaky)
+    lines = [json.dumps(make_request(6)), json.dumps(make_request(6, draw_seed="explodes")), json.dumps(make_request(7))]
+    first, failed, last = [json.loads(line) for line in generate_stream(lines)]
+    assert "summary" in first and "summary" in last
+    assert failed["error"]["code"] == "INTERNAL_ERROR"
+    assert failed["error"]["details"] == {"error": "boom"}
@@ -0,0 +1,134 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.warmup import WARMUP_REQUESTS
+from benchmarks.load import spawn_engine
+from engine_client import AsyncEngineClient, EngineClient, EngineClientError
+
+REQUESTS = [body for path, body in WARMUP_REQUESTS if path == "/v1/brackets/generate"]
+
+
+@pytest.fixture(scope="module")
+def engine_url():
+    with spawn_engine(env={"ENGINE_WARMUP": "0"}) as engine:
+        yield engine.url
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """Records requests; fails the first ``fail_first`` with 503 and has a batch endpoint only if ``batch``."""
+
+    protocol_version = "HTTP/1.1"
+    server: "StubServer"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.seen.append((self.path, dict(self.headers)))
+        if len(self.server.seen) <= self.server.fail_first:
+            return self._answer(503, {"error": {"code": "BUSY", "message": "try again"}})
+        if self.path == "/v1/brackets/batch":
+            if not self.server.batch:
+                return self._answer(404, {"detail": "Not Found"})
+            return self._answer(200, {"results": [{"echo": r["context"]["draw_seed"]} for r in body["requests"]]})
+        return self._answer(200, {"echo": body["context"]["draw_seed"]})
+
+    def _answer(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer(ThreadingHTTPServer):
+    def __init__(self, batch: bool = True, fail_first: int = 0):
+        super().__init__(("127.0.0.1", 0), _Stub)
+        self.batch = batch
+        self.fail_first = fail_first
+        self.seen = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+@pytest.mark.parametrize("use_msgpack", [False, True])
+def test_sync_client_matches_single_calls_and_batches(engine_url, use_msgpack):
+    with EngineClient(engine_url, msgpack=use_msgpack) as client:
+        singles = [client.generate(r) for r in REQUESTS]
+        assert client.generate_many(REQUESTS + [{"context": {}}])[:-1] == singles
+        assert client.batch_supported is True
+        error = client.generate_many([{"context": {}}])[0]
+        assert isinstance(error, EngineClientError) and error.code == "INVALID_REQUEST"
+        with pytest.raises(EngineClientError) as e:
+            client.generate({"context": {}})
+        assert e.value.status == 422
+        assert client.health()["status"] == "ok"
+        assert client.capacity()["verdict"] == "ready"
+
+
+def test_async_client_micro_batches_concurrent_calls(engine_url):
+    async def go():
+        async with AsyncEngineClient(engine_url) as client:
+            singles = [await client.request("POST", "/v1/brackets/generate", r) for r in REQUESTS]
+            batched = await client.generate_many(REQUESTS)
+            return singles, batched, client.batch_supported
+
+    singles, batched, supported = asyncio.run(go())
+    assert batched == singles
+    assert supported is True
+
+
+def test_deadline_is_propagated_and_enforced(engine_url):
+    with EngineClient(engine_url) as client:
+        with pytest.raises(EngineClientError) as e:
+            client.generate(REQUESTS[0], deadline=0)
+        assert e.value.code == "DEADLINE_EXCEEDED" and e.value.status is None
+    with StubServer() as stub, EngineClient(stub.url, msgpack=False) as client:
+        client.generate(REQUESTS[0], deadline=5)
+        [(_, headers)] = stub.seen
+        assert 0 < int(headers["X-Request-Deadline-Ms"]) <= 5000
+
+
+def test_retries_keep_the_idempotency_key():
+    with StubServer(fail_first=2) as stub, EngineClient(stub.url, msgpack=False, retries=2) as client:
+        assert client.generate(REQUESTS[0]) == {"echo": REQUESTS[0]["context"]["draw_seed"]}
+        keys = {headers["Idempotency-Key"] for _, headers in stub.seen}
+        assert len(stub.seen) == 3 and len(keys) == 1
+    with StubServer(fail_first=5) as stub, EngineClient(stub.url, msgpack=False, retries=1) as client:
+        with pytest.raises(EngineClientError) as e:
+            client.generate(REQUESTS[0])
+        assert (e.value.status, e.value.code) == (503, "BUSY")
+
+
+def test_falls_back_to_single_calls_without_a_batch_endpoint():
+    seeds = [{"echo": r["context"]["draw_seed"]} for r in REQUESTS]
+    with StubServer(batch=False) as stub, EngineClient(stub.url, msgpack=False, batch_size=2) as client:
+        assert client.generate_many(REQUESTS) == seeds
+        assert client.batch_supported is False
+        assert sum(path == "/v1/brackets/batch" for path, _ in stub.seen) >= 1
+
+    async def go(url):
+        async with AsyncEngineClient(url, msgpack=False) as client:
+            return await client.generate_many(REQUESTS), client.batch_supported
+
+    with StubServer(batch=True) as stub:
+        assert asyncio.run(go(stub.url)) == (seeds, True)
+        assert [path for path, _ in stub.seen] == ["/v1/brackets/batch"]
+    with StubServer(batch=False) as stub:
+        assert asyncio.run(go(stub.url)) == (seeds, False)
@@ -0,0 +1,44 @@
+import pytest
+
+from app.fairness import main, meetings_per_round, run_simulation, summarize, write_csv
+
+
+def make_payload(n=12):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": False},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % 3}", "nation_code": "ITA", "ranking_points": 100 - i}
+            for i in range(n)
+        ],
+    }
+
+
+def test_meetings_per_round():
+    slots = ["a", "b", "c", "d", "e", None, "g", "h"]
+    clubs = {"a": "x", "b": "x", "c": "x", "e": "x", "g": "y", "h": "y"}
+    # a-b, g-h meet in R1; a-c, b-c in R2; a-e, b-e, c-e in R3
+    assert meetings_per_round(slots, clubs, 3) == [2, 2, 3]
+
+
+def test_simulation_is_reproducible_and_complete():
+    rows = run_simulation(make_payload(), runs=20, jobs=1, seed="t")
+    assert [row["run"] for row in rows] == list(range(20))
+    assert rows == run_simulation(make_payload(), runs=20, jobs=1, seed="t")
+    # 12 athletes in 3 clubs of 4 -> 18 same-club pairs per draw
+    assert all(sum(row[f"club_meetings_r{r}"] for r in range(1, 5)) == 18 for row in rows)
+
+
+def test_summary_histograms():
+    summary = summarize(run_simulation(make_payload(), runs=10, jobs=1))
+    assert summary["runs"] == 10
+    assert sum(summary["metrics"]["score"]["histogram"].values()) == 10
+    assert 0.0 <= summary["metrics"]["club_meetings_r1"]["p_at_least_one"] <= 1.0
+
+
+def test_cli_rejects_zero_runs(tmp_path):
+    with pytest.raises(SystemExit) as exc:
+        main(["payload.json", "--runs", "0", "--csv", str(tmp_path / "out.csv")])
+    assert exc.value.code == 2
+    write_csv([], str(tmp_path / "empty.csv"))
+    assert (tmp_path / "empty.csv").read_text() == ""
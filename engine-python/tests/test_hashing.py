@@ -0,0 +1,56 @@
+from app import diff_brackets, generate, patch_bracket
+from app.hashing import hash_bracket
+from app.models import PatchBracketRequest
+
+
+def make_request(n=12, draw_seed="hash_test"):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": True, "draw_seed": draw_seed},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % 4}", "ranking_points": 100 - i}
+            for i in range(n)
+        ],
+    }
+
+
+def test_hashes_are_stable_and_complete():
+    result = generate(make_request())
+    assert result == generate(make_request())
+    assert all(m.hash and m.subtree_hash for m in result.matches)
+    assert all(m.hash for m in result.repechage_matches)
+    assert len(result.hashes.rounds) == result.summary.rounds
+    # Recomputing from scratch gives the same hashes
+    rehashed = hash_bracket(result, changed_ids=[m.id for m in result.matches])
+    assert rehashed.hashes == result.hashes
+
+
+def test_identical_results_diff_in_one_comparison():
+    result = generate(make_request())
+    assert diff_brackets(result, result.model_dump()) == {"unchanged": True, "changed": [], "added": [], "removed": []}
+
+
+def test_patch_diff_matches_changed_matches():
+    request_data = make_request()
+    previous = generate(request_data)
+    patched = patch_bracket(PatchBracketRequest(**request_data, previous=previous, withdraw=["P5"]))
+
+    diff = diff_brackets(previous, patched.result)
+    assert diff["unchanged"] is False
+    assert diff["changed"] == sorted(m.id for m in patched.changed_matches)
+    assert diff["added"] == diff["removed"] == []
+
+    # The change propagates to the root but not to untouched rounds
+    final = next(m for m in patched.result.matches if m.match_type == "final")
+    old_final = next(m for m in previous.matches if m.match_type == "final")
+    assert final.hash == old_final.hash
+    assert final.subtree_hash != old_final.subtree_hash
+    assert patched.result.hashes.rounds[1:] == previous.hashes.rounds[1:]
+
+
+def test_diff_reports_added_and_removed_on_redraw():
+    old = generate(make_request(8, draw_seed="a"))
+    new = generate(make_request(8, draw_seed="b"))
+    diff = diff_brackets(old, new)
+    assert sorted(diff["added"]) == sorted([m.id for m in new.matches] + [m.id for m in new.repechage_matches])
+    assert len(diff["removed"]) == len(old.matches) + len(old.repechage_matches)
@@ -0,0 +1,149 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import hashlib
+import hmac
+import io
+import json
+import re
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.jobs import Job, JobStore, SqliteJobStore, Webhooks, engine_request, open_store, run
+from app.main import app
+from benchmarks.synthetic_event import EventSpec, write_sql
+
+SEED_DB = Path(__file__).resolve().parents[2] / "orchestrator-ts" / "scripts" / "seed_db.sql"
+SPEC = EventSpec(athletes=120, divisions=6, seed=11)
+HEADERS = {"Authorization": "Bearer test"}
+
+
+class _Receiver(BaseHTTPRequestHandler):
+    server: "Receiver"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        expected = "sha256=" + hmac.new(b"shared", body, hashlib.sha256).hexdigest()
+        assert self.headers["X-Athlos-Signature"] == expected
+        self.server.deliveries.append((self.headers["X-Athlos-Event"], json.loads(body)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class Receiver(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Receiver)
+        self.deliveries = []
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/webhook"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def seeded_store(path: Path, events: int = 2) -> SqliteJobStore:
+    out = io.StringIO()
+    write_sql(SPEC, out, events=events)
+    store = open_store(f"sqlite:///{path}")
+    store.init(out.getvalue())
+    return store
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_runner_stores_what_the_engine_api_returns(tmp_path, jobs):
+    store = seeded_store(tmp_path / "queue.db")
+    with Receiver() as receiver:
+        assert store.enqueue(1, receiver.url, "shared") == (6, 0)
+        assert store.enqueue(2, receiver.url, "shared") == (6, 0)
+        assert store.enqueue(1, receiver.url, "shared") == (0, 6)
+        counts = run(store, batch_size=4, jobs=jobs, drain=True, webhooks=Webhooks(backoff_s=0))
+    assert counts == {"batches": 3, "generated": 12, "failed": 0}
+    db = store.connection
+    assert db.execute("SELECT status, COUNT(*) FROM bracket_jobs GROUP BY status").fetchall() == [("success", 12)]
+
+    # One stored bracket, checked against the HTTP API with the orchestrator's request
+    [(job_id, event_id, division_id)] = db.execute(
+        "SELECT id, event_id, division_id FROM bracket_jobs WHERE event_id = 2 ORDER BY id LIMIT 1"
+    ).fetchall()
+    job = Job(job_id, event_id, division_id, None, None, {})
+    request = engine_request(job, store.participants([job])[(event_id, division_id)])
+    expected = TestClient(app).post("/v1/brackets/generate", json=request, headers=HEADERS).json()
+    [(bracket_id, stored)] = db.execute(
+        "SELECT id, engine_result FROM brackets WHERE event_id = ? AND division_id = ?", (event_id, division_id)
+    ).fetchall()
+    assert json.loads(stored) == expected
+    assert db.execute("SELECT COUNT(*) FROM matches WHERE bracket_id = ?", (bracket_id,)).fetchone() == (
+        len(expected["matches"]) + len(expected["repechage_matches"]),
+    )
+    assert db.execute("SELECT COUNT(*) FROM bracket_participants WHERE bracket_id = ?", (bracket_id,)).fetchone() == (
+        len(expected["participants_slots"]),
+    )
+
+    events = sorted((event, (p["event_id"], p["division_id"])) for event, p in receiver.deliveries)
+    assert len(events) == 12 and {event for event, _ in events} == {"bracket.generated"}
+    assert len(set(events)) == 12
+
+
+def test_failures_are_recorded_and_undeliverable_webhooks_dead_lettered(tmp_path):
+    store = seeded_store(tmp_path / "queue.db", events=1)
+    # Nothing listens on this port, so every delivery fails
+    assert store.enqueue(1, "http://127.0.0.1:9/webhook", "shared", {"repechage": "sometimes"}) == (6, 0)
+    assert run(store, batch_size=32, drain=True, webhooks=Webhooks(backoff_s=0)) == {
+        "batches": 1, "generated": 0, "failed": 6,
+    }
+    db = store.connection
+    rows = db.execute("SELECT status, data FROM bracket_jobs").fetchall()
+    assert {status for status, _ in rows} == {"failed"}
+    assert all(json.loads(data)["error"].startswith("INVALID_REQUEST") for _, data in rows)
+    assert db.execute("SELECT COUNT(*) FROM brackets").fetchone() == (0,)
+    letters = db.execute("SELECT job_id, payload, retry_count FROM webhook_dead_letters ORDER BY job_id").fetchall()
+    assert [job_id for job_id, _, _ in letters] == list(range(1, 7))
+    assert {json.loads(payload)["event"] for _, payload, _ in letters} == {"bracket.failed"}
+    assert {retries for _, _, retries in letters} == {3}
+
+
+def test_concurrent_claims_do_not_overlap(tmp_path):
+    store = seeded_store(tmp_path / "queue.db", events=4)
+    for event_id in range(1, 5):
+        store.enqueue(event_id, None, None)
+    stores = [open_store(f"sqlite:///{tmp_path / 'queue.db'}") for _ in range(4)]
+    claimed = [[] for _ in stores]
+
+    def claim(i):
+        while batch := stores[i].claim(3):
+            claimed[i].extend(job.job_id for job in batch)
+
+    threads = [threading.Thread(target=claim, args=(i,)) for i in range(len(stores))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [job_id for c in claimed for job_id in c]
+    assert sorted(ids) == list(range(1, 25))
+
+
+def test_sqlite_schema_has_the_orchestrator_columns(tmp_path):
+    store = open_store(f"sqlite:///{tmp_path / 'queue.db'}")
+    store.init()
+    schema = SEED_DB.read_text(encoding="utf-8")
+    tables = re.findall(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\n\);", schema, re.S)
+    assert len(tables) == 9
+    for table, body in tables:
+        columns = [line.split()[0] for line in body.strip().splitlines()
+                   if line.strip() and not line.strip().startswith(("--", "PRIMARY KEY"))]
+        info = store.connection.execute(f"PRAGMA table_info({table})").fetchall()
+        assert [row[1] for row in info] == columns, table
+
+
+def test_job_store_requires_a_dialect():
+    with pytest.raises(TypeError):
+        JobStore(None)
@@ -0,0 +1,25 @@
+import asyncio
+
+from benchmarks.load import Scenario, percentile, run_load, spawn_engine
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 95) == 7
+    assert percentile([], 50) == 0
+
+
+def test_load_run_against_local_engine():
+    mix = [Scenario("tiny", 6, clubs=2), Scenario("pool", 5, format="round_robin")]
+    with spawn_engine() as engine:
+        report = asyncio.run(run_load(engine.url, mix, concurrency=3, requests=24, variants=2))
+    assert report["requests"] == 24
+    assert report["statuses"] == {"200": 24}
+    assert report["error_rate"] == 0
+    assert report["latency"]["count"] == 24
+    assert report["latency"]["p50_ms"] <= report["latency"]["p99_ms"] <= report["latency"]["max_ms"]
+    # Two payloads per scenario: everything after the first response of each is a repeat
+    assert report["determinism"]["checks"] == 24 - 4
+    assert report["determinism"]["mismatches"] == []
@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+def make_request(n=12):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": False, "draw_seed": "patch_test"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % 4}", "ranking_points": 100 - i}
+            for i in range(n)
+        ],
+    }
+
+
+def generate(request_data):
+    response = client.post("/v1/brackets/generate", json=request_data, headers=HEADERS)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_withdraw_only_touches_its_match():
+    request_data = make_request()
+    previous = generate(request_data)
+    response = client.post("/v1/brackets/patch", json={**request_data, "previous": previous, "withdraw": ["P7"]}, headers=HEADERS)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["full_redraw"] is False
+    assert len(data["changed_matches"]) == 1
+    changed = data["changed_matches"][0]
+    assert changed["is_bye"] is True
+    assert "P7" not in (changed["athlete_red"], changed["athlete_white"])
+
+    result = data["result"]
+    assert result["summary"]["participants"] == 11
+    # Ancestors only get a new subtree_hash; their content is untouched
+    def content(matches):
+        return [{k: v for k, v in m.items() if k != "subtree_hash"} for m in matches if m["id"] != changed["id"]]
+    assert content(result["matches"]) == content(previous["matches"])
+
+
+def test_late_entry_fills_a_bye_avoiding_club_mates():
+    request_data = make_request()
+    previous = generate(request_data)
+    late = {"athlete_id": "LATE", "club_id": "C0", "ranking_points": 1}
+    response = client.post("/v1/brackets/patch", json={**request_data, "previous": previous, "add": [late]}, headers=HEADERS)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["full_redraw"] is False
+    [changed] = data["changed_matches"]
+    opponent = changed["athlete_white"] if changed["athlete_red"] == "LATE" else changed["athlete_red"]
+    clubs = {p["athlete_id"]: p["club_id"] for p in request_data["participants"]}
+    assert opponent is None or clubs[opponent] != "C0"
+
+    # Seeds keep their slots
+    seeded_before = {s["athlete_id"]: s["slot"] for s in previous["participants_slots"] if s["seed"]}
+    seeded_after = {s["athlete_id"]: s["slot"] for s in data["result"]["participants_slots"] if s["seed"]}
+    assert seeded_after == seeded_before
+
+
+def test_size_change_falls_back_to_full_redraw():
+    request_data = make_request(8)
+    previous = generate(request_data)
+    late = {"athlete_id": "LATE", "club_id": "C9"}
+    response = client.post("/v1/brackets/patch", json={**request_data, "previous": previous, "add": [late]}, headers=HEADERS)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["full_redraw"] is True
+    assert data["result"]["summary"]["size"] == 16
+
+
+def test_patch_rejects_unknown_withdrawal():
+    request_data = make_request()
+    previous = generate(request_data)
+    response = client.post("/v1/brackets/patch", json={**request_data, "previous": previous, "withdraw": ["nobody"]}, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "UNKNOWN_ATHLETE_IDS"
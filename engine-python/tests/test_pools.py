@@ -0,0 +1,140 @@
+import json
+from collections import Counter
+from itertools import combinations
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from app import EngineError, generate, generate_pools
+from app.main import app
+from app.pools import circle_rounds, knockout_entries
+
+client = TestClient(app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+def make_request(n=12, fmt="pools", clubs=4, **context):
+    return {
+        "context": {"sport": "kata", "format": fmt, "draw_seed": "pools_test", **context},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % clubs}", "ranking_points": 100 - i}
+            for i in range(n)
+        ],
+    }
+
+
+@pytest.mark.parametrize("n", [2, 5, 8, 13])
+def test_circle_method_pairs_everyone_once(n):
+    rounds = list(circle_rounds(n))
+    assert len(rounds) == (n - 1 if n % 2 == 0 else n)
+    pairs = [frozenset(pair) for r in rounds for pair in r]
+    assert sorted(pairs, key=sorted) == sorted(map(frozenset, combinations(range(n), 2)), key=sorted)
+    for r in rounds:
+        athletes = [a for pair in r for a in pair]
+        assert len(athletes) == len(set(athletes))
+
+
+def test_round_robin_fixtures_are_lazy_and_complete():
+    draw = generate_pools(make_request(64, fmt="round_robin"))
+    assert draw.summary.pools == 1
+    assert draw.summary.fixtures == 64 * 63 // 2
+    assert draw.summary.rounds == 63
+
+    fixtures = draw.fixtures()
+    first = next(fixtures)
+    assert first.match_type == "pool" and first.round == 1
+    matches = [first, *fixtures]
+    assert len(matches) == draw.summary.fixtures
+    assert len({m.id for m in matches}) == len(matches)
+    assert len({frozenset((m.athlete_red, m.athlete_white)) for m in matches}) == len(matches)
+
+
+def test_pools_spread_seeds_and_clubs():
+    draw = generate_pools(make_request(12, clubs=4, pools=3))
+    assert [len(p.athletes) for p in draw.pools] == [4, 4, 4]
+    # Top four ranked athletes snake over the pools
+    assert [p.athletes[0] for p in draw.pools] == ["P0", "P1", "P2"]
+    assert "P3" in draw.pools[2].athletes
+    # Four clubs of three athletes: every pool gets one athlete of each club
+    assert draw.summary.club_collisions == 0
+
+
+def test_pool_seeding_respects_thresholds_and_capacity():
+    capped = make_request(12, clubs=1, pools=2)
+    capped["rules"] = {"seeding_mode": "auto", "max_seeds": 8, "seeding_thresholds": {"lt_16": 2}}
+    two_seeds = make_request(12, clubs=1, pools=2)
+    two_seeds["rules"] = {"seeding_mode": "auto", "max_seeds": 2}
+    assert generate_pools(capped).pools == generate_pools(two_seeds).pools
+
+    # Seven seeds snaked over pools of 4 and 3 would give the second pool four
+    request = make_request(7, pools=2)
+    request["rules"] = {"seeding_mode": "manual"}
+    for i, p in enumerate(request["participants"]):
+        p["seed"] = i + 1
+    draw = generate_pools(request)
+    assert [len(p.athletes) for p in draw.pools] == [4, 3]
+    assert draw.pools[0].athletes == ["P0", "P3", "P4", "P6"]
+
+
+def test_knockout_crossover():
+    assert knockout_entries(2, 2) == ["A1", "B2", "B1", "A2"]
+    entries = knockout_entries(4, 2)
+    for pool in "ABCD":
+        # Winner and runner-up of a pool are in opposite halves
+        assert (entries.index(f"{pool}1") < 4) != (entries.index(f"{pool}2") < 4)
+    # Byes go to pool winners
+    entries = knockout_entries(3, 2)
+    byes = [entries[i ^ 1] for i, e in enumerate(entries) if e is None]
+    assert sorted(byes) == ["A1", "B1"]
+
+
+def test_pools_knockout_structure():
+    draw = generate_pools(make_request(20, pools=4, pool_qualifiers=2))
+    knockout = draw.knockout
+    assert draw.summary.knockout_size == 8
+    assert len(knockout) == 7
+    assert knockout[-1].match_type == "final"
+    assert all(m.next_match_id for m in knockout[:-1])
+    fixture_ids = {m.id for m in draw.fixtures()}
+    assert not fixture_ids & {m.id for m in knockout}
+    assert Counter(m.metadata["red_from"][1] for m in knockout if m.round == 1) == {"1": 4}
+
+
+def test_stream_matches_materialized_response():
+    draw = generate_pools(make_request(30, pools=3))
+    body = b"".join(draw.iter_json(batch=7))
+    assert json.loads(body) == json.loads(draw.to_response().model_dump_json())
+
+
+def test_pool_validation_errors():
+    with pytest.raises(EngineError) as e:
+        generate_pools(make_request(8, pools=5))
+    assert e.value.code == "INVALID_POOLS"
+    with pytest.raises(EngineError) as e:
+        generate_pools(make_request(8, pools=2, pool_qualifiers=5))
+    assert e.value.code == "INVALID_POOL_QUALIFIERS"
+    with pytest.raises(EngineError) as e:
+        generate(make_request(8))
+    assert e.value.code == "UNSUPPORTED_FORMAT"
+
+
+def test_generate_endpoint_streams_pools():
+    request = make_request(16, fmt="round_robin")
+    response = client.post("/v1/brackets/generate", json=request, headers=HEADERS)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["summary"]["fixtures"] == 120
+    assert len(data["matches"]) == 120
+    assert data == generate_pools(request).to_response().model_dump(mode="json")
+
+    packed = client.post("/v1/brackets/generate", json=request, headers={**HEADERS, "Accept": "application/msgpack"})
+    assert msgpack.unpackb(packed.content) == data
+
+    response = client.post("/v1/brackets/generate?format=columnar", json=request, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "UNSUPPORTED_RESPONSE_FORMAT"
+    response = client.post("/v1/brackets/generate", json=make_request(8, pools=5), headers=HEADERS)
+    assert response.json()["error"]["code"] == "INVALID_POOLS"
@@ -0,0 +1,122 @@
+from typing import List
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core as core
+import app.main as main
+from app.models import History, Participant, Rules
+from app.profiles import ProfileStore, compile_rules
+
+client = TestClient(main.app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+RULES = {"seeding_mode": "auto", "max_seeds": 4, "separate_by": ["club", "nation"]}
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = ProfileStore()
+    monkeypatch.setattr(main, "profiles", store)
+    monkeypatch.setattr(core, "profiles", store)
+    return store
+
+
+def make_request(**source):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "draw_seed": "profile_test"},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % 3}", "nation_code": f"N{i % 2}", "ranking_points": 100 - i}
+            for i in range(12)
+        ],
+        **source,
+    }
+
+
+def reference_penalty(slot: int, participant: Participant, slots: List, all_participants: List[Participant], rules: Rules, history: History) -> float:
+    """The pre-compilation slot penalty, kept as the oracle for ``bind``."""
+    penalty = 0.0
+    # Find opponent in round 1
+    opponent_slot = slot ^ 1  # XOR for paired slots
+    if opponent_slot < len(slots) and slots[opponent_slot]:
+        opponent_id = slots[opponent_slot]
+        opponent = next((p for p in all_participants if p.athlete_id == opponent_id), None)
+        if opponent:
+            # Club collision
+            if rules.separate_by and 'club' in rules.separate_by and participant.club_id and opponent.club_id == participant.club_id:
+                penalty += rules.penalties.same_club_r1
+            # Nation collision
+            if rules.separate_by and 'nation' in rules.separate_by and participant.nation_code and opponent.nation_code == participant.nation_code:
+                penalty += rules.penalties.same_nation_r1
+            # Rematch
+            for pair in history.recent_pairs:
+                if (pair.a == participant.athlete_id and pair.b == opponent.athlete_id) or (pair.a == opponent.athlete_id and pair.b == participant.athlete_id):
+                    # Check date
+                    penalty += rules.penalties.rematch_recent
+    return penalty
+
+
+def test_compiled_penalty_matches_reference():
+    rng = random.Random(7)
+    participants = [
+        Participant(athlete_id=f"A{i}", club_id=rng.choice([None, "C1", "C2"]), nation_code=rng.choice([None, "FRA", "JPN"]))
+        for i in range(16)
+    ]
+    history = History(recent_pairs=[{"a": "A1", "b": "A2", "date": "2024-01-01"}, {"a": "A2", "b": "A1", "date": "2024-02-01"}])
+    for separate_by in ([], ["club"], ["nation"], ["club", "nation"]):
+        rules = Rules(separate_by=separate_by)
+        penalty = compile_rules(rules).bind(participants, history)
+        for _ in range(200):
+            slots = [rng.choice([None] + [p.athlete_id for p in participants]) for _ in range(16)]
+            slot, participant = rng.randrange(16), rng.choice(participants)
+            assert penalty(slot, participant, slots) == reference_penalty(slot, participant, slots, participants, rules, history)
+
+
+def test_compiled_rules_are_cached():
+    assert compile_rules(Rules(max_seeds=4)) is compile_rules(Rules(max_seeds=4))
+    assert compile_rules(Rules(max_seeds=4)) is not compile_rules(Rules(max_seeds=2))
+
+
+def test_profile_request_matches_inline_rules():
+    response = client.put("/v1/profiles/judo-senior", json=RULES, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json()["rules"]["separate_by"] == ["club", "nation"]
+
+    inline = client.post("/v1/brackets/generate", json=make_request(rules=RULES), headers=HEADERS)
+    by_profile = client.post("/v1/brackets/generate", json=make_request(profile_id="judo-senior"), headers=HEADERS)
+    assert inline.status_code == 200 and by_profile.status_code == 200
+    assert by_profile.json() == inline.json()
+
+    assert client.get("/v1/profiles", headers=HEADERS).json() == {"profiles": ["judo-senior"]}
+    assert client.get("/v1/profiles/judo-senior", headers=HEADERS).json()["profile_id"] == "judo-senior"
+
+
+def test_unknown_profile():
+    response = client.post("/v1/brackets/generate", json=make_request(profile_id="missing"), headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "UNKNOWN_PROFILE"
+    assert client.get("/v1/profiles/missing", headers=HEADERS).status_code == 404
+
+
+def test_rules_and_profile_are_exclusive():
+    response = client.post("/v1/brackets/generate", json=make_request(rules=RULES, profile_id="judo-senior"), headers=HEADERS)
+    assert response.status_code == 422
+
+
+def test_invalid_profile_id():
+    response = client.put("/v1/profiles/bad%20id", json=RULES, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "INVALID_PROFILE_ID"
+
+
+def test_profiles_shared_through_directory(tmp_path):
+    writer, reader = ProfileStore(str(tmp_path)), ProfileStore(str(tmp_path))
+    writer.register("kata", Rules(max_seeds=2))
+    assert reader.get("kata").rules.max_seeds == 2
+    assert reader.ids() == ["kata"]
+
+    writer.register("kata", Rules(max_seeds=4))
+    assert reader.get("kata").rules.max_seeds == 4
+    assert reader.get("other") is None
@@ -0,0 +1,187 @@
+from collections import Counter
+from contextlib import contextmanager
+import json
+import socket
+import threading
+import time
+
+import msgpack
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+from app.proxy import HashRing, Router, routing_key
+from app.warmup import WARMUP_REQUESTS
+from benchmarks.load import spawn_engine
+from engine_client import EngineClient
+
+HEADERS = {"Authorization": "Bearer test"}
+REQUESTS = [body for path, body in WARMUP_REQUESTS if path == "/v1/brackets/generate"]
+
+
+@pytest.fixture(scope="module")
+def engines():
+    with spawn_engine(env={"ENGINE_WARMUP": "0"}) as a, spawn_engine(env={"ENGINE_WARMUP": "0"}) as b:
+        yield [a.url, b.url]
+
+
+def closed_port_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+@contextmanager
+def serve(app):
+    """``app`` on a free local port, in a thread (for clients that need a socket)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def test_ring_moves_only_the_keys_of_a_down_node():
+    nodes = [f"http://10.0.0.{i}:8000" for i in range(4)]
+    ring = HashRing(nodes)
+    keys = [f"division-{i}".encode() for i in range(20000)]
+    home = {key: ring.lookup(key) for key in keys}
+    shares = Counter(home.values())
+    assert all(0.18 < shares[node] / len(keys) < 0.32 for node in nodes)
+
+    moved = {key: ring.lookup(key, down={nodes[0]}) for key in keys if home[key] == nodes[0]}
+    assert all(ring.lookup(key, down={nodes[0]}) == home[key] for key in keys if home[key] != nodes[0])
+    assert nodes[0] not in moved.values()
+    assert len(set(moved.values())) == 3  # spread over the others, not dumped on one
+    assert ring.lookup(b"any", down=set(nodes)) is None
+
+
+def test_routing_key_ignores_encoding_and_key_order():
+    request = REQUESTS[0]
+    compact = json.dumps(request, separators=(",", ":")).encode()
+    reordered = json.dumps(dict(reversed(list(request.items()))), indent=2).encode()
+    packed = msgpack.packb(request, use_bin_type=True)
+    path = "/v1/brackets/generate"
+    key = routing_key("POST", path, "", {"content-type": "application/json"}, compact)
+    assert routing_key("POST", path, "", {"content-type": "application/json"}, reordered) == key
+    assert routing_key("POST", path, "", {"content-type": "application/msgpack"}, packed) == key
+    assert routing_key("POST", path, "format=columnar", {"content-type": "application/json"}, compact) != key
+    # A key does not split identical bodies; it only names bodiless requests
+    assert routing_key("POST", path, "", {"content-type": "application/json", "idempotency-key": "k1"}, compact) == key
+    assert routing_key("GET", "/v1/registry", "", {"idempotency-key": "k1"}, b"") == b"idempotency:k1"
+    assert routing_key("POST", "/v1/live/final-a/results", "", {}, b"{}") == routing_key("GET", "/v1/live/final-a", "", {}, b"")
+
+
+def test_repeats_stick_to_one_instance(engines):
+    with TestClient(Router(engines)) as client:
+        shards = []
+        for _ in range(3):
+            for request in REQUESTS:
+                response = client.post("/v1/brackets/generate", json=request, headers=HEADERS)
+                assert response.status_code == 200
+                shards.append(response.headers["x-engine-shard"])
+        first = shards[:len(REQUESTS)]
+        assert shards == first * 3
+        with TestClient(Router([first[0]])) as direct:
+            expected = direct.post("/v1/brackets/generate", json=REQUESTS[0], headers=HEADERS).content
+        assert client.post("/v1/brackets/generate", json=REQUESTS[0], headers=HEADERS).content == expected
+
+        stats = {s["url"]: s for s in client.get("/proxy/stats").json()["shards"]}
+        assert sum(s["requests"] for s in stats.values()) == 3 * len(REQUESTS) + 1
+        assert sum(s["hits"] for s in stats.values()) == 2 * len(REQUESTS) + 1
+
+        # Profiles are registered on every instance
+        rules = {"seeding_mode": "auto", "max_seeds": 4}
+        assert client.put("/v1/profiles/proxy-test", json=rules, headers=HEADERS).status_code == 200
+        for url in engines:
+            with TestClient(Router([url])) as single:
+                assert single.get("/v1/profiles/proxy-test", headers=HEADERS).status_code == 200
+
+
+def test_sdk_repeats_stick_to_one_instance(engines):
+    # The SDK puts a fresh Idempotency-Key on every call; identical divisions must still share a shard
+    router = Router(engines)
+    with serve(router) as url, EngineClient(url) as client:
+        first = client.generate(REQUESTS[0])
+        for _ in range(5):
+            assert client.generate(REQUESTS[0]) == first
+    stats = router.stats()["shards"]
+    assert sorted(s["requests"] for s in stats) == [0, 6]
+    assert sum(s["hits"] for s in stats) == 5
+
+
+def test_down_instance_hands_off_to_the_next_on_the_ring(engines):
+    dead = closed_port_url()
+    router = Router(engines + [dead], retry_after=60)
+    with TestClient(router) as client:
+        for i, request in enumerate(REQUESTS * 4):
+            body = {**request, "context": {**request["context"], "draw_seed": f"handoff-{i}"}}
+            response = client.post("/v1/brackets/generate", json=body, headers=HEADERS)
+            assert response.status_code == 200
+            assert response.headers["x-engine-shard"] in engines
+        stats = {s["url"]: s for s in client.get("/proxy/stats").json()["shards"]}
+        assert stats[dead]["up"] is False and stats[dead]["errors"] == 1
+        assert sum(s["handoffs"] for s in stats.values()) >= 1
+        assert client.get("/health").json() == {"status": "ok", "shards_up": 2}
+
+    with TestClient(Router([dead])) as client:
+        response = client.post("/v1/brackets/generate", json=REQUESTS[0], headers=HEADERS)
+        assert response.status_code == 502
+        assert response.json()["error"]["code"] == "UPSTREAM_UNAVAILABLE"
+        assert client.get("/health").status_code == 503
+
+
+def test_live_routes_are_never_handed_off(engines):
+    dead = closed_port_url()
+    router = Router(engines + [dead], retry_after=60)
+
+    def home(live_id):
+        return router.ring.candidates(b"live:" + live_id.encode())[0]
+
+    stranded = next(f"final-{i}" for i in range(1000) if home(f"final-{i}") == dead)
+    kept = next(f"final-{i}" for i in range(1000) if home(f"final-{i}") != dead)
+    with TestClient(Router(engines[:1])) as direct:
+        bracket = direct.post("/v1/brackets/generate", json=REQUESTS[0], headers=HEADERS).json()
+
+    with TestClient(router) as client:
+        response = client.put(f"/v1/live/{kept}", json=bracket, headers=HEADERS)
+        assert response.status_code == 200 and response.headers["x-engine-shard"] == home(kept)
+        assert client.get(f"/v1/live/{kept}", headers=HEADERS).status_code == 200
+
+        # One attempt on the home instance, no second copy elsewhere
+        response = client.put(f"/v1/live/{stranded}", json=bracket, headers=HEADERS)
+        assert response.status_code == 502
+        assert response.json()["error"]["code"] == "UPSTREAM_UNAVAILABLE"
+        stats = {s["url"]: s for s in client.get("/proxy/stats").json()["shards"]}
+        assert stats[dead]["errors"] == 1
+        assert sum(stats[url]["requests"] for url in engines) == 2
+        assert sum(s["handoffs"] for s in stats.values()) == 0
+
+        router.shards[dead].down_until = time.monotonic() + 60
+        response = client.get(f"/v1/live/{stranded}", headers=HEADERS)
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) > 0
+
+
+def test_percent_encoded_paths_are_forwarded_as_sent():
+    seen = []
+
+    async def upstream(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        seen.append((scope["raw_path"], scope["query_string"]))
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    with serve(upstream) as url, TestClient(Router([url])) as client:
+        assert client.get("/v1/profiles/club%2Fnation?x=a%20b", headers=HEADERS).status_code == 200
+        assert client.get("/v1/live/final%2F1", headers=HEADERS).status_code == 200
+    assert seen == [(b"/v1/profiles/club%2Fnation", b"x=a%20b"), (b"/v1/live/final%2F1", b"")]
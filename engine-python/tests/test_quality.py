@@ -0,0 +1,91 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app, Participant
+from app.quality import evaluate_bracket, evaluate_brackets
+
+client = TestClient(app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+def make_request(n, clubs=3, draw_seed="quality_eval"):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": False, "draw_seed": draw_seed},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % clubs}", "nation_code": ["ITA", "FRA"][i % 2],
+             "ranking_points": 1000 - i}
+            for i in range(n)
+        ],
+    }
+
+
+def test_evaluate_bracket_counts_collisions():
+    participants = [
+        Participant(athlete_id="a", club_id="c1", nation_code="ITA"),
+        Participant(athlete_id="b", club_id="c1", nation_code="FRA"),
+        Participant(athlete_id="c", club_id="c2", nation_code="ESP"),
+        Participant(athlete_id="d", club_id="c3", nation_code="ESP"),
+    ]
+    quality = evaluate_bracket(["a", "b", "c", "d"], participants, {1: "a", 2: "c"})
+    assert quality["club_collisions_r1"] == 1
+    assert quality["nation_collisions_r1"] == 1
+    assert quality["seed_protection"] == 1.0
+    assert quality["bye_fairness"] == 1.0
+    assert quality["score"] == 100
+
+
+def test_evaluate_brackets_mixed_sizes_keep_order():
+    small = [Participant(athlete_id=f"s{i}", club_id="same") for i in range(4)]
+    large = [Participant(athlete_id=f"l{i}", club_id=f"c{i}") for i in range(6)]
+    results = evaluate_brackets([
+        {"slots": [p.athlete_id for p in small], "participants": small, "seeds": {}},
+        {"slots": [p.athlete_id for p in large] + [None, None], "participants": large, "seeds": {}},
+        {"slots": ["l0", None, "l1", "l2", "l3", "l4", "l5", None], "participants": large, "seeds": {}},
+    ])
+    assert results[0]["club_collisions_r1"] == 2
+    assert results[1]["club_collisions_r1"] == 0
+    assert results[1]["bye_fairness"] == 1.0
+    assert results[2]["bye_fairness"] == 0.8
+
+
+def test_evaluate_endpoint_matches_generated_summary():
+    brackets = []
+    expected = []
+    for n in (5, 8, 13):
+        request_data = make_request(n, draw_seed=f"eval_{n}")
+        response = client.post("/v1/brackets/generate", json=request_data, headers=HEADERS)
+        assert response.status_code == 200
+        data = response.json()
+        brackets.append({
+            "participants": request_data["participants"],
+            "participants_slots": data["participants_slots"],
+            "size": data["summary"]["size"],
+        })
+        expected.append(data["summary"]["quality"])
+
+    response = client.post("/v1/brackets/evaluate", json={"brackets": brackets}, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json()["results"] == expected
+
+
+def test_evaluate_endpoint_rejects_out_of_range_slots():
+    response = client.post("/v1/brackets/evaluate", json={"brackets": [{
+        "participants": [{"athlete_id": "a"}, {"athlete_id": "b"}],
+        "participants_slots": [{"athlete_id": "a", "slot": 1}, {"athlete_id": "b", "slot": 9}],
+        "size": 4,
+    }]}, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "INVALID_SLOTS"
+
+
+@pytest.mark.parametrize("size", [1, 512, 2 ** 24])
+def test_evaluate_endpoint_rejects_sizes_the_draw_cannot_produce(size):
+    response = client.post("/v1/brackets/evaluate", json={"brackets": [{
+        "participants": [{"athlete_id": "a"}],
+        "participants_slots": [{"athlete_id": "a", "slot": 1}],
+        "size": size,
+    }]}, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "INVALID_SLOTS"
+    assert response.json()["error"]["details"]["size"] == size
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.cli import main as cli_main
+from app.models import Participant
+from app.registry import AthleteRegistry, RegistryHolder, write_registry
+
+client = TestClient(main.app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+ATHLETES = [
+    {"athlete_id": f"A{i}", "club_id": f"C{i % 5}", "nation_code": ["FRA", "JPN", "BRA"][i % 3],
+     "ranking_points": 500 - i * 7, "meta": {"belt": "black"} if i % 4 == 0 else None}
+    for i in range(40)
+]
+ATHLETES.append({"athlete_id": "NEWCOMER"})
+
+
+@pytest.fixture
+def registry_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "registry.bin")
+    write_registry(ATHLETES, path)
+    monkeypatch.setattr(main, "registry", RegistryHolder(path))
+    return path
+
+
+def make_request(participants):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "repechage": False, "draw_seed": "registry_test"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": participants,
+    }
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "registry.bin")
+    assert write_registry(ATHLETES, path) == len(ATHLETES)
+    registry = AthleteRegistry(path)
+    assert registry.count == len(ATHLETES)
+
+    rows = registry.rows(["A3", "missing", "NEWCOMER", "A0"])
+    assert rows[1] == -1
+    assert registry.record(int(rows[0])) == {"club_id": "C3", "nation_code": "FRA", "ranking_points": 479, "meta": None}
+    assert registry.record(int(rows[2])) == {"club_id": None, "nation_code": None, "ranking_points": None, "meta": None}
+    assert registry.record(int(rows[3]))["meta"] == {"belt": "black"}
+
+
+def test_resolve_keeps_explicit_overrides(tmp_path):
+    path = str(tmp_path / "registry.bin")
+    write_registry(ATHLETES, path)
+    registry = AthleteRegistry(path)
+
+    resolved = registry.resolve([
+        Participant(athlete_id="A1"),
+        Participant(athlete_id="A2", club_id="OTHER", ranking_points=None),
+        Participant(athlete_id="unknown"),
+    ])
+    assert resolved[0].club_id == "C1" and resolved[0].ranking_points == 493
+    assert resolved[1].club_id == "OTHER" and resolved[1].ranking_points is None
+    assert resolved[1].nation_code == "BRA"
+    assert resolved[2] == Participant(athlete_id="unknown")
+
+
+def test_ids_only_request_matches_full_records(registry_path):
+    full = [{k: v for k, v in a.items() if v is not None} for a in ATHLETES[:16]]
+    ids_only = [{"athlete_id": a["athlete_id"]} for a in ATHLETES[:16]]
+
+    with_records = client.post("/v1/brackets/generate", json=make_request(full), headers=HEADERS)
+    with_ids = client.post("/v1/brackets/generate", json=make_request(ids_only), headers=HEADERS)
+    assert with_records.status_code == 200 and with_ids.status_code == 200
+    assert with_ids.json() == with_records.json()
+
+
+def test_registry_not_configured(monkeypatch):
+    monkeypatch.setattr(main, "registry", RegistryHolder(None))
+    response = client.get("/v1/registry", headers=HEADERS)
+    assert response.status_code == 404
+    assert response.json()["error"]["code"] == "REGISTRY_NOT_CONFIGURED"
+
+
+def test_replaced_snapshot_is_picked_up(registry_path):
+    assert client.get("/v1/registry", headers=HEADERS).json()["athletes"] == len(ATHLETES)
+    before = main.registry.get()
+
+    write_registry(ATHLETES[:10], registry_path)
+    response = client.post("/v1/registry/reload", headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json()["athletes"] == 10
+    # Readers holding the previous snapshot keep a consistent view
+    assert before.count == len(ATHLETES)
+    assert before.record(int(before.rows(["A30"])[0]))["club_id"] == "C0"
+
+
+def test_invalid_snapshot_is_rejected(registry_path):
+    with open(registry_path, "wb") as f:
+        f.write(b"not a registry")
+    response = client.post("/v1/registry/reload", headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "INVALID_REGISTRY"
+
+
+def test_corrupted_snapshot_keeps_the_last_good_one(registry_path):
+    ids_only = make_request([{"athlete_id": f"A{i}"} for i in range(8)])
+    expected = client.post("/v1/brackets/generate", json=ids_only, headers=HEADERS).json()
+
+    with open(registry_path, "wb") as f:
+        f.write(b"ATHREG01 truncated")
+    assert client.post("/v1/brackets/generate", json=ids_only, headers=HEADERS).json() == expected
+    item = client.post("/v1/brackets/batch", json={"requests": [ids_only]}, headers=HEADERS).json()["results"][0]
+    assert item["matches"] == expected["matches"]
+    patch = {**ids_only, "previous": expected, "add": [{"athlete_id": "A20"}]}
+    assert client.post("/v1/brackets/patch", json=patch, headers=HEADERS).status_code == 200
+
+    status = client.get("/v1/registry", headers=HEADERS).json()
+    assert status["athletes"] == len(ATHLETES)
+    assert status["load_error"]
+    response = client.post("/v1/registry/reload", headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "INVALID_REGISTRY"
+
+    write_registry(ATHLETES, registry_path)
+    assert "load_error" not in client.get("/v1/registry", headers=HEADERS).json()
+
+
+def test_cli_builds_snapshot(tmp_path):
+    source = tmp_path / "athletes.jsonl"
+    source.write_text("\n".join(f'{{"athlete_id": "A{i}", "club_id": "C{i}"}}' for i in range(5)) + "\n")
+    target = str(tmp_path / "registry.bin")
+    assert cli_main(["registry", "--in", str(source), "--out", target]) == 0
+    assert AthleteRegistry(target).count == 5
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".registry-")]
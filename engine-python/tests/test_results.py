@@ -0,0 +1,139 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core import EngineError, generate
+from app.models import MatchResult
+from app.results import LiveBracket, LiveStore
+
+client = TestClient(main.app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+def make_bracket(n=8, repechage=False):
+    return generate({
+        "context": {"sport": "judo", "format": "single_elim", "repechage": repechage, "draw_seed": "live_test"},
+        "rules": {"seeding_mode": "off"},
+        "participants": [{"athlete_id": f"A{i}", "club_id": f"C{i}"} for i in range(n)],
+    })
+
+
+def play_out(live, rng):
+    """Record random winners for every ready match until none are left."""
+    while True:
+        ready = [m for m in live.matches.values() if m.status == "ready"]
+        if not ready:
+            return
+        for m in ready:
+            live.apply([MatchResult(match_id=m.id, winner=rng.choice([m.athlete_red, m.athlete_white]))])
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = LiveStore(str(tmp_path))
+    monkeypatch.setattr(main, "live_brackets", store)
+    return store
+
+
+def test_winner_advances_to_next_match():
+    bracket = make_bracket(8)
+    live = LiveBracket(bracket)
+    first = bracket.matches[0]
+
+    changed = live.apply([MatchResult(match_id=first.id, winner=first.athlete_white)])
+    assert [m.id for m in changed] == [first.id, first.next_match_id]
+    assert changed[0].status == "completed"
+    assert changed[1].athlete_red == first.athlete_white
+    assert changed[1].status == "waiting"
+
+    second = bracket.matches[1]
+    changed = live.apply([MatchResult(match_id=second.id, winner=second.athlete_red)])
+    assert changed[1].athlete_white == second.athlete_red
+    assert changed[1].status == "ready"
+
+
+def test_byes_walk_over():
+    bracket = make_bracket(5)
+    live = LiveBracket(bracket)
+    for m in bracket.matches[:4]:
+        athletes = [a for a in (m.athlete_red, m.athlete_white) if a]
+        if len(athletes) < 2:
+            assert live.matches[m.id].status == "walkover"
+            assert live.matches[m.id].winner == (athletes[0] if athletes else None)
+
+
+def test_every_match_resolves():
+    live = LiveBracket(make_bracket(27, repechage=True))
+    play_out(live, random.Random(3))
+    assert {m.status for m in live.matches.values()} <= {"completed", "walkover"}
+    final = next(m for m in live.matches.values() if m.match_type == "final")
+    assert final.winner is not None
+
+
+def test_result_errors():
+    bracket = make_bracket(8)
+    live = LiveBracket(bracket)
+    first, final = bracket.matches[0], bracket.matches[-1]
+
+    with pytest.raises(EngineError) as e:
+        live.apply([MatchResult(match_id="nope", winner="A1")])
+    assert e.value.code == "UNKNOWN_MATCH"
+    with pytest.raises(EngineError) as e:
+        live.apply([MatchResult(match_id=final.id, winner="A1")])
+    assert e.value.code == "MATCH_NOT_READY"
+    with pytest.raises(EngineError) as e:
+        live.apply([MatchResult(match_id=first.id, winner="someone")])
+    assert e.value.code == "INVALID_WINNER"
+
+    live.apply([MatchResult(match_id=first.id, winner=first.athlete_red)])
+    # The same result again is a no-op; a different winner is a conflict
+    assert live.apply([MatchResult(match_id=first.id, winner=first.athlete_red)]) == []
+    with pytest.raises(EngineError) as e:
+        live.apply([MatchResult(match_id=first.id, winner=first.athlete_white)])
+    assert e.value.code == "RESULT_ALREADY_RECORDED"
+    assert e.value.status_code == 409
+
+
+def test_replay_from_log(tmp_path):
+    bracket = make_bracket(16, repechage=True)
+    log_path = str(tmp_path / "results.jsonl")
+    live = LiveBracket(bracket, log_path)
+    play_out(live, random.Random(11))
+    live.close()
+    with open(log_path, "a") as f:
+        f.write('{"match_id": "torn')
+
+    replayed = LiveBracket.replay(bracket, log_path)
+    assert replayed.applied == live.applied
+    assert replayed.snapshot() == live.snapshot()
+    # The torn tail is dropped so later results start on a fresh line
+    replayed.close()
+    with open(log_path) as f:
+        assert f.read().endswith("}\n")
+
+
+def test_live_endpoints_recover_after_restart(store, monkeypatch, tmp_path):
+    bracket = make_bracket(8).model_dump()
+    response = client.put("/v1/live/u60-final", json=bracket, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json()["applied"] == 0
+
+    first = bracket["matches"][0]
+    result = {"match_id": first["id"], "winner": first["athlete_red"]}
+    response = client.post("/v1/live/u60-final/results", json={"results": [result]}, headers=HEADERS)
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()["changed"]] == [first["id"], first["next_match_id"]]
+
+    # A new process with the same directory replays the log
+    monkeypatch.setattr(main, "live_brackets", LiveStore(str(tmp_path)))
+    state = client.get("/v1/live/u60-final", headers=HEADERS).json()
+    assert state["applied"] == 1
+    assert next(m for m in state["matches"] if m["id"] == first["id"])["winner"] == first["athlete_red"]
+
+    response = client.post("/v1/live/u60-final/results", json={"results": [{**result, "winner": first["athlete_white"]}]}, headers=HEADERS)
+    assert response.status_code == 409
+    assert response.json()["error"]["details"]["index"] == 0
+    assert client.get("/v1/live/missing", headers=HEADERS).status_code == 404
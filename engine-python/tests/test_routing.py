@@ -0,0 +1,88 @@
+import random
+from collections import Counter
+
+from app import routing
+from app.columnar import from_columnar, to_columnar
+from app.core import generate
+from app.models import MatchResult
+from app.results import LiveBracket
+
+
+def make_bracket(n, fmt="single_elim", repechage=True):
+    return generate({
+        "context": {"sport": "judo", "format": fmt, "repechage": repechage, "draw_seed": "routing_test"},
+        "rules": {"seeding_mode": "off"},
+        "participants": [{"athlete_id": f"A{i}", "club_id": f"C{i}"} for i in range(n)],
+    })
+
+
+def play_out(bracket, seed=0):
+    """Play every match with random winners; return (live state, losses per athlete)."""
+    rng = random.Random(seed)
+    live = LiveBracket(bracket)
+    losses = Counter()
+    while True:
+        ready = [m for m in live.matches.values() if m.status == "ready"]
+        if not ready:
+            return live, losses
+        for m in ready:
+            winner, loser = rng.sample([m.athlete_red, m.athlete_white], 2)
+            live.apply([MatchResult(match_id=m.id, winner=winner)])
+            losses[loser] += 1
+
+
+def test_tables_are_cached():
+    assert routing.repechage(64) is routing.repechage(64)
+    assert routing.double_elim(64) is routing.double_elim(64)
+
+
+def test_judo_repechage_routing():
+    bracket = make_bracket(16)
+    by_id = {m.id: m for m in bracket.matches + bracket.repechage_matches}
+    quarter_finals = [m for m in bracket.matches if m.round == 2]
+    semi_finals = [m for m in bracket.matches if m.round == 3]
+    final = bracket.matches[-1]
+
+    assert [m.match_type for m in bracket.repechage_matches] == ["repechage", "repechage", "bronze", "bronze"]
+    assert final.next_match_id is None and final.loser_next_match_id is None
+    assert all(m.loser_next_match_id is None for m in bracket.matches if m.round == 1)
+    rep1, rep2, bronze1, bronze2 = bracket.repechage_matches
+    assert [m.loser_next_match_id for m in quarter_finals] == [rep1.id, rep1.id, rep2.id, rep2.id]
+    assert (rep1.next_match_id, rep2.next_match_id) == (bronze1.id, bronze2.id)
+    # Semi-final losers cross over to the other half
+    assert [by_id[m.loser_next_match_id] for m in semi_finals] == [bronze2, bronze1]
+
+    live, _ = play_out(bracket)
+    assert all(live.matches[m.id].status == "completed" for m in bracket.repechage_matches)
+
+
+def test_four_entries_single_bronze():
+    bracket = make_bracket(4)
+    assert [m.match_type for m in bracket.repechage_matches] == ["bronze"]
+    assert all(m.loser_next_match_id == bracket.repechage_matches[0].id for m in bracket.matches[:2])
+
+
+def test_double_elimination_needs_two_losses():
+    for n in (16, 32):
+        bracket = make_bracket(n, fmt="double_elim")
+        types = Counter(m.match_type for m in bracket.repechage_matches)
+        assert types == {"losers": n - 2, "grand_final": 1}
+        assert all(m.loser_next_match_id for m in bracket.matches)
+
+        live, losses = play_out(bracket, seed=n)
+        grand_final = live.matches[bracket.repechage_matches[-1].id]
+        assert grand_final.status == "completed"
+        assert losses[grand_final.winner] <= 1
+        # No bracket reset: the grand final loser may go out with one loss
+        finalists = {grand_final.athlete_red, grand_final.athlete_white}
+        assert all(losses[f"A{i}"] == 2 for i in range(n) if f"A{i}" not in finalists)
+
+
+def test_double_elimination_with_byes_resolves():
+    live, _ = play_out(make_bracket(11, fmt="double_elim"), seed=3)
+    assert {m.status for m in live.matches.values()} <= {"completed", "walkover"}
+
+
+def test_columnar_round_trip_keeps_routing():
+    for bracket in (make_bracket(16), make_bracket(12, fmt="double_elim")):
+        assert from_columnar(to_columnar(bracket)) == bracket.model_dump()
@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+from fastapi.testclient import TestClient
+
+from app.core import generate
+from app.main import app
+from app.schedule import schedule_event
+
+client = TestClient(app)
+
+HEADERS = {"Authorization": "Bearer test"}
+
+
+def make_division(division_id, n, repechage=False, prefix=None):
+    bracket = generate({
+        "context": {"sport": "judo", "format": "single_elim", "repechage": repechage, "draw_seed": division_id},
+        "rules": {"seeding_mode": "off"},
+        "participants": [{"athlete_id": f"{prefix or division_id}-{i}", "club_id": f"C{i % 3}"} for i in range(n)],
+    })
+    return {"division_id": division_id, "bracket": bracket.model_dump()}
+
+
+def check_constraints(request, result):
+    rest = request.get("min_rest", 10)
+    placed = {(m.division_id, m.match_id): m for m in result.matches}
+
+    by_mat = defaultdict(list)
+    for m in result.matches:
+        by_mat[m.mat].append(m)
+    for matches in by_mat.values():
+        matches.sort(key=lambda m: m.start)
+        for a, b in zip(matches, matches[1:]):
+            assert a.end <= b.start
+
+    for division in request["divisions"]:
+        for m in division["bracket"]["matches"]:
+            feeder = placed.get((division["division_id"], m["id"]))
+            target = placed.get((division["division_id"], m["next_match_id"]))
+            if feeder and target:
+                assert feeder.end + rest <= target.start
+
+
+def test_single_division_schedule():
+    request = {"divisions": [make_division("u60", 16)], "mats": 2, "match_duration": 5, "min_rest": 10}
+    result = schedule_event(request)
+
+    assert len(result.matches) == 15
+    assert not result.walkovers
+    assert {m.mat for m in result.matches} == {1, 2}
+    check_constraints(request, result)
+    final = max(result.matches, key=lambda m: m.round)
+    assert result.makespan == final.end
+
+
+def test_byes_are_walkovers():
+    request = {"divisions": [make_division("u66", 5)], "mats": 1}
+    result = schedule_event(request)
+
+    # 8 slots, 5 athletes: 2 real round-1 matches, 3 byes
+    assert len(result.matches) == 4
+    assert len(result.walkovers) == 3
+    check_constraints(request, result)
+
+
+def test_shared_athlete_rests_between_divisions():
+    request = {
+        "divisions": [make_division("open", 4, prefix="x"), make_division("u73", 4, prefix="x")],
+        "mats": 4,
+        "min_rest": 15,
+    }
+    result = schedule_event(request)
+    bouts = defaultdict(list)
+    for division in request["divisions"]:
+        for m in division["bracket"]["matches"]:
+            placed = next(s for s in result.matches if (s.division_id, s.match_id) == (division["division_id"], m["id"]))
+            for athlete in (m["athlete_red"], m["athlete_white"]):
+                if athlete:
+                    bouts[athlete].append(placed)
+    for athlete, matches in bouts.items():
+        matches.sort(key=lambda m: m.start)
+        assert matches[0].end + 15 <= matches[1].start
+
+
+def test_incremental_reschedule_keeps_fixed_matches():
+    request = {"divisions": [make_division("a", 16), make_division("b", 12, repechage=True)], "mats": 3}
+    first = schedule_event(request)
+    check_constraints(request, first)
+    now = first.makespan // 2
+    # The match started last is running 20 minutes over
+    started = [m.model_dump() for m in first.matches if m.start < now]
+    started[-1]["end"] = max(started[-1]["end"], now) + 20
+    second = schedule_event({**request, "now": now, "fixed": started})
+
+    fixed_keys = {(m["division_id"], m["match_id"]) for m in started}
+    assert len(second.matches) == len(first.matches)
+    for m in second.matches:
+        if (m.division_id, m.match_id) in fixed_keys:
+            assert m.model_dump() in started
+        else:
+            assert m.start >= now
+    check_constraints(request, second)
+
+
+def test_schedule_endpoint_errors():
+    division = make_division("u81", 8)
+    response = client.post("/v1/events/schedule", json={"divisions": [division], "mats": 0}, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "INVALID_MATS"
+
+    response = client.post("/v1/events/schedule", json={"divisions": [division, division], "mats": 2}, headers=HEADERS)
+    assert response.json()["error"]["code"] == "DUPLICATE_DIVISION_IDS"
+
+    fixed = [{"division_id": "u81", "match_id": "nope", "round": 1, "mat": 1, "start": 0, "end": 5}]
+    response = client.post("/v1/events/schedule", json={"divisions": [division], "mats": 2, "fixed": fixed}, headers=HEADERS)
+    assert response.json()["error"]["code"] == "UNKNOWN_MATCHES"
+
+    response = client.post("/v1/events/schedule", json={"divisions": [division], "mats": 2}, headers=HEADERS)
+    assert response.status_code == 200
+    assert len(response.json()["matches"]) == 7
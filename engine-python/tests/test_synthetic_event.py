@@ -0,0 +1,88 @@
+import io
+import json
+import re
+import sqlite3
+from pathlib import Path
+
+from app.core import validate_request
+from app.models import GenerateBracketRequest
+from benchmarks.synthetic_event import EventSpec, generate_event, write_jsonl, write_sql
+
+SEED_DB = Path(__file__).resolve().parents[2] / "orchestrator-ts" / "scripts" / "seed_db.sql"
+SPEC = EventSpec(athletes=1500, divisions=40, seed=3)
+
+
+def test_event_shape():
+    divisions = list(generate_event(SPEC))
+    assert len(divisions) == 40
+    assert len({d.code for d in divisions}) == 40
+    athletes = {a.id: a for d in divisions for a in d.athletes}
+    assert sorted(athletes) == list(range(1, SPEC.athletes + 1))
+    for d in divisions:
+        assert SPEC.min_size <= len(d.athletes) <= SPEC.max_size
+        assert len({a.id for a in d.athletes}) == len(d.athletes)
+    entries = sum(len(d.athletes) for d in divisions)
+    assert entries > SPEC.athletes  # some athletes enter two divisions
+    ranked = [a for a in athletes.values() if a.ranking_points is not None]
+    assert 0.7 < len(ranked) / len(athletes) < 0.95
+    clubs = {}
+    for a in athletes.values():
+        clubs[a.club_id] = clubs.get(a.club_id, 0) + 1
+    sizes = sorted((n for c, n in clubs.items() if c), reverse=True)
+    assert sizes[0] > 10 * sizes[len(sizes) // 2]  # skewed club sizes
+    assert len({a.nation_code for a in athletes.values()}) > 5
+
+
+def test_re_entries_never_repeat_an_athlete_in_a_division():
+    # Enough divisions and re-entries that re-entered athletes cycle through the window
+    spec = EventSpec(athletes=20000, divisions=600, multi_entry_rate=0.2, seed=0)
+    divisions = list(generate_event(spec))
+    assert sum(len(d.athletes) for d in divisions) > spec.athletes * 1.1
+    for d in divisions:
+        assert len({a.id for a in d.athletes}) == len(d.athletes), d.id
+
+
+def test_jsonl_payloads_are_valid_and_deterministic():
+    out = io.StringIO()
+    assert write_jsonl(SPEC, out) == 40
+    again = io.StringIO()
+    write_jsonl(SPEC, again)
+    assert out.getvalue() == again.getvalue()
+    lines = out.getvalue().splitlines()
+    for line in lines:
+        validate_request(GenerateBracketRequest.model_validate(json.loads(line)))
+    assert any(json.loads(line)["history"]["recent_pairs"] for line in lines)
+
+
+def test_sql_loads_into_seed_schema():
+    schema = SEED_DB.read_text(encoding="utf-8")
+    # The four event tables use plain SQL that SQLite accepts; the job tables do not
+    tables = re.findall(r"CREATE TABLE IF NOT EXISTS (?:events|athletes|event_divisions|event_registrations) \(.*?\);", schema, re.S)
+    assert len(tables) == 4
+    out = io.StringIO()
+    write_sql(SPEC, out)
+    db = sqlite3.connect(":memory:")
+    db.executescript("\n".join(tables))
+    db.executescript("\n".join(line for line in out.getvalue().splitlines() if not line.startswith("SELECT setval")))
+    assert db.execute("SELECT COUNT(*) FROM athletes").fetchone() == (SPEC.athletes,)
+    assert db.execute("SELECT COUNT(*) FROM event_divisions").fetchone() == (40,)
+    entries = sum(len(d.athletes) for d in generate_event(SPEC))
+    assert db.execute("SELECT COUNT(*) FROM event_registrations").fetchone() == (entries,)
+
+
+def test_several_events_get_distinct_ids():
+    spec = EventSpec(athletes=200, divisions=8, seed=5)
+    schema = SEED_DB.read_text(encoding="utf-8")
+    tables = re.findall(r"CREATE TABLE IF NOT EXISTS (?:events|athletes|event_divisions|event_registrations) \(.*?\);", schema, re.S)
+    out = io.StringIO()
+    assert write_sql(spec, out, events=3) == 24
+    db = sqlite3.connect(":memory:")
+    db.executescript("\n".join(tables))
+    db.executescript("\n".join(line for line in out.getvalue().splitlines() if not line.startswith("SELECT setval")))
+    assert db.execute("SELECT COUNT(*), MAX(id) FROM athletes").fetchone() == (600, 600)
+    assert db.execute("SELECT event_id, COUNT(*) FROM event_divisions GROUP BY event_id").fetchall() == [(1, 8), (2, 8), (3, 8)]
+    # Registrations stay within their event
+    assert db.execute(
+        "SELECT COUNT(*) FROM event_registrations r JOIN event_divisions d ON d.id = r.division_id WHERE d.event_id != r.event_id"
+    ).fetchone() == (0,)
+    assert db.execute("SELECT COUNT(DISTINCT name) FROM events").fetchone() == (3,)
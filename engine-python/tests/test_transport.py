@@ -0,0 +1,64 @@
+import msgpack
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+HEADERS = {"Authorization": "Bearer test"}
+MSGPACK_HEADERS = {**HEADERS, "Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+
+
+def make_request(n=10):
+    return {
+        "context": {"sport": "judo", "format": "single_elim", "draw_seed": "transport_test"},
+        "rules": {"seeding_mode": "auto", "max_seeds": 4},
+        "participants": [
+            {"athlete_id": f"P{i}", "club_id": f"C{i % 3}", "nation_code": "ITA", "ranking_points": 100 - i}
+            for i in range(n)
+        ],
+    }
+
+
+def test_msgpack_round_trip_matches_json():
+    expected = client.post("/v1/brackets/generate", json=make_request(), headers=HEADERS).json()
+    response = client.post("/v1/brackets/generate", content=msgpack.packb(make_request()), headers=MSGPACK_HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == expected
+
+
+def test_msgpack_request_with_json_response():
+    headers = {**HEADERS, "Content-Type": "application/msgpack"}
+    response = client.post("/v1/brackets/generate", content=msgpack.packb(make_request()), headers=headers)
+    assert response.status_code == 200
+    assert response.json()["summary"]["participants"] == 10
+
+
+def test_msgpack_validation_errors_match_json():
+    request_data = make_request()
+    del request_data["rules"]
+    response = client.post("/v1/brackets/generate", content=msgpack.packb(request_data), headers=MSGPACK_HEADERS)
+    assert response.status_code == 422
+
+
+def test_invalid_msgpack_body():
+    response = client.post("/v1/brackets/generate", content=b"\xc1", headers=MSGPACK_HEADERS)
+    assert response.status_code == 400
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["error"]["code"] == "INVALID_MSGPACK"
+
+    headers = {**HEADERS, "Content-Type": "application/msgpack"}
+    response = client.post("/v1/brackets/generate", content=b"\xc1", headers=headers)
+    assert response.json()["error"]["code"] == "INVALID_MSGPACK"
+
+
+def test_errors_are_packed_for_msgpack_clients():
+    headers = {**MSGPACK_HEADERS, "Authorization": "Bearer nope"}
+    response = client.post("/v1/brackets/generate", content=msgpack.packb(make_request()), headers=headers)
+    assert response.status_code == 401
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["error"]["code"] == "INVALID_TOKEN"
+
+    response = client.post("/v1/brackets/generate", content=msgpack.packb(make_request(1)), headers=MSGPACK_HEADERS)
+    assert response.status_code == 400
+    assert msgpack.unpackb(response.content)["error"]["code"] == "INVALID_PARTICIPANTS_COUNT"
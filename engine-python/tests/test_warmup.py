@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app import main, routing
+from app.capture import CaptureMiddleware
+from app.main import app
+from app.warmup import HEADERS, SIZES, Readiness, warm_up
+
+client = TestClient(app)
+
+
+def test_warm_up_runs_every_step():
+    readiness = Readiness()
+    routing.repechage.cache_clear()
+    asyncio.run(warm_up(app, readiness))
+    assert readiness.ready, readiness.error
+    assert list(readiness.steps) == ["routing_tables", "requests", "openapi"]
+    assert readiness.warmup_ms >= sum(readiness.steps.values()) - 1
+    assert routing.repechage.cache_info().currsize == len(SIZES)
+
+
+def test_failed_warm_up_keeps_worker_unready():
+    readiness = Readiness()
+    asyncio.run(warm_up(app, readiness, [("/v1/brackets/generate", {"context": {}})]))
+    assert readiness.state == "failed"
+    assert "422" in readiness.error or "400" in readiness.error
+
+
+def test_ready_endpoint_follows_readiness(monkeypatch):
+    monkeypatch.setattr(main.readiness, "state", "warming")
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "warming"}
+    assert client.get("/health").status_code == 200
+    monkeypatch.setattr(main.readiness, "state", "ready")
+    assert client.get("/ready").status_code == 200
+
+
+def test_lifespan_warms_up_in_the_background():
+    with TestClient(app) as c:
+        deadline = 200
+        while c.get("/ready").status_code != 200 and deadline:
+            deadline -= 1
+            time.sleep(0.02)
+        body = c.get("/ready").json()
+    assert body["status"] == "ready"
+    assert body["warmup_ms"] > 0
+
+
+def test_capture_skips_warm_up_requests(tmp_path):
+    capture = CaptureMiddleware(app, str(tmp_path / "capture.jsonl"))
+    scope = {"type": "http", "method": "POST", "path": "/v1/brackets/generate", "headers": HEADERS}
+    assert not capture._wants(scope)
+    assert capture._wants({**scope, "headers": HEADERS[:2]})
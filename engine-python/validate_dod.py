@@ -127,7 +127,7 @@ def test_stability():
             crash_count += 1
 
     elapsed = time.time() - start_time
-    print(".2f")
+    print(f"   {100 - crash_count}/100 runs succeeded in {elapsed:.2f}s")
     print(f"   Invalid quality scores: {invalid_quality_count}")
 
     assert crash_count == 0, f"Too many crashes: {crash_count}"
@@ -191,7 +191,7 @@ def test_quality():
     min_score = min(quality_scores)
     max_score = max(quality_scores)
 
-    print(".2f")
+    print(f"   Average quality: {avg_quality:.2f}")
     print(f"   Range: {min_score} - {max_score}")
 
     assert avg_quality >= 65, f"Average quality {avg_quality:.2f} below minimum 65"
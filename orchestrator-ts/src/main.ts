@@ -1,6 +1,7 @@
 import Fastify from 'fastify';
 import { MockAdapter, PostgresAdapter } from './adapters/persistence.js';
 import { z } from 'zod';
+import { createHmac } from 'node:crypto';
 
 const app = Fastify({ logger: true });
 
@@ -43,6 +44,12 @@ function computeBracketDiff(oldBracket: any, newBracket: any) {
     return { type: 'new', new_matches: newBracket.matches || [] };
   }
 
+  // Engine results carry a Merkle root hash: equal roots mean nothing changed
+  const oldRoot = oldBracket.hashes?.bracket;
+  if (oldRoot && oldRoot === newBracket.hashes?.bracket) {
+    return { type: 'diff', changed_matches: [], added_matches: [], removed_matches: [] };
+  }
+
   const oldMatches = oldBracket.matches || [];
   const newMatches = newBracket.matches || [];
 
@@ -57,7 +64,9 @@ function computeBracketDiff(oldBracket: any, newBracket: any) {
     const oldMatch = oldMatchMap.get(id);
     if (!oldMatch) {
       added.push(newMatch);
-    } else if (JSON.stringify(oldMatch) !== JSON.stringify(newMatch)) {
+    } else if (oldMatch.hash && newMatch.hash
+      ? oldMatch.hash !== newMatch.hash
+      : JSON.stringify(oldMatch) !== JSON.stringify(newMatch)) {
       changed.push({ old: oldMatch, new: newMatch });
     }
   }
@@ -337,7 +346,7 @@ async function sendWebhook(url: string, secret: string, event: string, data: any
     ...data,
   };
   const body = JSON.stringify(payload);
-  const signature = require('crypto').createHmac('sha256', secret).update(body).digest('hex');
+  const signature = createHmac('sha256', secret).update(body).digest('hex');
 
   const maxRetries = 3;
   let attempt = 0;
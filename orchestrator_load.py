@@ -0,0 +1,270 @@
+"""Drive the orchestrator with many events at once and time every division end to end.
+
+Usage:
+    python orchestrator_load.py --events 50 [--first-event 1] [--orchestrator http://localhost:3001]
+                                [--concurrency 16] [--webhook-port 8090] [--webhook-url URL]
+                                [--secret shared] [--timeout 600] [--poll-interval-ms 1000]
+                                [--orchestrators 1] [--engine http://localhost:8000] [--json report.json]
+
+The orchestrator has no endpoint that creates events, so seed them first
+(with ``DATABASE_URL`` set; without it the orchestrator's mock adapter
+gives every event one four-athlete division):
+
+    cd engine-python
+    python -m benchmarks.synthetic_event --events 50 --athletes 300 --divisions 10 --format sql --out /tmp/events.sql
+    psql "$DATABASE_URL" -f /tmp/events.sql
+
+The driver runs the webhook stand-in (``webhook_receiver.py``) in-process,
+triggers ``generate-all-brackets`` for events ``--first-event`` onwards,
+``--concurrency`` at a time, and waits until every enqueued division has
+sent ``bracket.generated`` or ``bracket.failed`` (or ``--timeout``). The
+orchestrator must be able to reach ``--webhook-url`` (from Docker:
+``http://host.docker.internal:8090/webhook``).
+
+The report has the trigger latency of the orchestrator API, the end-to-end
+time of each division from its event's trigger being sent to its webhook,
+and the pipeline throughput. Webhooks can arrive before the trigger's
+response (the worker may finish the first division while the orchestrator
+is still enqueueing the rest), so every event of the run is known up front. The orchestrator worker takes one job per
+``WORKER_POLL_INTERVAL_MS`` tick, so throughput cannot exceed
+``--orchestrators`` x 1000 / ``--poll-interval-ms`` divisions per second;
+the report compares the two, with the median gap between completions
+(about the poll interval when the poller is the limit). With ``--engine``
+it also reads the engine's ``/capacity`` before and after the run, to show
+how busy the engine was meanwhile. Exits 1 if any division is missing.
+"""
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from webhook_receiver import Receiver, percentile
+
+DONE_EVENTS = ("bracket.generated", "bracket.failed")
+OVERRIDES = {"seeding_mode": "auto", "max_seeds": 8, "repechage": True, "separate_by": ["club"]}
+
+
+def _http(method: str, url: str, body: Optional[dict] = None, timeout: float = 30.0) -> Tuple[int, dict]:
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        try:
+            return e.code, json.loads(payload)
+        except ValueError:
+            return e.code, {"error": payload.decode(errors="replace")}
+
+
+class Run:
+    """Triggers, enqueue times and webhook completions of one run."""
+
+    def __init__(self, event_ids: List[str]):
+        self.events = set(event_ids)
+        self.sent_at: Dict[str, float] = {}
+        self.expected: Dict[str, int] = {}
+        self.skipped = 0
+        self.trigger_ms: List[float] = []
+        self.trigger_errors: Dict[str, str] = {}
+        # (event id, division id) -> (arrival, webhook event)
+        self.completions: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        self.unexpected = 0
+        self.triggered = False
+        self.all_done = asyncio.Event()
+
+    def total_expected(self) -> int:
+        return sum(self.expected.values())
+
+    def completed(self) -> int:
+        """Completions of events whose trigger succeeded (the others expect nothing)."""
+        return sum(key[0] in self.expected for key in self.completions)
+
+    def check_done(self):
+        if self.triggered and self.completed() >= self.total_expected():
+            self.all_done.set()
+
+    def on_delivery(self, event: str, body: bytes, status: int):
+        if event not in DONE_EVENTS:
+            return
+        try:
+            payload = json.loads(body)
+            key = (str(payload["event_id"]), str(payload["division_id"]))
+        except (ValueError, KeyError, TypeError):
+            self.unexpected += 1
+            return
+        if key in self.completions:
+            return  # a retry; the receiver counts duplicates
+        if key[0] not in self.events:
+            self.unexpected += 1
+            return
+        # Stored even before the event's trigger has answered
+        self.completions[key] = (time.perf_counter(), event)
+        self.check_done()
+
+
+async def _trigger(run: Run, orchestrator: str, event_id: str, webhook_url: str, secret: str, slots: asyncio.Semaphore):
+    body = {"webhook": {"url": webhook_url, "secret": secret}, "overrides": OVERRIDES}
+    async with slots:
+        start = run.sent_at[event_id] = time.perf_counter()
+        try:
+            status, response = await asyncio.to_thread(
+                _http, "POST", f"{orchestrator}/v1/events/{event_id}/generate-all-brackets", body
+            )
+        except OSError as e:
+            run.trigger_errors[event_id] = str(e)
+            return
+        now = time.perf_counter()
+    run.trigger_ms.append((now - start) * 1000)
+    if status != 200:
+        run.trigger_errors[event_id] = f"HTTP {status}: {response}"
+        return
+    run.expected[event_id] = int(response.get("jobs_enqueued", 0))
+    run.skipped += int(response.get("jobs_skipped", 0))
+
+
+def _capacity(engine: Optional[str]) -> Optional[dict]:
+    if not engine:
+        return None
+    try:
+        return _http("GET", f"{engine}/capacity", timeout=5)[1]
+    except OSError:
+        return None
+
+
+async def drive(orchestrator: str, event_ids: List[str], webhook_port: int, webhook_url: str, secret: str,
+                concurrency: int, timeout: float, engine: Optional[str] = None) -> Tuple[Run, dict]:
+    run = Run(event_ids)
+    receiver = Receiver(secret, on_delivery=run.on_delivery)
+    server = await asyncio.start_server(receiver.serve_connection, "0.0.0.0", webhook_port, backlog=1024)
+    capacity_before = await asyncio.to_thread(_capacity, engine)
+    slots = asyncio.Semaphore(concurrency)
+    async with server:
+        await asyncio.gather(*(_trigger(run, orchestrator, e, webhook_url, secret, slots) for e in event_ids))
+        run.triggered = True
+        run.check_done()
+        try:
+            await asyncio.wait_for(run.all_done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        receiver.close_connections()
+    capacity_after = await asyncio.to_thread(_capacity, engine)
+    extra = {"webhooks": receiver.stats.to_dict(), "engine_before": capacity_before, "engine_after": capacity_after}
+    return run, extra
+
+
+def _latency(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": max(values, default=0.0),
+    }
+
+
+def build_report(run: Run, extra: dict, poll_interval_ms: float, orchestrators: int) -> dict:
+    e2e = [(at - run.sent_at[key[0]]) * 1000 for key, (at, _) in run.completions.items() if key[0] in run.sent_at]
+    arrivals = sorted(at for at, _ in run.completions.values())
+    start = min(run.sent_at.values(), default=0.0)
+    span = arrivals[-1] - start if arrivals else 0.0
+    gaps = [(b - a) * 1000 for a, b in zip(arrivals, arrivals[1:])]
+    # steady-state rate: the first completion only waits for the first tick
+    throughput = (len(arrivals) - 1) / (arrivals[-1] - arrivals[0]) if len(arrivals) > 1 else 0.0
+    cap = orchestrators * 1000 / poll_interval_ms
+    report = {
+        "events": len(run.expected) + len(run.trigger_errors),
+        "trigger_errors": run.trigger_errors,
+        "trigger": _latency(run.trigger_ms),
+        "divisions": {
+            "expected": run.total_expected(),
+            "skipped": run.skipped,
+            "generated": sum(event == "bracket.generated" for _, event in run.completions.values()),
+            "failed": sum(event == "bracket.failed" for _, event in run.completions.values()),
+            "missing": run.total_expected() - run.completed(),
+            "unexpected_webhooks": run.unexpected,
+        },
+        "end_to_end": _latency(e2e),
+        "duration_s": span,
+        "throughput_per_s": throughput,
+        "poller_cap_per_s": cap,
+        "cap_utilisation": throughput / cap if cap else 0.0,
+        "median_gap_ms": percentile(gaps, 0.5),
+        "webhooks": extra["webhooks"],
+    }
+    before, after = extra.get("engine_before"), extra.get("engine_after")
+    if before and after:
+        report["engine"] = {
+            "requests": after["completed"] - before["completed"],
+            "p95_ms": after["p95_ms"],
+            "busy_share": after["cpu_per_s"],
+        }
+    return report
+
+
+def format_report(report: dict) -> str:
+    d = report["divisions"]
+    lines = [
+        f"{report['events']} events triggered ({len(report['trigger_errors'])} failed), trigger p50 "
+        f"{report['trigger']['p50_ms']:.0f} ms p95 {report['trigger']['p95_ms']:.0f} ms",
+        f"divisions: {d['expected']} enqueued ({d['skipped']} already queued or done), {d['generated']} generated, "
+        f"{d['failed']} failed, {d['missing']} missing",
+    ]
+    e2e = report["end_to_end"]
+    lines.append(
+        f"end to end (trigger -> webhook): p50 {e2e['p50_ms'] / 1000:.2f} s  p95 {e2e['p95_ms'] / 1000:.2f} s  "
+        f"p99 {e2e['p99_ms'] / 1000:.2f} s  max {e2e['max_ms'] / 1000:.2f} s"
+    )
+    lines.append(
+        f"throughput: {report['throughput_per_s']:.2f} divisions/s over {report['duration_s']:.1f} s; poller cap "
+        f"{report['poller_cap_per_s']:.2f}/s ({report['cap_utilisation']:.0%} used), median gap between completions "
+        f"{report['median_gap_ms']:.0f} ms"
+    )
+    if "engine" in report:
+        engine = report["engine"]
+        lines.append(
+            f"engine: {engine['requests']} requests, p95 {engine['p95_ms']:.0f} ms, "
+            f"{engine['busy_share']:.0%} CPU in the last second"
+        )
+    if report["cap_utilisation"] >= 0.8:
+        lines.append("=> the pipeline is running at the worker poller's one-job-per-tick limit")
+    for event_id, error in sorted(report["trigger_errors"].items()):
+        lines.append(f"TRIGGER FAILED event {event_id}: {error}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent event-scale driver for the orchestrator")
+    parser.add_argument("--orchestrator", default="http://localhost:3001", help="Orchestrator base URL")
+    parser.add_argument("--events", type=int, default=10, help="Events to trigger")
+    parser.add_argument("--first-event", type=int, default=1, help="Id of the first event")
+    parser.add_argument("--concurrency", type=int, default=16, help="Triggers in flight at once")
+    parser.add_argument("--webhook-port", type=int, default=8090)
+    parser.add_argument("--webhook-url", help="URL the orchestrator posts to (default: http://localhost:<port>/webhook)")
+    parser.add_argument("--secret", default="shared", help="Webhook secret sent with the triggers and verified")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for the webhooks")
+    parser.add_argument("--poll-interval-ms", type=float, default=1000.0, help="The orchestrator's WORKER_POLL_INTERVAL_MS")
+    parser.add_argument("--orchestrators", type=int, default=1, help="Orchestrator instances polling the queue")
+    parser.add_argument("--engine", help="Engine base URL, to read /capacity before and after")
+    parser.add_argument("--json", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    event_ids = [str(args.first_event + i) for i in range(args.events)]
+    webhook_url = args.webhook_url or f"http://localhost:{args.webhook_port}/webhook"
+    run, extra = asyncio.run(drive(args.orchestrator, event_ids, args.webhook_port, webhook_url, args.secret,
+                                   args.concurrency, args.timeout, args.engine))
+    report = build_report(run, extra, args.poll_interval_ms, args.orchestrators)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["divisions"]["missing"] or report["trigger_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,309 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
+"""Local stand-in for a client system receiving orchestrator webhooks.
+
+Usage:
+    python webhook_receiver.py [--port 8090] [--secret shared] [--tolerance 300]
+                               [--fail-rate 0.1 --fail-status 500] [--delay-ms 0]
+                               [--verbose] [--report-every 5] [--json stats.json]
+
+An asyncio HTTP/1.1 server (keep-alive, standard library only) that accepts
+POSTs on any path, as the orchestrator sends them (``sendWebhook`` in
+``orchestrator-ts/src/main.ts``), and answers:
+
+- 401 if ``X-Athlos-Signature`` is not ``sha256=<hex HMAC-SHA256 of the
+  body with the secret>`` (``--insecure`` skips the check), or if
+  ``X-Athlos-Timestamp`` is missing or more than ``--tolerance`` seconds
+  away from now
+- ``--fail-status`` for a ``--fail-rate`` fraction of valid deliveries, to
+  exercise the orchestrator's retries and dead letters
+- 200 otherwise, after ``--delay-ms``
+
+Per ``X-Athlos-Event`` it counts deliveries and duplicates (a signature
+seen before: the orchestrator signs once and retries the same body).
+Duplicates of a delivery that got an error answer are expected retries;
+duplicates of one that got 200 were delivered twice. Delivery latency is
+now minus ``X-Athlos-Timestamp``, which has whole-second resolution; it
+includes the orchestrator's retry backoff.
+
+``GET /stats`` returns the counters as JSON and ``DELETE /stats`` resets
+them. A summary line is printed every ``--report-every`` seconds while
+deliveries arrive, and the full stats on exit (``--json`` also writes them).
+"""
+from collections import Counter, OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+import argparse
+import asyncio
+import hashlib
+import hmac
 import json
+import os
+import random
+import signal
+import sys
+import time
+
+REASONS = {200: "OK", 204: "No Content", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+           429: "Too Many Requests", 500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+# Signatures remembered for duplicate detection, and latencies kept for percentiles
+DEDUP_WINDOW = 1_000_000
+LATENCY_SAMPLES = 100_000
+
+
+def expected_signature(secret: bytes, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: bytes, body: bytes, header: Optional[str]) -> bool:
+    return header is not None and hmac.compare_digest(header, expected_signature(secret, body))
+
+
+def timestamp_age(header: Optional[str], now: float) -> Optional[float]:
+    """Seconds since ``X-Athlos-Timestamp`` (negative if it is in the future), None if missing or malformed."""
+    try:
+        return now - int(header)
+    except (TypeError, ValueError):
+        return None
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class Stats:
+    """Delivery counters for one receiver."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.deliveries: Counter = Counter()
+        self.duplicates: Counter = Counter()
+        self.retries_after_failure: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self.injected_failures: Counter = Counter()
+        self.latencies_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        # signature -> status we answered for its last delivery
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+
+    def record(self, event: str, signature: str, status: int, latency_ms: float):
+        self.deliveries[event] += 1
+        self.latencies_ms.append(latency_ms)
+        previous = self._seen.pop(signature, None)
+        if previous is not None:
+            self.duplicates[event] += 1
+            if previous >= 300:
+                self.retries_after_failure[event] += 1
+        self._seen[signature] = status
+        if len(self._seen) > DEDUP_WINDOW:
+            self._seen.popitem(last=False)
+        if status >= 300:
+            self.injected_failures[event] += 1
+
+    def total(self) -> int:
+        return sum(self.deliveries.values())
+
+    def to_dict(self) -> dict:
+        elapsed = time.time() - self.started
+        latencies = list(self.latencies_ms)
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "deliveries": self.total(),
+            "per_second": round(self.total() / elapsed, 1) if elapsed > 0 else 0.0,
+            "events": dict(self.deliveries),
+            "duplicates": dict(self.duplicates),
+            "retries_after_failure": dict(self.retries_after_failure),
+            "injected_failures": dict(self.injected_failures),
+            "rejected": dict(self.rejected),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50)),
+                "p95": round(percentile(latencies, 0.95)),
+                "p99": round(percentile(latencies, 0.99)),
+                "max": round(max(latencies, default=0.0)),
+            },
+        }
+
+
+class Receiver:
+    """Verifies, counts and answers deliveries (see the module docstring).
+
+    ``on_delivery(event, body, status)`` is called for every verified
+    delivery with the status it is answered with.
+    """
+
+    def __init__(self, secret: Optional[str], tolerance: float = 300.0, fail_rate: float = 0.0, fail_status: int = 500,
+                 delay_ms: float = 0.0, verbose: bool = False, seed: Optional[int] = None,
+                 on_delivery: Optional[Callable[[str, bytes, int], None]] = None):
+        self.secret = secret.encode() if secret is not None else None
+        self.tolerance = tolerance
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.delay_ms = delay_ms
+        self.verbose = verbose
+        self.on_delivery = on_delivery
+        self.stats = Stats()
+        self._rng = random.Random(seed)
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    def close_connections(self):
+        """Close kept-alive connections so their handlers end before the loop does."""
+        for writer in list(self._connections):
+            writer.close()
+
+    async def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, bytes]:
+        if path.split("?")[0] == "/stats":
+            if method == "GET":
+                return 200, json.dumps(self.stats.to_dict()).encode()
+            if method == "DELETE":
+                self.stats = Stats()
+                return 204, b""
+            return 405, b""
+        if path == "/health" and method == "GET":
+            return 200, b'{"status": "ok"}'
+        if method != "POST":
+            return 405, b""
+        return await self.deliver(headers, body)
+
+    async def deliver(self, headers: Dict[str, str], body: bytes) -> Tuple[int, bytes]:
+        now = time.time()
+        event = headers.get("x-athlos-event", "unknown")
+        signature = headers.get("x-athlos-signature")
+        if self.secret is not None and not verify_signature(self.secret, body, signature):
+            self.stats.rejected["missing_signature" if signature is None else "bad_signature"] += 1
+            return 401, b'{"error": "invalid signature"}'
+        age = timestamp_age(headers.get("x-athlos-timestamp"), now)
+        if age is None or abs(age) > self.tolerance:
+            self.stats.rejected["bad_timestamp" if age is None else "stale_timestamp"] += 1
+            return 401, b'{"error": "invalid timestamp"}'
+        if self.verbose:
+            print(f"WEBHOOK: {event}")
+            print("Body:", body.decode(errors="replace"))
+        status = self.fail_status if self.fail_rate > 0 and self._rng.random() < self.fail_rate else 200
+        self.stats.record(event, signature or hashlib.sha256(body).hexdigest(), status, max(0.0, age) * 1000)
+        if self.on_delivery:
+            self.on_delivery(event, body, status)
+        if self.delay_ms > 0:
+            await asyncio.sleep(self.delay_ms / 1000)
+        return status, b""
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    return
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await _read_body(reader, headers)
+                status, payload = await self.handle(method, path, headers, body)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                head = [f"{version} {status} {REASONS.get(status, 'Unknown')}", f"Content-Length: {len(payload)}"]
+                if payload:
+                    head.append("Content-Type: application/json")
+                if not keep_alive:
+                    head.append("Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    return await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+def format_line(stats: dict, since: Optional[dict] = None, interval: Optional[float] = None) -> str:
+    total = stats["deliveries"]
+    rate = (total - since["deliveries"]) / interval if since is not None and interval else stats["per_second"]
+    events = " ".join(f"{k}={v}" for k, v in sorted(stats["events"].items())) or "-"
+    duplicates = sum(stats["duplicates"].values())
+    retries = sum(stats["retries_after_failure"].values())
+    latency = stats["latency_ms"]
+    return (
+        f"{total} deliveries ({rate:.0f}/s) {events} | rejected {sum(stats['rejected'].values())} "
+        f"| injected failures {sum(stats['injected_failures'].values())} "
+        f"| duplicates {duplicates} ({retries} after a failure) "
+        f"| latency p50 {latency['p50']:.0f} ms p95 {latency['p95']:.0f} ms"
+    )
+
+
+async def _report(receiver: Receiver, every: float):
+    previous = receiver.stats.to_dict()
+    while True:
+        await asyncio.sleep(every)
+        current = receiver.stats.to_dict()
+        if current["deliveries"] != previous["deliveries"] or current["rejected"] != previous["rejected"]:
+            since = previous if current["deliveries"] >= previous["deliveries"] else None  # reset in between
+            print(format_line(current, since, every), flush=True)
+        previous = current
+
+
+async def serve(receiver: Receiver, host: str, port: int, report_every: float):
+    server = await asyncio.start_server(receiver.serve_connection, host, port, backlog=1024)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    print(f"Webhook receiver listening on port {port}"
+          + (" (signatures not checked)" if receiver.secret is None else ""), flush=True)
+    reporter = asyncio.ensure_future(_report(receiver, report_every)) if report_every > 0 else None
+    async with server:
+        await stop.wait()
+        receiver.close_connections()
+    if reporter:
+        reporter.cancel()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Webhook receiver stand-in for load tests")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--secret", default=os.environ.get("WEBHOOK_SECRET", "shared"),
+                        help="HMAC secret the orchestrator was given (default: $WEBHOOK_SECRET or 'shared')")
+    parser.add_argument("--insecure", action="store_true", help="Accept deliveries without checking signatures")
+    parser.add_argument("--tolerance", type=float, default=300.0, help="Maximum timestamp skew in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of valid deliveries answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=500)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Wait before answering each delivery")
+    parser.add_argument("--seed", type=int, help="Seed for failure injection")
+    parser.add_argument("--verbose", action="store_true", help="Print every delivery")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Seconds between summary lines (0: none)")
+    parser.add_argument("--json", help="Write the final stats as JSON")
+    args = parser.parse_args(argv)
+
+    receiver = Receiver(None if args.insecure else args.secret, args.tolerance, args.fail_rate, args.fail_status,
+                        args.delay_ms, args.verbose, args.seed)
+    asyncio.run(serve(receiver, args.host, args.port, args.report_every))
+    stats = receiver.stats.to_dict()
+    print(format_line(stats))
+    print(json.dumps(stats, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+    return 0
 
-class WebhookHandler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        content_length = int(self.headers.get('Content-Length', '0'))
-        body = self.rfile.read(content_length)
-        event = self.headers.get("X-Athlos-Event", "unknown")
-        print(f"WEBHOOK: {event}")
-        print("Body:", body.decode())
-        self.send_response(200)
-        self.end_headers()
 
 if __name__ == "__main__":
-    server = HTTPServer(("0.0.0.0", 8090), WebhookHandler)
-    print("Webhook receiver listening on port 8090")
-    server.serve_forever()
\ No newline at end of file
+    sys.exit(main())